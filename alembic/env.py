@@ -16,9 +16,16 @@ if config.config_file_name is not None:
 
 # add your model's MetaData object here
 # for 'autogenerate' support
-# from myapp import mymodel
-# target_metadata = mymodel.Base.metadata
-target_metadata = None
+from backend.base import Base
+from backend.models import audit, file, tenant, todo, usage, user  # noqa: F401 - registers tables
+target_metadata = Base.metadata
+
+# A database other than sqlalchemy.url can be targeted with
+# ``alembic -x db_url=postgresql://...``; the tenant migration runner
+# (backend.services.migration_runner) passes an open connection instead.
+db_url = context.get_x_argument(as_dictionary=True).get("db_url")
+if db_url:
+    config.set_main_option("sqlalchemy.url", db_url.replace("%", "%%"))
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -57,6 +64,16 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(
+            connection=connection, target_metadata=target_metadata
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -0,0 +1,49 @@
+"""search_vector: full-text columns and GIN indexes on todos and files
+
+Revision ID: 9b41c07d3e2a
+Revises: e5d2ee4235b8
+Create Date: 2026-10-19 15:40:02.511207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b41c07d3e2a'
+down_revision: Union[str, None] = 'e5d2ee4235b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Same definitions as the after_create DDL in backend.models.todo and
+# backend.models.file; other dialects use the in-process search index
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(
+        "ALTER TABLE todos ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+        ") STORED"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_todos_search_vector ON todos USING gin (search_vector)")
+    op.execute(
+        "ALTER TABLE files ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS ("
+        "to_tsvector('simple', regexp_replace(filename, '[^[:alnum:]]+', ' ', 'g'))"
+        ") STORED"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_files_search_vector ON files USING gin (search_vector)")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP INDEX IF EXISTS ix_files_search_vector")
+    op.execute("ALTER TABLE files DROP COLUMN IF EXISTS search_vector")
+    op.execute("DROP INDEX IF EXISTS ix_todos_search_vector")
+    op.execute("ALTER TABLE todos DROP COLUMN IF EXISTS search_vector")
@@ -1,14 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-from google.oauth2 import id_token
-from google.auth.transport import requests
-from jose import JWTError, jwt
+from jose import jwt
 from datetime import datetime, timedelta, UTC
+import math
 from backend.config.tenant_config import config_manager
-from backend.services.user_service import user_service
-from backend.database import db_manager
+from backend.models.tenant import TenancyType
+from backend.services.google_tokens import SigningKeysUnavailable, google_verifier
+from backend.services.login_principal import principal_loader
+from backend.services.otp import OTPThrottled, otp_service
 from typing import Optional
-from sqlalchemy.orm import Session
 
 router = APIRouter()
 
@@ -18,13 +18,6 @@ ALGORITHM = "HS256"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-def get_db():
-    db = db_manager.get_db_session()
-    try:
-        yield db
-    finally:
-        db.close()
-
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -35,82 +28,77 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def _token_response(email: str, tenant_id: int, tenant_config) -> dict:
+    access_token = create_access_token(
+        data={
+            "sub": email,
+            "tenant_id": tenant_id,
+            "scopes": dict(tenant_config['features'])
+        },
+        expires_delta=timedelta(hours=tenant_config['security']['max_token_lifetime_hours'])
+    )
+    
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "tenant_id": tenant_id,
+        "features": tenant_config['features']
+    }
+
 @router.post("/auth/google")
-async def google_login(token: str, db: Session = Depends(get_db)):
+async def google_login(token: str):
     try:
-        # Verify Google token
-        idinfo = id_token.verify_oauth2_token(
-            token, requests.Request(), "YOUR_GOOGLE_CLIENT_ID"
-        )
-        
-        # Get user
-        user = user_service.get_user_by_email(db, idinfo['email'])
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Get tenant configuration
-        tenant_config = config_manager.get_tenant_config(user.tenant)
-        token_lifetime = tenant_config['security']['max_token_lifetime_hours']
-        
-        # Create access token
-        access_token = create_access_token(
-            data={
-                "sub": user.email,
-                "tenant_id": user.tenant_id,
-                "scopes": tenant_config['features']
-            },
-            expires_delta=timedelta(hours=token_lifetime)
+        # Verify Google token against cached signing keys
+        idinfo = await google_verifier.verify(token)
+    except SigningKeysUnavailable as e:
+        # Our outage, not a bad token
+        raise HTTPException(
+            status_code=503,
+            detail="Google sign-in temporarily unavailable",
+            headers={"Retry-After": str(e.retry_after)}
         )
-        
-        return {
-            "access_token": access_token,
-            "token_type": "bearer",
-            "tenant_id": user.tenant_id,
-            "features": tenant_config['features']
-        }
-        
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid token")
+    
+    # User, tenant and effective config in one query (or from cache)
+    principal = await principal_loader.load(idinfo['email'])
+    if not principal:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return _token_response(principal.email, principal.tenant_id, principal.config)
+
+def _throttled(e: OTPThrottled) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=str(e),
+        headers={"Retry-After": str(math.ceil(e.retry_after))}
+    )
 
 @router.post("/auth/otp/send")
-async def send_otp(email: str, db: Session = Depends(get_db)):
-    # Get user
-    user = user_service.get_user_by_email(db, email)
-    if not user:
+async def send_otp(email: str):
+    principal = await principal_loader.load(email)
+    if not principal:
         raise HTTPException(status_code=404, detail="User not found")
     
-    tenant_config = config_manager.get_tenant_config(user.tenant)
-    if not tenant_config['features'].get('otp_login', True):
+    if not principal.features.get('otp_login', True):
         raise HTTPException(status_code=403, detail="OTP login not enabled")
     
-    # Implement OTP generation and sending logic
-    pass
+    try:
+        await otp_service.send(email, principal.id, principal.tenant_id, principal.tenancy_type.value)
+    except OTPThrottled as e:
+        raise _throttled(e)
+    
+    return {"status": "sent", "expires_in": otp_service.ttl}
 
 @router.post("/auth/otp/verify")
-async def verify_otp(email: str, otp: str, db: Session = Depends(get_db)):
-    # Get user
-    user = user_service.get_user_by_email(db, email)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    tenant_config = config_manager.get_tenant_config(user.tenant)
-    token_lifetime = tenant_config['security']['max_token_lifetime_hours']
-    
-    # Verify OTP and create access token
-    # ... OTP verification logic ...
-    
-    access_token = create_access_token(
-        data={
-            "sub": email,
-            "tenant_id": user.tenant_id,
-            "scopes": tenant_config['features']
-        },
-        expires_delta=timedelta(hours=token_lifetime)
-    )
+async def verify_otp(email: str, otp: str):
+    # Two Redis round trips; the code carries everything the token needs
+    try:
+        grant = await otp_service.verify(email, otp)
+    except OTPThrottled as e:
+        raise _throttled(e)
+    if grant is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired code")
     
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "tenant_id": user.tenant_id,
-        "features": tenant_config['features']
-    } 
\ No newline at end of file
+    tenant_config = config_manager.get_tier_config(TenancyType(grant.tenancy_type))
+    return _token_response(grant.email, grant.tenant_id, tenant_config)
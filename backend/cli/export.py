@@ -0,0 +1,68 @@
+"""Export a tenant's data as NDJSON or CSV.
+
+    python -m backend.cli.export 42 --gzip -o tenant_42.ndjson.gz
+    python -m backend.cli.export 42 --include todos --format csv > todos.csv
+"""
+import argparse
+import asyncio
+import logging
+import sys
+
+import redis.asyncio as aioredis
+
+from backend.database import db_manager
+from backend.models.tenant import Tenant
+from backend.services.export_service import export_service, RECORD_TYPES
+from backend.services.tenant_redis import tenant_keyspace
+from backend.services.tenant_resources import tenant_resources
+
+logger = logging.getLogger(__name__)
+
+
+async def run(args) -> int:
+    with db_manager.get_db() as db:
+        tenant = db.query(Tenant).filter_by(id=args.tenant_id).first()
+        if not tenant:
+            logger.error(f"Tenant {args.tenant_id} not found")
+            return 1
+        redis_url = args.redis_url or tenant_resources.redis_url(tenant)
+        tenancy_type = tenant.tenancy_type
+
+    include = [kind for kind in args.include.split(",") if kind]
+    export_service.validate_request(include, args.format)
+
+    client = aioredis.from_url(redis_url, decode_responses=True) if "files" in include else None
+    # The export reads only the tenant's namespaced keys, as the API does
+    redis_client = tenant_keyspace.bind(client, args.tenant_id, tenancy_type) if client is not None else None
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        async for chunk in export_service.stream_export(
+            args.tenant_id, include, args.format, args.gzip, redis_client
+        ):
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+        if client is not None:
+            await client.aclose()
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("tenant_id", type=int)
+    parser.add_argument("--include", default=",".join(RECORD_TYPES))
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=export_service.batch_size)
+    parser.add_argument("--redis-url", help="override the tenant's Redis for file metadata")
+    parser.add_argument("-o", "--output", help="defaults to stdout")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    export_service.batch_size = args.batch_size
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
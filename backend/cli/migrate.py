@@ -0,0 +1,60 @@
+"""Apply schema migrations to the shared database and every tenant database.
+
+    python -m backend.cli.migrate --concurrency 32
+    python -m backend.cli.migrate --resume            # retry what failed or never ran
+    python -m backend.cli.migrate --tenant 42 --tenant 43
+"""
+import argparse
+import logging
+import sys
+
+from backend.services.migration_runner import migration_runner
+
+logger = logging.getLogger(__name__)
+
+
+def print_progress(report):
+    result = report["result"]
+    counts = ", ".join(f"{status} {count}" for status, count in sorted(report["counts"].items()))
+    print(
+        f"[{report['finished']}/{report['total']}] {report['target']}: {result['status']} "
+        f"in {result.get('seconds', 0)}s ({counts}; eta {report['eta_seconds']}s)",
+        file=sys.stderr
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--revision", default="head")
+    parser.add_argument("--concurrency", type=int, default=migration_runner.concurrency)
+    parser.add_argument("--config", default=migration_runner.alembic_ini, help="alembic.ini path")
+    parser.add_argument("--state", default=migration_runner.state_path,
+                        help="progress file used by --resume")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip databases already migrated to this revision")
+    parser.add_argument("--tenant", type=int, action="append", dest="tenant_ids",
+                        help="only these tenants (repeatable); skips the shared database")
+    parser.add_argument("--no-shared", action="store_true", help="leave the shared database alone")
+    parser.add_argument("--lock-timeout", default=migration_runner.lock_timeout)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    migration_runner.concurrency = args.concurrency
+    migration_runner.alembic_ini = args.config
+    migration_runner.state_path = args.state
+    migration_runner.lock_timeout = args.lock_timeout
+
+    counts = migration_runner.run(
+        args.revision,
+        resume=args.resume,
+        include_shared=not args.no_shared,
+        tenant_ids=args.tenant_ids,
+        progress=print_progress
+    )
+    logger.info(f"Migration finished: {counts}")
+    # Locked databases are being migrated elsewhere; --resume picks them up
+    return 1 if counts.get("failed") or counts.get("locked") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
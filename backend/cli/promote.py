@@ -0,0 +1,54 @@
+"""Move a shared tenant to dedicated resources without downtime.
+
+    python -m backend.cli.promote 42
+    python -m backend.cli.promote 42 --tenancy-type enterprise --drain-seconds 5
+"""
+import argparse
+import asyncio
+import logging
+import sys
+
+from backend.models.tenant import TenancyType
+from backend.services.tenant_events import tenant_events
+from backend.services.tenant_promotion import tenant_promotion
+
+logger = logging.getLogger(__name__)
+
+
+def print_progress(step, details):
+    print(f"{step}: {details}", file=sys.stderr)
+
+
+async def run(args) -> int:
+    try:
+        stats = await tenant_promotion.promote(
+            args.tenant_id, TenancyType(args.tenancy_type), progress=print_progress
+        )
+    except ValueError as e:
+        logger.error(str(e))
+        return 1
+    finally:
+        await tenant_events.close()
+    logger.info(f"Promoted tenant {args.tenant_id}: {stats}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("tenant_id", type=int)
+    parser.add_argument("--tenancy-type", choices=["dedicated", "enterprise"], default="dedicated")
+    parser.add_argument("--drain-seconds", type=float, default=tenant_promotion.drain_seconds)
+    parser.add_argument("--cutover-threshold", type=int, default=tenant_promotion.cutover_threshold,
+                        help="stop catching up once a pass sees this few changed rows")
+    parser.add_argument("--batch-size", type=int, default=tenant_promotion.batch_size)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    tenant_promotion.drain_seconds = args.drain_seconds
+    tenant_promotion.cutover_threshold = args.cutover_threshold
+    tenant_promotion.batch_size = args.batch_size
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
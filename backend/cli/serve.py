@@ -0,0 +1,206 @@
+"""Serve the API from several pre-forked worker processes.
+
+    python -m backend.cli.serve --workers 4 --port 8000
+    python -m backend.cli.serve --workers 8 --preload   # share imported code copy-on-write
+    kill -HUP <master pid>                               # graceful reload
+    kill -TERM <master pid>                              # graceful shutdown
+
+The master binds the listening socket, maps the shared-memory counters and
+tenant cache, then forks the workers, which all accept on that socket. A
+worker that dies is replaced. On SIGHUP a new set of workers is started and
+the old ones are only told to drain once the new ones have finished their
+startup, so no request is refused during a deploy. Without ``--preload``
+each worker imports the app itself, so a reload picks up new code.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import select
+import signal
+import socket
+import sys
+import time
+
+from backend.services.shared_state import shared_state
+
+logger = logging.getLogger("backend.cli.serve")
+
+APP = "backend.main:app"
+
+
+class Master:
+    def __init__(self, args):
+        self.args = args
+        self.workers = {}  # pid -> counter segment
+        self.retiring = set()
+        # Twice the workers so a reload can overlap the old and new sets;
+        # a segment keeps its counts when the next worker takes it over
+        self.free_segments = list(range(args.workers * 2))
+        self.stopping = False
+        self.reloading = False
+        self.app = APP
+        self.sock = None
+
+    def _bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.args.host, self.args.port))
+        sock.listen(self.args.backlog)
+        sock.set_inheritable(True)
+        return sock
+
+    def spawn(self) -> int:
+        """Fork one worker; returns the read end of its readiness pipe"""
+        segment = self.free_segments.pop(0)
+        ready_read, ready_write = os.pipe()
+        pid = os.fork()
+        if pid:
+            os.close(ready_write)
+            self.workers[pid] = segment
+            return ready_read
+
+        # Child
+        os.close(ready_read)
+        for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, signal.SIG_DFL)
+        shared_state.attach(segment)
+        code = 0
+        try:
+            asyncio.run(self._serve(ready_write))
+        except BaseException:
+            logger.exception("Worker crashed")
+            code = 1
+        finally:
+            os._exit(code)
+
+    async def _serve(self, ready_fd: int):
+        import uvicorn
+
+        config = uvicorn.Config(
+            self.app,
+            lifespan="on",
+            log_level=self.args.log_level,
+            timeout_graceful_shutdown=self.args.graceful_timeout,
+        )
+        server = uvicorn.Server(config)
+        task = asyncio.create_task(server.serve(sockets=[self.sock]))
+        while not server.started and not task.done():
+            await asyncio.sleep(0.05)
+        os.write(ready_fd, b"1")
+        os.close(ready_fd)
+        await task
+
+    def _wait_ready(self, fds, timeout: float) -> bool:
+        """Wait until every new worker has completed startup"""
+        deadline = time.monotonic() + timeout
+        pending = list(fds)
+        while pending and time.monotonic() < deadline:
+            readable, _, _ = select.select(pending, [], [], deadline - time.monotonic())
+            for fd in readable:
+                os.read(fd, 1)
+                os.close(fd)
+                pending.remove(fd)
+        for fd in pending:
+            os.close(fd)
+        return not pending
+
+    def _signal(self, pids, sig):
+        for pid in pids:
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            segment = self.workers.pop(pid, None)
+            if segment is not None:
+                self.free_segments.append(segment)
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+            elif not self.stopping:
+                logger.warning(f"Worker {pid} exited with status {status}; replacing it")
+                self._wait_ready([self.spawn()], self.args.startup_timeout)
+
+    def reload(self):
+        old = set(self.workers) - self.retiring
+        logger.info(f"Reloading: starting {self.args.workers} new workers")
+        fds = [self.spawn() for _ in range(self.args.workers)]
+        if not self._wait_ready(fds, self.args.startup_timeout):
+            logger.error("New workers did not become ready in time; draining the old ones anyway")
+        self.retiring |= old
+        self._signal(old, signal.SIGTERM)
+
+    def stop(self):
+        self._signal(list(self.workers), signal.SIGTERM)
+        deadline = time.monotonic() + self.args.graceful_timeout + 5
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        self._signal(list(self.workers), signal.SIGKILL)
+        self.reap()
+
+    def run(self) -> int:
+        shared_state.allocate(segments=len(self.free_segments), counter_slots=self.args.counter_slots)
+        self.sock = self._bind()
+        if self.args.preload:
+            from backend.main import app
+            self.app = app
+
+        def on_stop(signum, frame):
+            self.stopping = True
+
+        def on_reload(signum, frame):
+            self.reloading = True
+
+        signal.signal(signal.SIGTERM, on_stop)
+        signal.signal(signal.SIGINT, on_stop)
+        signal.signal(signal.SIGHUP, on_reload)
+
+        logger.info(f"Master {os.getpid()} listening on {self.args.host}:{self.args.port} "
+                    f"with {self.args.workers} workers")
+        self._wait_ready([self.spawn() for _ in range(self.args.workers)], self.args.startup_timeout)
+        while not self.stopping:
+            # One reload at a time: the previous workers must have drained
+            if self.reloading and not self.retiring:
+                self.reloading = False
+                self.reload()
+            self.reap()
+            time.sleep(0.2)
+
+        logger.info("Shutting down workers")
+        self.stop()
+        self.sock.close()
+        return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--preload", action="store_true",
+                        help="Import the app in the master before forking")
+    parser.add_argument("--graceful-timeout", type=int, default=30,
+                        help="Seconds a draining worker may spend finishing requests")
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--counter-slots", type=int, default=4096,
+                        help="Metric counters each worker can hold; a tenant and route "
+                             "takes about 15 with its latency histogram")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper())
+    return Master(args).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
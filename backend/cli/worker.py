@@ -0,0 +1,54 @@
+"""Run background job workers.
+
+    python -m backend.cli.worker --concurrency 16
+    python -m backend.cli.worker --lanes high default   # keep low-priority work elsewhere
+"""
+import argparse
+import asyncio
+import logging
+import signal
+import sys
+
+from backend.jobs import tasks  # noqa: F401 - registers handlers
+from backend.jobs.queue import PRIORITIES, job_queue
+from backend.jobs.worker import Worker
+from backend.services.pool_tuner import pool_tuner
+from backend.services.tenant_events import tenant_events
+from backend.services.tenant_purge import tenant_purge
+
+
+async def run(args):
+    worker = Worker(job_queue, concurrency=args.concurrency, lanes=args.lanes)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    tenant_events.install_default_handlers()
+    tenant_events.start()
+    pool_tuner.start()
+    try:
+        await worker.run()
+    finally:
+        await pool_tuner.close()
+        await tenant_purge.close()
+        await tenant_events.close()
+        await job_queue.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--lanes", nargs="+", choices=PRIORITIES, default=list(PRIORITIES))
+    parser.add_argument("--redis-url", default=job_queue.redis_url)
+    parser.add_argument("--tenant-concurrency", type=int,
+                        default=job_queue.default_tenant_concurrency)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    job_queue.redis_url = args.redis_url
+    job_queue.default_tenant_concurrency = args.tenant_concurrency
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
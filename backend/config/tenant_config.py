@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from pydantic import Field
+from pydantic import Field, PrivateAttr
 from typing import Dict
 import yaml
 import os
@@ -9,6 +9,8 @@ from backend.models.tenant import TenancyType
 class TenantConfig(BaseSettings):
     config_path: str = Field(default="config/tenant_config.yaml")
     configs: Dict = Field(default_factory=dict)
+    # Merged config per tenancy type; rebuilt when the YAML is reloaded
+    _tier_configs: Dict = PrivateAttr(default_factory=dict)
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -19,11 +21,24 @@ class TenantConfig(BaseSettings):
         if os.path.exists(self.config_path):
             with open(self.config_path) as f:
                 self.configs = yaml.safe_load(f)
+        self._tier_configs = {}
 
     def get_tenant_config(self, tenant) -> Dict:
         """Get configuration based on tenancy type"""
+        return self.get_tier_config(tenant.tenancy_type)
+
+    def get_tier_config(self, tenancy_type: TenancyType) -> Dict:
+        """Base configuration merged with a tenancy type's overrides.
+
+        Memoized per tenancy type; callers must not modify the result.
+        """
+        if tenancy_type not in self._tier_configs:
+            self._tier_configs[tenancy_type] = self._merge_tier_config(tenancy_type)
+        return self._tier_configs[tenancy_type]
+
+    def _merge_tier_config(self, tenancy_type: TenancyType) -> Dict:
         base_config = self.configs.get("base", {})
-        tenancy_config = self.configs.get(tenant.tenancy_type.value, {})
+        tenancy_config = self.configs.get(tenancy_type.value, {})
 
         # Merge base config with tenancy-specific config
         config = {**base_config}
@@ -0,0 +1,325 @@
+from typing import Awaitable, Callable, Dict, List, Optional
+from dataclasses import dataclass
+import json
+import logging
+import random
+import time
+import uuid
+
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = ("high", "default", "low")
+
+# Claims the next job, trying lanes in priority order. Jobs whose tenant is at
+# its concurrency cap are parked in the delayed set instead of being run. The
+# claim's token is stored with the job; only its holder can release it.
+# KEYS: ready lanes (highest first)
+# ARGV: prefix, now, lease, default cap, cap delay, token
+CLAIM_SCRIPT = """
+local prefix = ARGV[1]
+local now = tonumber(ARGV[2])
+local lease = tonumber(ARGV[3])
+local default_cap = tonumber(ARGV[4])
+local cap_delay = tonumber(ARGV[5])
+for _, lane in ipairs(KEYS) do
+    for _ = 1, 16 do
+        local id = redis.call('RPOP', lane)
+        if not id then break end
+        local job_key = prefix .. 'job:' .. id
+        if redis.call('EXISTS', job_key) == 1 then
+            local tenant = redis.call('HGET', job_key, 'tenant_id')
+            local running_key = prefix .. 'running:' .. tenant
+            local cap = tonumber(redis.call('HGET', prefix .. 'caps', tenant) or default_cap)
+            if tenant ~= '' and cap > 0 and tonumber(redis.call('GET', running_key) or '0') >= cap then
+                redis.call('ZADD', prefix .. 'delayed', now + cap_delay, id)
+            else
+                if tenant ~= '' then redis.call('INCR', running_key) end
+                redis.call('ZADD', prefix .. 'leases', now + lease, id)
+                redis.call('HINCRBY', job_key, 'attempts', 1)
+                redis.call('HSET', job_key, 'lease_token', ARGV[6])
+                return {id, redis.call('HGETALL', job_key)}
+            end
+        end
+    end
+end
+return nil
+"""
+
+# Releases a claimed job, unless the lease has since expired or been claimed
+# again: a worker that stalled past its lease must not settle the new attempt.
+# ARGV: prefix, id, outcome (ack|retry|dead), due, error, token
+RELEASE_SCRIPT = """
+local prefix = ARGV[1]
+local id = ARGV[2]
+local job_key = prefix .. 'job:' .. id
+if redis.call('HGET', job_key, 'lease_token') ~= ARGV[6] then
+    return 0
+end
+if redis.call('ZREM', prefix .. 'leases', id) == 0 then
+    return 0
+end
+redis.call('HDEL', job_key, 'lease_token')
+local tenant = redis.call('HGET', job_key, 'tenant_id')
+if tenant and tenant ~= '' then
+    local running_key = prefix .. 'running:' .. tenant
+    if tonumber(redis.call('DECR', running_key)) <= 0 then redis.call('DEL', running_key) end
+end
+if ARGV[3] ~= 'retry' then
+    local unique = redis.call('HGET', job_key, 'unique_key')
+    if unique and unique ~= '' then redis.call('DEL', prefix .. 'unique:' .. unique) end
+end
+if ARGV[3] == 'ack' then
+    redis.call('DEL', job_key)
+elseif ARGV[3] == 'retry' then
+    redis.call('HSET', job_key, 'last_error', ARGV[5])
+    redis.call('ZADD', prefix .. 'delayed', tonumber(ARGV[4]), id)
+else
+    redis.call('HSET', job_key, 'last_error', ARGV[5])
+    redis.call('LPUSH', prefix .. 'dead', id)
+end
+return 1
+"""
+
+# Extends a lease, if the caller still holds it. ARGV: prefix, id, token, until
+HEARTBEAT_SCRIPT = """
+if redis.call('HGET', ARGV[1] .. 'job:' .. ARGV[2], 'lease_token') ~= ARGV[3] then
+    return 0
+end
+redis.call('ZADD', ARGV[1] .. 'leases', 'XX', tonumber(ARGV[4]), ARGV[2])
+return 1
+"""
+
+# Moves due delayed jobs to their lanes and re-queues jobs whose lease expired
+# (the worker died or stalled), which is what makes delivery at-least-once.
+# ARGV: prefix, now, batch
+MAINTAIN_SCRIPT = """
+local prefix = ARGV[1]
+local now = tonumber(ARGV[2])
+local batch = tonumber(ARGV[3])
+local moved = 0
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', prefix .. 'delayed', '-inf', now, 'LIMIT', 0, batch)) do
+    redis.call('ZREM', prefix .. 'delayed', id)
+    local lane = redis.call('HGET', prefix .. 'job:' .. id, 'priority')
+    if lane then
+        redis.call('LPUSH', prefix .. 'ready:' .. lane, id)
+        moved = moved + 1
+    end
+end
+local expired = 0
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', prefix .. 'leases', '-inf', now, 'LIMIT', 0, batch)) do
+    redis.call('ZREM', prefix .. 'leases', id)
+    local job_key = prefix .. 'job:' .. id
+    redis.call('HDEL', job_key, 'lease_token')
+    local tenant = redis.call('HGET', job_key, 'tenant_id')
+    if tenant and tenant ~= '' then
+        local running_key = prefix .. 'running:' .. tenant
+        if tonumber(redis.call('DECR', running_key)) <= 0 then redis.call('DEL', running_key) end
+    end
+    local attempts = tonumber(redis.call('HGET', job_key, 'attempts') or '0')
+    local max_attempts = tonumber(redis.call('HGET', job_key, 'max_attempts') or '1')
+    if attempts < max_attempts then
+        redis.call('RPUSH', prefix .. 'ready:' .. redis.call('HGET', job_key, 'priority'), id)
+    else
+        redis.call('HSET', job_key, 'last_error', 'lease expired')
+        redis.call('LPUSH', prefix .. 'dead', id)
+    end
+    expired = expired + 1
+end
+return {moved, expired}
+"""
+
+
+@dataclass
+class Job:
+    id: str
+    name: str
+    payload: Dict
+    tenant_id: Optional[int]
+    priority: str
+    attempts: int
+    max_attempts: int
+    created_at: float
+    last_error: Optional[str] = None
+    # Identifies this claim; ack, fail and heartbeat present it
+    token: Optional[str] = None
+
+    @classmethod
+    def from_hash(cls, job_id: str, values: Dict) -> "Job":
+        return cls(
+            id=job_id,
+            name=values["name"],
+            payload=json.loads(values.get("payload") or "{}"),
+            tenant_id=int(values["tenant_id"]) if values.get("tenant_id") else None,
+            priority=values["priority"],
+            attempts=int(values.get("attempts", 0)),
+            max_attempts=int(values.get("max_attempts", 1)),
+            created_at=float(values.get("created_at", 0)),
+            last_error=values.get("last_error") or None,
+            token=values.get("lease_token") or None,
+        )
+
+
+class JobQueue:
+    """Redis-backed job queue with priority lanes, leases, retries and per-tenant caps"""
+
+    def __init__(self):
+        # Load from environment variables in production
+        self.redis_url = "redis://localhost:6379/0"
+        self.prefix = "jobs:"
+        self.lease_seconds = 60
+        self.default_tenant_concurrency = 2
+        self.cap_retry_delay = 0.25
+        self.retry_base_delay = 2.0
+        self.retry_max_delay = 600.0
+        self.handlers: Dict[str, Callable[[Job], Awaitable]] = {}
+        self.handler_options: Dict[str, Dict] = {}
+        self._client: Optional[aioredis.Redis] = None
+        self._scripts = {}
+
+    @property
+    def client(self) -> aioredis.Redis:
+        if self._client is None:
+            self._client = aioredis.from_url(self.redis_url, decode_responses=True)
+        return self._client
+
+    def use_client(self, client: aioredis.Redis):
+        """Use an existing async Redis client (must decode responses)"""
+        self._client = client
+        self._scripts = {}
+
+    def _script(self, name: str, source: str):
+        if name not in self._scripts:
+            self._scripts[name] = self.client.register_script(source)
+        return self._scripts[name]
+
+    def task(self, name: str, priority: str = "default", max_attempts: int = 5):
+        """Decorator registering an async handler for jobs named ``name``"""
+        def decorator(func):
+            self.handlers[name] = func
+            self.handler_options[name] = {"priority": priority, "max_attempts": max_attempts}
+            return func
+        return decorator
+
+    async def enqueue(
+        self,
+        name: str,
+        payload: Optional[Dict] = None,
+        tenant_id: Optional[int] = None,
+        priority: Optional[str] = None,
+        max_attempts: Optional[int] = None,
+        delay: float = 0,
+        unique_key: Optional[str] = None,
+        unique_ttl: int = 3600
+    ) -> Optional[str]:
+        """Enqueue a job; returns its id, or None if ``unique_key`` is already queued"""
+        options = self.handler_options.get(name, {})
+        priority = priority or options.get("priority", "default")
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority}")
+
+        job_id = uuid.uuid4().hex
+        if unique_key:
+            claimed = await self.client.set(
+                f"{self.prefix}unique:{unique_key}", job_id, nx=True, ex=unique_ttl
+            )
+            if not claimed:
+                logger.info(f"Skipped duplicate job {name} ({unique_key})")
+                return None
+
+        job = {
+            "name": name,
+            "payload": json.dumps(payload or {}),
+            "tenant_id": "" if tenant_id is None else str(tenant_id),
+            "priority": priority,
+            "attempts": 0,
+            "max_attempts": max_attempts or options.get("max_attempts", 5),
+            "created_at": time.time(),
+            "unique_key": unique_key or "",
+        }
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(f"{self.prefix}job:{job_id}", mapping=job)
+            if delay > 0:
+                pipe.zadd(f"{self.prefix}delayed", {job_id: time.time() + delay})
+            else:
+                pipe.lpush(f"{self.prefix}ready:{priority}", job_id)
+            await pipe.execute()
+
+        logger.info(f"Enqueued job {name} ({job_id}) for tenant {tenant_id}, lane {priority}")
+        return job_id
+
+    async def claim(self, lanes: List[str] = PRIORITIES) -> Optional[Job]:
+        """Claim the highest-priority runnable job, leasing it to the caller"""
+        result = await self._script("claim", CLAIM_SCRIPT)(
+            keys=[f"{self.prefix}ready:{lane}" for lane in lanes],
+            args=[self.prefix, time.time(), self.lease_seconds,
+                  self.default_tenant_concurrency, self.cap_retry_delay, uuid.uuid4().hex],
+        )
+        if not result:
+            return None
+        job_id, flat = result
+        return Job.from_hash(job_id, dict(zip(flat[::2], flat[1::2])))
+
+    async def heartbeat(self, job: Job) -> bool:
+        """Extend a running job's lease; False if the lease was lost"""
+        return bool(await self._script("heartbeat", HEARTBEAT_SCRIPT)(
+            args=[self.prefix, job.id, job.token or "", time.time() + self.lease_seconds]
+        ))
+
+    async def ack(self, job: Job) -> bool:
+        return bool(await self._script("release", RELEASE_SCRIPT)(
+            args=[self.prefix, job.id, "ack", 0, "", job.token or ""]
+        ))
+
+    def backoff(self, attempts: int) -> float:
+        """Exponential backoff with full jitter"""
+        delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** max(attempts - 1, 0))
+        return random.uniform(delay / 2, delay)
+
+    async def fail(self, job: Job, error: str) -> bool:
+        """Schedule a retry with backoff, or dead-letter the job when out of attempts"""
+        if job.attempts < job.max_attempts:
+            outcome, due = "retry", time.time() + self.backoff(job.attempts)
+        else:
+            outcome, due = "dead", 0
+        return bool(await self._script("release", RELEASE_SCRIPT)(
+            args=[self.prefix, job.id, outcome, due, error[:1000], job.token or ""]
+        ))
+
+    async def maintain(self, batch: int = 500) -> Dict:
+        """Promote due delayed jobs and recover expired leases"""
+        moved, expired = await self._script("maintain", MAINTAIN_SCRIPT)(
+            args=[self.prefix, time.time(), batch]
+        )
+        if expired:
+            logger.warning(f"Re-queued {expired} jobs with expired leases")
+        return {"promoted": moved, "expired": expired}
+
+    async def set_tenant_concurrency(self, tenant_id: int, limit: int):
+        """Override the concurrency cap for one tenant (0 disables the cap)"""
+        await self.client.hset(f"{self.prefix}caps", str(tenant_id), limit)
+
+    async def stats(self) -> Dict:
+        async with self.client.pipeline(transaction=False) as pipe:
+            for lane in PRIORITIES:
+                pipe.llen(f"{self.prefix}ready:{lane}")
+            pipe.zcard(f"{self.prefix}delayed")
+            pipe.zcard(f"{self.prefix}leases")
+            pipe.llen(f"{self.prefix}dead")
+            counts = await pipe.execute()
+        return {
+            "ready": dict(zip(PRIORITIES, counts[:len(PRIORITIES)])),
+            "delayed": counts[-3],
+            "running": counts[-2],
+            "dead": counts[-1],
+        }
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._scripts = {}
+
+
+job_queue = JobQueue()
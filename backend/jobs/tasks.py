@@ -0,0 +1,103 @@
+"""Job handlers run by ``backend.cli.worker``.
+
+Delivery is at-least-once, so every handler must be safe to run again after
+a partial failure or an expired lease.
+"""
+import logging
+
+from backend.database import db_manager
+from backend.jobs.queue import Job, job_queue
+from backend.models.tenant import Tenant, TenancyType
+from backend.services.audit import audit_log
+from backend.services.email import send_welcome_email
+from backend.services.tenant_lifecycle import lifecycle_manager
+from backend.services.tenant_promotion import tenant_promotion
+from backend.services.tenant_resources import tenant_resources, provision_tenant_database
+
+logger = logging.getLogger(__name__)
+
+
+@job_queue.task("send_welcome_email", priority="low", max_attempts=8)
+async def welcome_email(job: Job):
+    await send_welcome_email(
+        job.payload["email"],
+        job.payload["first_name"],
+        job.payload["tenant_name"]
+    )
+
+
+@job_queue.task("provision_tenant", priority="high", max_attempts=5)
+async def provision_tenant(job: Job):
+    """Create dedicated resources for a tenant and activate it"""
+    with db_manager.get_db() as db:
+        tenant = db.query(Tenant).filter_by(id=job.tenant_id).first()
+        if tenant is None:
+            logger.warning(f"Tenant {job.tenant_id} vanished before provisioning")
+            return
+        if tenant.is_active:
+            return
+
+        if tenant.tenancy_type != TenancyType.SHARED:
+            if not tenant.redis_config or not tenant.blob_storage_config:
+                resources = await tenant_resources.create_tenant_resources(tenant.name)
+                tenant.redis_config = resources['redis_config']
+                tenant.blob_storage_config = resources['blob_storage_config']
+            tenant.db_connection = await provision_tenant_database(tenant.name)
+
+        tenant.is_active = True
+        db.commit()
+        tenancy_type = tenant.tenancy_type
+    logger.info(f"Provisioned tenant {job.tenant_id}")
+
+    audit = job.payload.get("audit")
+    if audit:
+        await audit_log.log(
+            job.tenant_id,
+            "tenant.create",
+            audit["actor_id"],
+            "tenant",
+            job.tenant_id,
+            {"tenancy_type": tenancy_type.value, "admin_email": audit["admin_email"]}
+        )
+
+
+@job_queue.task("backup_tenant", priority="low", max_attempts=3)
+async def backup_tenant(job: Job):
+    with db_manager.get_db() as db:
+        tenant = db.query(Tenant).filter_by(id=job.tenant_id).first()
+    if tenant is None:
+        logger.warning(f"Tenant {job.tenant_id} not found for backup")
+        return
+    backup_key = await lifecycle_manager.backup_tenant_data(tenant)
+    logger.info(f"Backed up tenant {job.tenant_id} to {backup_key}")
+
+
+@job_queue.task("delete_tenant", priority="default", max_attempts=3)
+async def delete_tenant(job: Job):
+    await lifecycle_manager.delete_tenant(job.tenant_id)
+
+
+@job_queue.task("prune_audit_log", priority="low", max_attempts=3)
+async def prune_audit_log(job: Job):
+    """Drop audit events past the retention period"""
+    with db_manager.get_db() as db:
+        tenant = db.query(Tenant).filter_by(id=job.tenant_id).first()
+    if tenant is None:
+        return
+    dedicated = tenant.tenancy_type != TenancyType.SHARED
+    with db_manager.get_db(tenant.id) as db:
+        removed = audit_log.prune(db, tenant.id, dedicated)
+    logger.info(f"Pruned {removed} audit partitions/rows for tenant {tenant.id}")
+
+
+@job_queue.task("promote_tenant", priority="default", max_attempts=3)
+async def promote_tenant(job: Job):
+    """Move a shared tenant to dedicated resources; a retry starts the copy over"""
+    with db_manager.get_db() as db:
+        tenant = db.query(Tenant).filter_by(id=job.tenant_id).first()
+    if tenant is None or tenant.tenancy_type != TenancyType.SHARED:
+        logger.info(f"Tenant {job.tenant_id} needs no promotion")
+        return
+    tenancy_type = TenancyType(job.payload.get("tenancy_type", TenancyType.DEDICATED.value))
+    stats = await tenant_promotion.promote(job.tenant_id, tenancy_type)
+    logger.info(f"Promoted tenant {job.tenant_id}: {stats}")
@@ -0,0 +1,110 @@
+from typing import List, Optional
+import asyncio
+import logging
+import time
+
+from backend.jobs.queue import Job, JobQueue, PRIORITIES
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """Runs queued jobs with ``concurrency`` slots until stopped.
+
+    Runs in its own process (``python -m backend.cli.worker``) so heavy tenant
+    operations never share an event loop with API requests.
+    """
+
+    def __init__(self, queue: JobQueue, concurrency: int = 8,
+                 lanes: List[str] = PRIORITIES, poll_interval: float = 0.05,
+                 max_poll_interval: float = 1.0, maintain_interval: float = 1.0):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.lanes = list(lanes)
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.maintain_interval = maintain_interval
+        self._stopping = asyncio.Event()
+        self.stats = {"succeeded": 0, "failed": 0, "dead": 0}
+
+    def stop(self):
+        """Stop claiming; jobs already running are allowed to finish"""
+        self._stopping.set()
+
+    async def _sleep(self, seconds: float) -> bool:
+        """Sleep unless stopped first; returns True when stopping"""
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _heartbeat(self, job: Job):
+        interval = self.queue.lease_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            if not await self.queue.heartbeat(job):
+                # Expired and handed on; this attempt can no longer settle it
+                logger.warning(f"Job {job.name} ({job.id}) lost its lease")
+                return
+
+    async def run_job(self, job: Job):
+        handler = self.queue.handlers.get(job.name)
+        if handler is None:
+            logger.error(f"No handler for job {job.name} ({job.id})")
+            await self.queue.fail(job, f"no handler for {job.name}")
+            self.stats["failed"] += 1
+            return
+
+        heartbeat = asyncio.ensure_future(self._heartbeat(job))
+        start = time.perf_counter()
+        try:
+            await handler(job)
+        except Exception as e:
+            heartbeat.cancel()
+            await self.queue.fail(job, f"{type(e).__name__}: {str(e)}")
+            if job.attempts >= job.max_attempts:
+                self.stats["dead"] += 1
+                logger.error(f"Job {job.name} ({job.id}) dead after {job.attempts} attempts: {str(e)}")
+            else:
+                self.stats["failed"] += 1
+                logger.warning(f"Job {job.name} ({job.id}) attempt {job.attempts} failed: {str(e)}")
+            return
+        heartbeat.cancel()
+        await self.queue.ack(job)
+        self.stats["succeeded"] += 1
+        logger.info(f"Job {job.name} ({job.id}) for tenant {job.tenant_id} "
+                    f"done in {time.perf_counter() - start:.3f}s")
+
+    async def _slot(self):
+        idle = self.poll_interval
+        while not self._stopping.is_set():
+            try:
+                job: Optional[Job] = await self.queue.claim(self.lanes)
+            except Exception as e:
+                logger.error(f"Error claiming job: {str(e)}")
+                job = None
+
+            if job is None:
+                # Back off while the queue is empty
+                if await self._sleep(idle):
+                    return
+                idle = min(idle * 2, self.max_poll_interval)
+                continue
+
+            idle = self.poll_interval
+            await self.run_job(job)
+
+    async def _maintain(self):
+        while not self._stopping.is_set():
+            try:
+                await self.queue.maintain()
+            except Exception as e:
+                logger.error(f"Job queue maintenance failed: {str(e)}")
+            if await self._sleep(self.maintain_interval):
+                return
+
+    async def run(self):
+        logger.info(f"Worker started with {self.concurrency} slots on lanes {self.lanes}")
+        await asyncio.gather(self._maintain(), *[self._slot() for _ in range(self.concurrency)])
+        logger.info(f"Worker stopped: {self.stats}")
@@ -1,8 +1,22 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from backend.database import db_manager
+from backend.middleware.tenant_context import tenant_context
+from backend.serialization import ORJSONResponse
+from backend.services.audit import audit_log
+from backend.services.collection_versions import collection_versions
+from backend.services.email import email_service
+from backend.services.google_tokens import google_verifier
+from backend.services.health import health_checker
+from backend.services.metering import metering
+from backend.services.otp import otp_service
+from backend.services.pool_tuner import pool_tuner
+from backend.services.tenant_events import tenant_events
+from backend.services.tenant_purge import tenant_purge
+from backend.services.tenant_resources import tenant_resources
+from backend.storage.registry import blob_registry
 import logging
-from backend.routers import files, tenant
+from backend.routers import admin, audit, export, files, health, search, signup, tenant, todos
 from backend.auth import router as auth
 
 logger = logging.getLogger(__name__)
@@ -11,18 +25,56 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting up application...")
+    db_manager.initialize()
+    if db_manager.prewarm_tenants:
+        try:
+            await db_manager.prewarm()
+        except Exception as e:
+            # A cold pool only slows the first requests; don't fail startup
+            logger.error(f"Database pre-warm failed: {str(e)}")
+    pool_tuner.start()
+    email_service.start()
+    google_verifier.start()
+    blob_registry.start()
+    audit_log.start()
+    metering.start()
+    health_checker.start()
+    tenant_events.install_default_handlers()
+    tenant_events.start()
     yield
     # Shutdown
     logger.info("Shutting down application...")
+    await tenant_events.close()
+    await audit_log.close()
+    await metering.close()
+    await health_checker.close()
+    await email_service.close()
+    await otp_service.close()
+    await collection_versions.close()
+    await tenant_purge.close()
+    await google_verifier.close()
+    await pool_tuner.close()
     await db_manager.cleanup_db_connections()
+    await tenant_resources.close()
+    await blob_registry.close()
 
 def create_app() -> FastAPI:
-    app = FastAPI(lifespan=lifespan)
+    app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+    # Resolves the tenant and opens its database, Redis and blob clients
+    app.middleware("http")(tenant_context)
     
     # Register routers
     app.include_router(auth.router, prefix="/api")
     app.include_router(files.router, prefix="/api")
     app.include_router(tenant.router, prefix="/api")
+    app.include_router(signup.router, prefix="/api")
+    app.include_router(todos.router, prefix="/api")
+    app.include_router(export.router, prefix="/api")
+    app.include_router(search.router, prefix="/api")
+    app.include_router(audit.router, prefix="/api")
+    app.include_router(admin.router, prefix="/api")
+    # Probed by load balancers and orchestrators, so kept off the API prefix
+    app.include_router(health.router)
     
     return app
 
@@ -1,26 +1,88 @@
-from fastapi import Request, Depends
-from models.tenant import Tenant
-from services.tenant_resources import tenant_resources
-from database import db_manager
-from sqlalchemy.orm import Session
-
-async def get_tenant_context(
-    request: Request,
-    db: Session = Depends(db_manager.get_db_session)
-):
+from types import SimpleNamespace
+from typing import Optional
+import time
+
+import jwt
+from fastapi import HTTPException, Request
+
+from backend.database import db_manager
+from backend.models.tenant import TenancyType
+from backend.security.tenant_security import security
+from backend.serialization import ORJSONResponse
+from backend.services.circuit_breaker import BackendUnavailable, tenant_breakers
+from backend.services.tenant_redis import tenant_keyspace
+from backend.services.tenant_resources import tenant_resources
+from backend.services.tracing import tracer
+
+
+def resolve_tenant_id(request: Request) -> Optional[int]:
+    """The tenant named by the request's API key or bearer token.
+
+    Only signed tokens count; routes still check the token's scopes and
+    that it belongs to this tenant.
+    """
+    scheme, _, bearer = request.headers.get("Authorization", "").partition(" ")
+    for token in (request.headers.get("X-API-Key"), bearer if scheme.lower() == "bearer" else None):
+        if not token:
+            continue
+        try:
+            tenant_id = jwt.decode(token, security.jwt_secret, algorithms=["HS256"]).get("tenant_id")
+        except jwt.InvalidTokenError:
+            continue
+        if tenant_id:
+            return int(tenant_id)
+    return None
+
+
+async def tenant_context(request: Request, call_next):
     """Middleware to set up tenant context"""
-    
-    # Get tenant_id from JWT token or request
-    tenant_id = request.state.tenant_id
-    
-    if tenant_id:
-        tenant = db.query(Tenant).filter_by(id=tenant_id).first()
-        
-        # Set up connections for the request
-        request.state.db = db_manager.get_db_session(tenant_id)
-        request.state.redis = tenant_resources.get_redis_connection(tenant)
-        request.state.blob_client = tenant_resources.get_blob_client(tenant)
-    
-    return request
 
-# Add middleware in main.py instead 
\ No newline at end of file
+    started = time.perf_counter()
+    tenant_id = resolve_tenant_id(request)
+    request.state.tenant_id = tenant_id
+
+    # The request's trace starts here, so the cold-path work below (tenant
+    # lookup, engine and client creation) shows up in it
+    with tracer.trace_request(tenant_id, request.url.path, started):
+        tracer.add_span("tenant.resolve", started, time.perf_counter())
+        if not tenant_id:
+            return await call_next(request)
+        return await _with_tenant(request, call_next, tenant_id)
+
+
+async def _with_tenant(request: Request, call_next, tenant_id: int):
+    # Routing metadata is cached, so no Tenant row is read per request; the
+    # session raises a 503 while the tenant's database breaker is open
+    try:
+        info = db_manager.get_tenant_info(tenant_id)
+        db = db_manager.get_db_session(tenant_id)
+    except BackendUnavailable as e:
+        return e.response()
+    except HTTPException as e:
+        return ORJSONResponse({"detail": e.detail}, status_code=e.status_code, headers=e.headers)
+    tenant = SimpleNamespace(
+        id=tenant_id,
+        tenancy_type=TenancyType(info["tenancy_type"]),
+        redis_config=info.get("redis_config"),
+        blob_storage_config=info.get("blob_storage_config"),
+    )
+
+    # Set up connections for the request
+    request.state.db = db
+    try:
+        # Every key the request touches is confined to the tenant's namespace
+        request.state.redis = tenant_keyspace.bind(
+            tenant_resources.get_redis_connection(tenant), tenant_id, tenant.tenancy_type
+        )
+        request.state.blob_client = tenant_resources.get_blob_client(tenant)
+        request.state.blob_container = tenant_breakers.guard_container(
+            tenant_resources.get_blob_container(tenant), tenant_id
+        )
+        # The request may wait on the tenant's pool at any query, so it holds
+        # a slot of the tenant's database bulkhead throughout
+        with tenant_breakers.hold("database", tenant_id):
+            return await call_next(request)
+    except BackendUnavailable as e:
+        return e.response()
+    finally:
+        db.close()
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
+from backend.base import Base
+
+class AuditEvent(Base):
+    __tablename__ = "audit_events"
+    # On PostgreSQL the table is partitioned by month; partitions are created
+    # by the audit writer and old ones are dropped to prune
+    __table_args__ = (
+        Index("ix_audit_events_tenant_time", "tenant_id", "occurred_at"),
+        {"postgresql_partition_by": "RANGE (occurred_at)"},
+    )
+
+    # Generated by the writer so batches need no RETURNING round trip;
+    # the partition key must be part of the primary key
+    id = Column(String(32), primary_key=True)
+    occurred_at = Column(DateTime(timezone=True), primary_key=True)
+    tenant_id = Column(Integer, nullable=False)
+    actor_id = Column(Integer, nullable=True)
+    action = Column(String, nullable=False)  # e.g. 'todo.create'
+    resource_type = Column(String, nullable=True)
+    resource_id = Column(String, nullable=True)
+    details = Column(JSON, nullable=True)
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, UniqueConstraint, DDL, event
+from backend.base import Base
+
+class FileRecord(Base):
+    """Searchable copy of the current version of each file's metadata.
+
+    Redis holds the authoritative per-file metadata; this row is upserted on
+    every upload so files can be searched with the tenant's todos.
+    """
+    __tablename__ = "files"
+    __table_args__ = (UniqueConstraint("tenant_id", "filename", name="uq_files_tenant_filename"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, nullable=False)
+    filename = Column(String, nullable=False)
+    version = Column(Integer, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    content_type = Column(String, nullable=True)
+    uploaded_at = Column(DateTime(timezone=True), nullable=False)
+
+
+# File names are split on punctuation ("q3-report_final.pdf" -> q3 report
+# final pdf) and indexed without stemming
+event.listen(
+    FileRecord.__table__,
+    "after_create",
+    DDL(
+        "ALTER TABLE files ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS ("
+        "to_tsvector('simple', regexp_replace(filename, '[^[:alnum:]]+', ' ', 'g'))"
+        ") STORED; "
+        "CREATE INDEX IF NOT EXISTS ix_files_search_vector ON files USING gin (search_vector)"
+    ).execute_if(dialect="postgresql")
+)
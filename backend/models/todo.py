@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Text, DDL, event
 from sqlalchemy.sql import func
-from database import Base
+from backend.base import Base
 
 class Todo(Base):
     __tablename__ = "todos"
@@ -13,4 +13,20 @@ class Todo(Base):
     tenant_id = Column(Integer, ForeignKey("tenants.id"))
     created_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now()) 
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now()) 
+
+# Full-text search on PostgreSQL: a stored generated column is recomputed by
+# the database on every insert and update, and a GIN index serves queries.
+# Other dialects fall back to the in-process index in services.search.
+event.listen(
+    Todo.__table__,
+    "after_create",
+    DDL(
+        "ALTER TABLE todos ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+        ") STORED; "
+        "CREATE INDEX IF NOT EXISTS ix_todos_search_vector ON todos USING gin (search_vector)"
+    ).execute_if(dialect="postgresql")
+)
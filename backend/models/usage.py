@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Float
+from backend.base import Base
+
+class UsageRollupMixin:
+    """Per-tenant usage summed over one time bucket.
+
+    Rows are only ever accumulated into (``value = value + excluded.value``),
+    so every worker can flush its own aggregates without coordination. The
+    primary key (tenant, resource, bucket) doubles as the index for quota
+    and billing reads.
+    """
+    tenant_id = Column(Integer, primary_key=True)
+    resource = Column(String(32), primary_key=True)  # e.g. 'api_calls', 'storage_bytes'
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    value = Column(Float, nullable=False, default=0.0)
+    events = Column(BigInteger, nullable=False, default=0)
+
+class UsageMinute(UsageRollupMixin, Base):
+    __tablename__ = "usage_minute"
+
+class UsageHour(UsageRollupMixin, Base):
+    __tablename__ = "usage_hour"
+
+class UsageDay(UsageRollupMixin, Base):
+    __tablename__ = "usage_day"
@@ -1,4 +1,5 @@
 from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Enum
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from backend.base import Base
 import enum
@@ -19,4 +20,6 @@ class User(Base):
     role = Column(Enum(UserRole), nullable=False)
     auth_type = Column(String)  # 'google' or 'otp'
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now()) 
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    tenant = relationship("Tenant") 
\ No newline at end of file
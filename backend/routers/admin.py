@@ -0,0 +1,150 @@
+from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from starlette.concurrency import run_in_threadpool
+from backend.database import db_manager
+from backend.jobs.queue import job_queue
+from backend.security.tenant_security import security
+from backend.services.audit import audit_log
+from backend.services.circuit_breaker import tenant_breakers
+from backend.services.health import health_checker
+from backend.services.idempotency import idempotency
+from backend.services.metering import GRANULARITIES, metering
+from backend.services.monitoring import metrics
+from backend.services.pool_tuner import pool_tuner
+from backend.services.shared_state import shared_state
+from backend.services.tenant_purge import tenant_purge
+from backend.services.tenant_redis import tenant_keyspace
+from backend.services.tracing import tracer
+from backend.storage.registry import blob_registry
+from typing import Optional
+
+router = APIRouter()
+
+async def require_admin(token: str = Depends(security.api_key_header)):
+    if not await security.validate_admin_access(token):
+        raise HTTPException(status_code=403, detail="Unauthorized")
+
+@router.post("/admin/tenants/{tenant_id}/profile", dependencies=[Depends(require_admin)])
+async def start_profiling(tenant_id: int, duration: float = 30.0):
+    """Start the sampling profiler for a single tenant"""
+    if not 0 < duration <= 600:
+        raise HTTPException(status_code=400, detail="Duration must be between 0 and 600 seconds")
+    return tracer.profiler.start(tenant_id, duration)
+
+@router.get("/admin/tenants/{tenant_id}/profile", dependencies=[Depends(require_admin)])
+async def get_profile(tenant_id: int, top: int = 50):
+    """Get the stacks collected so far for a tenant"""
+    report = tracer.profiler.status(tenant_id, top)
+    if not report:
+        raise HTTPException(status_code=404, detail="No profiling session for tenant")
+    return report
+
+@router.delete("/admin/tenants/{tenant_id}/profile", dependencies=[Depends(require_admin)])
+async def stop_profiling(tenant_id: int):
+    """Stop profiling a tenant and return the collected stacks"""
+    report = tracer.profiler.stop(tenant_id)
+    if not report:
+        raise HTTPException(status_code=404, detail="No profiling session for tenant")
+    return report
+
+@router.get("/admin/traces", dependencies=[Depends(require_admin)])
+async def get_trace_breakdown(tenant_id: Optional[int] = None):
+    """Get accumulated per-span timings for sampled requests"""
+    return tracer.get_breakdown(tenant_id)
+
+@router.delete("/admin/traces", dependencies=[Depends(require_admin)])
+async def reset_trace_breakdown(tenant_id: Optional[int] = None):
+    """Reset accumulated span timings"""
+    tracer.reset(tenant_id)
+    return {"status": "success"}
+
+@router.get("/admin/storage/stats", dependencies=[Depends(require_admin)])
+async def get_storage_stats():
+    """Blob client cache and connection reuse counters"""
+    return blob_registry.get_stats()
+
+@router.get("/admin/jobs/stats", dependencies=[Depends(require_admin)])
+async def get_job_stats():
+    """Background job queue depth per lane, plus delayed, running and dead jobs"""
+    return await job_queue.stats()
+
+@router.get("/admin/audit/stats", dependencies=[Depends(require_admin)])
+async def get_audit_stats():
+    """Audit buffer occupancy and writer counters"""
+    return audit_log.get_stats()
+
+@router.get("/admin/metrics", dependencies=[Depends(require_admin)])
+async def get_metrics(tenant_id: Optional[int] = None):
+    """Request counts and latency histograms summed over all worker processes"""
+    return {**metrics.get_metrics(tenant_id), "shared_memory": shared_state.get_stats()}
+
+@router.get("/admin/pools/stats", dependencies=[Depends(require_admin)])
+async def get_pool_stats():
+    """Database pool sizes, utilization and resize count per tenant"""
+    return pool_tuner.get_stats()
+
+@router.get("/admin/metering/stats", dependencies=[Depends(require_admin)])
+async def get_metering_stats():
+    """Pending usage aggregates, flush and drop counters"""
+    return metering.get_stats()
+
+@router.get("/admin/redis/stats", dependencies=[Depends(require_admin)])
+async def get_redis_stats():
+    """Per-tenant Redis evictions seen by this process"""
+    return tenant_keyspace.get_stats()
+
+@router.get("/admin/health/stats", dependencies=[Depends(require_admin)])
+async def get_health_stats():
+    """Health probe, cache hit and tenant sweep counters"""
+    return health_checker.get_stats()
+
+@router.get("/admin/breakers/stats", dependencies=[Depends(require_admin)])
+async def get_breaker_stats():
+    """Tenant backends whose circuit breaker is open or half open, and bulkhead rejections"""
+    return tenant_breakers.get_stats()
+
+@router.get("/admin/idempotency/stats", dependencies=[Depends(require_admin)])
+async def get_idempotency_stats():
+    """Idempotency-Key executions, replays and coalesced duplicates"""
+    return idempotency.get_stats()
+
+@router.get("/admin/tenants/{tenant_id}/usage", dependencies=[Depends(require_admin)])
+async def get_tenant_usage(
+    tenant_id: int,
+    granularity: str = "day",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    resource: Optional[str] = None
+):
+    """Usage rollups of a tenant for billing, oldest bucket first"""
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of {', '.join(GRANULARITIES)}")
+    
+    def load():
+        with db_manager.get_db() as db:
+            return metering.report(db, tenant_id, granularity, since, until, resource)
+    
+    return await run_in_threadpool(load)
+
+@router.post("/admin/tenants/{tenant_id}/promote", status_code=202, dependencies=[Depends(require_admin)])
+async def promote_tenant(tenant_id: int, tenancy_type: str = "dedicated"):
+    """Schedule a live move of a shared tenant to dedicated resources"""
+    if tenancy_type not in ("dedicated", "enterprise"):
+        raise HTTPException(status_code=400, detail="tenancy_type must be dedicated or enterprise")
+    job_id = await job_queue.enqueue(
+        "promote_tenant",
+        {"tenancy_type": tenancy_type},
+        tenant_id=tenant_id,
+        unique_key=f"promote:{tenant_id}"
+    )
+    if job_id is None:
+        raise HTTPException(status_code=409, detail="Promotion already scheduled")
+    return {"tenant_id": tenant_id, "job_id": job_id, "status": "scheduled"}
+
+@router.get("/admin/tenants/{tenant_id}/purge", dependencies=[Depends(require_admin)])
+async def get_purge_progress(tenant_id: int):
+    """Checkpoint of a tenant's purge: finished phases and what has been deleted"""
+    progress = await tenant_purge.progress(tenant_id)
+    if not progress:
+        raise HTTPException(status_code=404, detail="No purge for tenant")
+    return progress
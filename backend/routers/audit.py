@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Request, Depends, HTTPException
+from datetime import datetime
+from typing import Optional
+from backend.security.tenant_security import security
+from backend.services.audit import audit_log, AUDIT_COLUMNS
+
+router = APIRouter()
+
+@router.get("/audit")
+async def list_audit_events(
+    request: Request,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    action: Optional[str] = None,
+    limit: int = 100,
+    token: str = Depends(security.api_key_header)
+):
+    """Recent audit events of the current tenant, newest first"""
+    tenant_id = request.state.tenant_id
+    
+    if not await security.validate_tenant_access(tenant_id, token, "audit:read"):
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    if not 0 < limit <= 1000:
+        raise HTTPException(status_code=400, detail="Limit must be between 1 and 1000")
+    
+    events = audit_log.query(request.state.db, tenant_id, since, until, action, limit)
+    return [{column: getattr(event, column) for column in AUDIT_COLUMNS} for event in events]
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Request, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from backend.security.tenant_security import security
+from backend.services.export_service import export_service, RECORD_TYPES
+
+router = APIRouter()
+
+@router.get("/export")
+async def export_tenant_data(
+    request: Request,
+    include: str = ",".join(RECORD_TYPES),
+    format: str = "ndjson",
+    gzip: bool = False,
+    token: str = Depends(security.api_key_header)
+):
+    """Stream every todo, user and file-metadata record of the current tenant"""
+    tenant_id = request.state.tenant_id
+    
+    if not await security.validate_tenant_access(tenant_id, token, "data:export"):
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    
+    kinds = [kind.strip() for kind in include.split(",") if kind.strip()]
+    export_service.validate_request(kinds, format)
+    
+    filename = export_service.filename(tenant_id, kinds, format, gzip)
+    return StreamingResponse(
+        export_service.stream_export(
+            tenant_id,
+            kinds,
+            format,
+            gzip,
+            getattr(request.state, "redis", None)
+        ),
+        media_type=export_service.content_type(format, gzip),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
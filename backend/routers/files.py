@@ -1,9 +1,16 @@
-from fastapi import APIRouter, Request, UploadFile, Depends, HTTPException
+from fastapi import APIRouter, Request, UploadFile, Depends, HTTPException, Header, Response
+from fastapi.responses import StreamingResponse
+from backend.services.circuit_breaker import BackendUnavailable
+from backend.services.idempotency import idempotency
+from backend.services.metering import metering
 from backend.services.resource_quotas import quotas
 from backend.services.monitoring import metrics
 from backend.security.tenant_security import security
-import json
-from datetime import UTC, datetime
+from backend.services.tracing import tracer
+from backend.services.content_store import content_store
+from backend.services.downloads import download_service
+from backend.services.search import search_service
+from typing import Optional
 import logging
 
 # Initialize logger
@@ -11,8 +18,13 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+def _check_filename(filename: Optional[str]):
+    if not content_store.valid_filename(filename):
+        raise HTTPException(status_code=400, detail="Invalid file name")
+
 @router.post("/upload")
 @metrics.track_request()
+@idempotency.idempotent()
 async def upload_file(
     request: Request,
     file: UploadFile,
@@ -23,9 +35,11 @@ async def upload_file(
     # Validate tenant access
     if not await security.validate_tenant_access(tenant_id, token, "file:write"):
         raise HTTPException(status_code=403, detail="Unauthorized")
+    _check_filename(file.filename)
     
-    # Check file size quota
-    file_size = len(await file.read())
+    # Size from the spooled upload without reading it into memory
+    file.file.seek(0, 2)
+    file_size = file.file.tell()
     await file.seek(0)  # Reset file position
     
     await quotas.check_quota(
@@ -33,38 +47,129 @@ async def upload_file(
         "storage_gb",
         file_size / (1024 * 1024 * 1024)  # Convert to GB
     )
+    # Version history can't be evicted, so a tenant whose Redis budget is
+    # already spent can't add to it
+    await quotas.check_quota(tenant_id, "redis_mb", 0)
     
-    # The middleware has already set up the correct blob client
-    blob_client = request.state.blob_client
-    container_client = blob_client.get_container_client("primary")
+    # The middleware has already set up the correct (cached) container client
+    container_client = request.state.blob_container
+    redis_client = request.state.redis
     
     try:
-        # Upload file to tenant's storage
-        blob_client = container_client.get_blob_client(file.filename)
-        await blob_client.upload_blob(file.file)
+        # Store only chunks the tenant doesn't have yet; the manifest becomes
+        # the file's new version and its metadata entry in the tenant's Redis
+        with tracer.span("blob.upload", size=file_size):
+            manifest = await content_store.store(
+                tenant_id,
+                container_client,
+                redis_client,
+                file.filename,
+                file,
+                file.content_type
+            )
         
-        # Update usage metrics
-        await quotas.update_usage(
-            tenant_id,
-            "storage_gb",
-            file_size / (1024 * 1024 * 1024)
-        )
+        # Keep the searchable file record current; search lagging behind
+        # must not fail an upload that is already stored
+        try:
+            search_service.index_file(request.state.db, tenant_id, manifest)
+        except Exception as e:
+            logger.error(f"Search indexing failed for {file.filename}, tenant {tenant_id}: {str(e)}")
         
-        # Cache file metadata in tenant's Redis
-        redis_client = request.state.redis
-        metadata = {
-            "size": file_size,
-            "content_type": file.content_type,
-            "uploaded_at": datetime.now(UTC).isoformat()
-        }
-        await redis_client.set(
-            f"file:{file.filename}",
-            json.dumps(metadata)
-        )
+        # Update usage metrics; deduplicated bytes cost no storage but
+        # were still transferred
+        metering.record(tenant_id, "transfer_bytes", file_size)
+        if manifest["new_bytes"]:
+            await quotas.update_usage(
+                tenant_id,
+                "storage_gb",
+                manifest["new_bytes"] / (1024 * 1024 * 1024)
+            )
         
-        return {"status": "success"}
+        return {
+            "status": "success",
+            "version": manifest["version"],
+            "deduplicated": manifest["deduplicated"],
+            "stored_bytes": manifest["new_bytes"]
+        }
         
+    except BackendUnavailable:
+        # Already a 503 with Retry-After; the client should back off
+        raise
     except Exception as e:
         # Log error
         logger.error(f"Upload failed for tenant {tenant_id}: {str(e)}")
-        raise HTTPException(status_code=500, detail="Upload failed") 
+        raise HTTPException(status_code=500, detail="Upload failed")
+
+@router.get("/files/{filename:path}/versions")
+@metrics.track_request()
+async def list_file_versions(
+    request: Request,
+    filename: str,
+    token: str = Depends(security.api_key_header)
+):
+    tenant_id = request.state.tenant_id
+    
+    if not await security.validate_tenant_access(tenant_id, token, "file:read"):
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    _check_filename(filename)
+    
+    versions = await content_store.list_versions(request.state.redis, tenant_id, filename)
+    if not versions:
+        raise HTTPException(status_code=404, detail="File not found")
+    return {"filename": filename, "versions": versions}
+
+@router.get("/files/{filename:path}")
+@metrics.track_request()
+async def download_file(
+    request: Request,
+    filename: str,
+    version: Optional[int] = None,
+    range: Optional[str] = Header(default=None),
+    if_none_match: Optional[str] = Header(default=None),
+    if_range: Optional[str] = Header(default=None),
+    token: str = Depends(security.api_key_header)
+):
+    tenant_id = request.state.tenant_id
+    
+    if not await security.validate_tenant_access(tenant_id, token, "file:read"):
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    _check_filename(filename)
+    
+    container_client = request.state.blob_container
+    
+    # Metadata comes from the tenant's Redis rather than a blob HEAD
+    with tracer.span("file.metadata"):
+        metadata = await download_service.get_file_metadata(
+            request.state.redis, container_client, tenant_id, filename, version
+        )
+    size = metadata["size"]
+    headers = {
+        "ETag": metadata["etag"],
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache"
+    }
+    
+    if download_service.etag_matches(if_none_match, metadata["etag"]):
+        return Response(status_code=304, headers=headers)
+    blob_client = await download_service.open(container_client, tenant_id, filename, metadata)
+    
+    # A stale If-Range validator means the client must restart from scratch
+    byte_range = None
+    if not if_range or if_range.strip() == metadata["etag"]:
+        byte_range = download_service.parse_range(range, size)
+    
+    if byte_range is None:
+        start, length, status = 0, size, 200
+    else:
+        start, end = byte_range
+        length, status = end - start + 1, 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(length)
+    metering.record(tenant_id, "transfer_bytes", length)
+    
+    return StreamingResponse(
+        download_service.stream(blob_client, start, length),
+        status_code=status,
+        media_type=metadata.get("content_type") or "application/octet-stream",
+        headers=headers
+    )
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException
+from backend.routers.admin import require_admin
+from backend.serialization import ORJSONResponse
+from backend.services.health import health_checker
+
+router = APIRouter()
+
+@router.get("/health/live")
+async def liveness():
+    """The process is up; never touches a dependency"""
+    return health_checker.liveness()
+
+@router.get("/health/ready")
+async def readiness():
+    """Shared database, Redis and blob storage reachable; 503 otherwise"""
+    report = await health_checker.readiness()
+    return ORJSONResponse(report, status_code=200 if report["ready"] else 503)
+
+@router.get("/health")
+async def aggregate_health():
+    """Readiness plus the last background sweep of tenant databases"""
+    report = await health_checker.aggregate()
+    return ORJSONResponse(report, status_code=200 if report["ready"] else 503)
+
+@router.get("/health/tenants/{tenant_id}", dependencies=[Depends(require_admin)])
+async def tenant_health(tenant_id: int):
+    """Deep check of one tenant's database, Redis and blob storage"""
+    report = await health_checker.tenant(tenant_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Tenant not found")
+    return ORJSONResponse(report, status_code=200 if report["status"] == "ok" else 503)
@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Request, Depends, HTTPException
+from typing import Optional
+from backend.config.tenant_config import config_manager
+from backend.database import db_manager
+from backend.models.tenant import Tenant
+from backend.services.login_principal import LoginPrincipal
+from backend.security.auth import get_current_user
+from backend.security.tenant_security import security
+from backend.services.monitoring import metrics
+from backend.services.search import search_service
+
+router = APIRouter()
+
+def _require_search(tenant_id: int):
+    """Search is a tier feature (features.advanced_search)"""
+    with db_manager.get_db() as db:
+        tenant = db.query(Tenant).filter_by(id=tenant_id).first()
+    if not tenant or not config_manager.get_tenant_config(tenant).get("features", {}).get("advanced_search"):
+        raise HTTPException(status_code=403, detail="Search is not enabled for this tenant")
+
+@router.get("/search/todos")
+@metrics.track_request()
+async def search_todos(
+    request: Request,
+    q: str = "",
+    completed: Optional[bool] = None,
+    due: Optional[str] = None,
+    created_by: Optional[int] = None,
+    page: int = 1,
+    page_size: int = 20,
+    current_user: LoginPrincipal = Depends(get_current_user)
+):
+    """Ranked todo search with completed, due-date and creator facets"""
+    tenant_id = request.state.tenant_id
+    _require_search(tenant_id)
+    return search_service.search_todos(
+        request.state.db, tenant_id, q, completed, due, created_by, page, page_size
+    )
+
+@router.get("/search/files")
+@metrics.track_request()
+async def search_files(
+    request: Request,
+    q: str = "",
+    content_type: Optional[str] = None,
+    page: int = 1,
+    page_size: int = 20,
+    token: str = Depends(security.api_key_header)
+):
+    """Ranked file name search with a content type facet"""
+    tenant_id = request.state.tenant_id
+    
+    if not await security.validate_tenant_access(tenant_id, token, "file:read"):
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    _require_search(tenant_id)
+    
+    return search_service.search_files(
+        request.state.db, tenant_id, q, content_type, page, page_size
+    )
@@ -1,19 +1,20 @@
-from fastapi import APIRouter, BackgroundTasks
+from fastapi import APIRouter
 from backend.schemas.auth import TenantCreate, UserCreate
 from backend.services.signup_service import signup_service
+from backend.database import db_manager
 
 router = APIRouter()
 
 @router.post("/signup/tenant")
 async def create_tenant_with_admin(
-    tenant_data: TenantCreate,
-    background_tasks: BackgroundTasks
+    tenant_data: TenantCreate
 ):
     """Create a new tenant and admin user"""
-    tenant, admin = await signup_service.create_tenant_with_admin(
-        tenant_data,
-        background_tasks
-    )
+    with db_manager.get_db() as db:
+        tenant, admin = await signup_service.create_tenant_with_admin(
+            db,
+            tenant_data
+        )
     return {
         "tenant_id": tenant.id,
         "admin_user_id": admin.id,
@@ -23,7 +24,8 @@ async def create_tenant_with_admin(
 @router.post("/signup/user")
 async def create_user(user_data: UserCreate):
     """Create a new user in an existing tenant"""
-    user = signup_service.create_user(user_data)
+    with db_manager.get_db() as db:
+        user = signup_service.create_user(db, user_data)
     return {
         "user_id": user.id,
         "message": "User created successfully"
@@ -1,44 +1,124 @@
-from fastapi import APIRouter, Request, Depends
-from typing import List
-from schemas.todo import TodoCreate, Todo
-from services.todo_service import todo_service
-from services.monitoring import metrics
-from security.auth import get_current_user
-from models.user import User
+from fastapi import APIRouter, Request, Depends, Header, Response
+from typing import List, Optional
+import logging
+import math
+from backend.schemas.todo import TodoCreate, Todo
+from backend.services.todo_service import todo_service
+from backend.services.monitoring import metrics
+from backend.services.audit import audit_log
+from backend.services.collection_versions import collection_versions
+from backend.services.downloads import download_service
+from backend.services.idempotency import idempotency
+from backend.services.tracing import tracer
+from backend.security.auth import get_current_user
+from backend.services.login_principal import LoginPrincipal
+from backend.database import db_manager
+from backend.serialization import encode_rows, encode_todo, stream_json_array
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+async def _todos_version(tenant_id: int) -> Optional[str]:
+    # Without a version the response is simply sent unconditionally
+    try:
+        return await collection_versions.current(tenant_id, "todos")
+    except Exception as e:
+        logger.warning(f"No todos version for tenant {tenant_id}: {str(e)}")
+        return None
+
+def _todos_cache_headers() -> dict:
+    # Always revalidate, but a change made through another host may go
+    # unseen for up to local_ttl seconds; say so rather than claim no-cache
+    window = math.ceil(collection_versions.local_ttl)
+    return {"Cache-Control": f"private, max-age=0, stale-while-revalidate={window}"}
+
+def _stream_todo_rows(tenant_id: int):
+    # The request-scoped session is closed before a streamed body finishes,
+    # so the cursor gets a session of its own
+    with db_manager.get_db(tenant_id) as db:
+        yield from todo_service.iter_todo_rows(db, tenant_id)
+
 @router.get("/todos", response_model=List[Todo])
 @metrics.track_request()
-async def list_todos(request: Request, current_user: User = Depends(get_current_user)):
+async def list_todos(
+    request: Request,
+    stream: bool = False,
+    if_none_match: Optional[str] = Header(default=None),
+    current_user: LoginPrincipal = Depends(get_current_user)
+):
     """List todos for the current tenant"""
-    return todo_service.get_todos(request.state.db, request.state.tenant_id)
+    tenant_id = request.state.tenant_id
+    # Read before the query: a write racing it only makes the ETag older,
+    # so the client refetches next time rather than missing the change
+    version = await _todos_version(tenant_id)
+    headers = _todos_cache_headers()
+    if version is not None:
+        headers["ETag"] = f'W/"todos-{tenant_id}-{version}"'
+        if download_service.etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
+    if stream:
+        response = stream_json_array(_stream_todo_rows(tenant_id))
+        response.headers.update(headers)
+        return response
+
+    rows = todo_service.get_todo_rows(request.state.db, tenant_id)
+    with tracer.span("serialize", rows=len(rows)):
+        body = encode_rows(rows)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.get("/todos/{todo_id}", response_model=Todo)
+@metrics.track_request()
+async def get_todo(
+    request: Request,
+    todo_id: int,
+    if_none_match: Optional[str] = Header(default=None),
+    current_user: LoginPrincipal = Depends(get_current_user)
+):
+    """Get a todo; validated against the version of the whole collection"""
+    tenant_id = request.state.tenant_id
+    version = await _todos_version(tenant_id)
+    headers = _todos_cache_headers()
+    if version is not None:
+        headers["ETag"] = f'W/"todo-{todo_id}-{version}"'
+        if download_service.etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
+    todo = todo_service.get_todo(request.state.db, todo_id, tenant_id)
+    return Response(content=encode_todo(todo), media_type="application/json", headers=headers)
 
 @router.post("/todos", response_model=Todo)
 @metrics.track_request()
-async def create_todo(request: Request, todo: TodoCreate, current_user: User = Depends(get_current_user)):
+@idempotency.idempotent()
+async def create_todo(request: Request, todo: TodoCreate, current_user: LoginPrincipal = Depends(get_current_user)):
     """Create a new todo"""
-    return todo_service.create_todo(
+    new_todo = todo_service.create_todo(
         request.state.db,
         todo,
         request.state.tenant_id,
         current_user.id
     )
+    await audit_log.log(request.state.tenant_id, "todo.create", current_user.id, "todo", new_todo.id)
+    return Response(content=encode_todo(new_todo), media_type="application/json")
 
 @router.put("/todos/{todo_id}", response_model=Todo)
 @metrics.track_request()
-async def update_todo(todo_id: int, todo: TodoCreate, request: Request, current_user: User = Depends(get_current_user)):
+async def update_todo(request: Request, todo_id: int, todo: TodoCreate, current_user: LoginPrincipal = Depends(get_current_user)):
     """Update a todo"""
-    return todo_service.update_todo(
+    updated = todo_service.update_todo(
         request.state.db,
         todo_id,
         todo,
         request.state.tenant_id
     )
+    await audit_log.log(request.state.tenant_id, "todo.update", current_user.id, "todo", todo_id)
+    return Response(content=encode_todo(updated), media_type="application/json")
 
 @router.delete("/todos/{todo_id}")
 @metrics.track_request()
-async def delete_todo(todo_id: int, request: Request, current_user: User = Depends(get_current_user)):
+async def delete_todo(request: Request, todo_id: int, current_user: LoginPrincipal = Depends(get_current_user)):
     """Delete a todo"""
     todo_service.delete_todo(request.state.db, todo_id, request.state.tenant_id)
-    return {"message": "Todo deleted"} 
\ No newline at end of file
+    await audit_log.log(request.state.tenant_id, "todo.delete", current_user.id, "todo", todo_id)
+    return {"message": "Todo deleted"}
@@ -1,12 +1,11 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from models.user import User
-from services.user_service import user_service
+from backend.services.login_principal import LoginPrincipal, principal_loader
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> LoginPrincipal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -14,8 +13,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     )
     try:
         payload = jwt.decode(token, "your-secret-key", algorithms=["HS256"])
-        user = user_service.get_user_by_email(payload.get("sub"))
-        if user is None:
+        user = await principal_loader.load(payload.get("sub"))
+        if user is None or user.tenant_id != payload.get("tenant_id"):
             raise credentials_exception
     except JWTError:
         raise credentials_exception
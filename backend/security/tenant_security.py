@@ -34,6 +34,15 @@ class TenantSecurity:
         except jwt.InvalidTokenError:
             return False
             
+    async def validate_admin_access(self, token: str, required_scope: str = "admin") -> bool:
+        """Validate platform admin permissions"""
+        try:
+            payload = jwt.decode(token, self.jwt_secret, algorithms=["HS256"])
+            return required_scope in payload.get("scopes", [])
+            
+        except jwt.InvalidTokenError:
+            return False
+            
     def generate_tenant_token(
         self,
         tenant_id: int,
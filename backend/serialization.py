@@ -0,0 +1,63 @@
+from typing import Any, Iterable, Iterator, Sequence
+import logging
+
+import orjson
+from fastapi.responses import Response, StreamingResponse
+from pydantic import TypeAdapter
+
+from backend.schemas.todo import Todo as TodoSchema
+
+logger = logging.getLogger(__name__)
+
+# Built once at import; constructing a TypeAdapter compiles its validator
+todo_adapter = TypeAdapter(TodoSchema)
+
+# Column order used by the row-tuple fast path, matching the Todo schema
+TODO_FIELDS = tuple(TodoSchema.model_fields)
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+class ORJSONResponse(Response):
+    """JSON response rendered with orjson"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+def encode_rows(rows: Iterable[Sequence], fields: Sequence[str] = TODO_FIELDS) -> bytes:
+    """Encode row tuples straight to a JSON array, skipping ORM and pydantic"""
+    return orjson.dumps([dict(zip(fields, row)) for row in rows], option=ORJSON_OPTIONS)
+
+
+def encode_todo(todo: Any) -> bytes:
+    return todo_adapter.dump_json(todo_adapter.validate_python(todo))
+
+
+def iter_json_array(rows: Iterable[Sequence], fields: Sequence[str] = TODO_FIELDS,
+                    batch_size: int = 500) -> Iterator[bytes]:
+    """Yield a JSON array in chunks of ``batch_size`` encoded rows"""
+    yield b"["
+    first = True
+    batch = []
+    for row in rows:
+        batch.append(dict(zip(fields, row)))
+        if len(batch) >= batch_size:
+            body = orjson.dumps(batch, option=ORJSON_OPTIONS)[1:-1]
+            yield body if first else b"," + body
+            first = False
+            batch = []
+    if batch:
+        body = orjson.dumps(batch, option=ORJSON_OPTIONS)[1:-1]
+        yield body if first else b"," + body
+    yield b"]"
+
+
+def stream_json_array(rows: Iterable[Sequence], fields: Sequence[str] = TODO_FIELDS,
+                      batch_size: int = 500) -> StreamingResponse:
+    """Stream a JSON array so memory stays flat regardless of result size"""
+    return StreamingResponse(
+        iter_json_array(rows, fields, batch_size),
+        media_type="application/json"
+    )
@@ -0,0 +1,302 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import deque
+from datetime import datetime, timedelta, timezone
+import asyncio
+import json
+import logging
+import time
+import uuid
+
+from sqlalchemy import insert, select, delete, text
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from backend.database import db_manager
+from backend.models.audit import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+AUDIT_COLUMNS = (
+    "id", "occurred_at", "tenant_id", "actor_id",
+    "action", "resource_type", "resource_id", "details",
+)
+
+
+def _month_start(moment: datetime) -> datetime:
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(moment: datetime) -> datetime:
+    return (_month_start(moment) + timedelta(days=32)).replace(day=1)
+
+
+def partition_name(moment: datetime) -> str:
+    return f"audit_events_y{moment.year}m{moment.month:02d}"
+
+
+class AuditLog:
+    """Buffered audit trail.
+
+    Events are appended to a bounded in-memory ring buffer and written by a
+    background task in per-tenant batches, either when ``flush_size`` events
+    are waiting or every ``flush_interval`` seconds. Each tenant's events go
+    to its own database (the shared database for shared tenants), into a
+    monthly partition of ``audit_events`` on PostgreSQL. When the buffer is
+    full, ``log`` waits for the writer to catch up; the non-blocking
+    ``record`` drops the event and counts it instead.
+    """
+
+    def __init__(self):
+        self.capacity = 10000
+        self.flush_size = 500
+        self.flush_interval = 1.0  # seconds
+        self.max_wait = 2.0  # seconds a caller may be held back by a full buffer
+        self.copy_threshold = 200  # batches at least this large use COPY on PostgreSQL
+        self.retention_days = 365
+        self._buffer: deque = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._partitions: set = set()
+        self.stats = {
+            "recorded": 0,
+            "written": 0,
+            "dropped": 0,
+            "batches": 0,
+            "flush_errors": 0,
+            "waits": 0,
+        }
+
+    def _events(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+            self._space = asyncio.Event()
+            self._space.set()
+        return self._wakeup, self._space
+
+    def _make_event(self, tenant_id: int, action: str, actor_id: Optional[int],
+                    resource_type: Optional[str], resource_id, details: Optional[Dict]) -> Tuple:
+        return (
+            uuid.uuid4().hex,
+            datetime.now(timezone.utc),
+            tenant_id,
+            actor_id,
+            action,
+            resource_type,
+            None if resource_id is None else str(resource_id),
+            details,
+        )
+
+    def record(
+        self,
+        tenant_id: int,
+        action: str,
+        actor_id: Optional[int] = None,
+        resource_type: Optional[str] = None,
+        resource_id=None,
+        details: Optional[Dict] = None
+    ) -> bool:
+        """Buffer an event without waiting; returns False if it was dropped.
+
+        Must be called from the event loop thread.
+        """
+        if len(self._buffer) >= self.capacity:
+            self.stats["dropped"] += 1
+            if self.stats["dropped"] % 1000 == 1:
+                logger.warning(f"Audit buffer full, {self.stats['dropped']} events dropped so far")
+            return False
+
+        self._buffer.append(
+            self._make_event(tenant_id, action, actor_id, resource_type, resource_id, details)
+        )
+        self.stats["recorded"] += 1
+
+        wakeup, space = self._events()
+        if len(self._buffer) >= self.capacity:
+            space.clear()
+        if len(self._buffer) >= self.flush_size:
+            wakeup.set()
+        return True
+
+    async def log(
+        self,
+        tenant_id: int,
+        action: str,
+        actor_id: Optional[int] = None,
+        resource_type: Optional[str] = None,
+        resource_id=None,
+        details: Optional[Dict] = None
+    ) -> bool:
+        """Buffer an event, waiting up to ``max_wait`` for room when the buffer is full"""
+        _, space = self._events()
+        if len(self._buffer) >= self.capacity:
+            self.stats["waits"] += 1
+            self._wakeup.set()
+            try:
+                await asyncio.wait_for(space.wait(), timeout=self.max_wait)
+            except asyncio.TimeoutError:
+                pass
+        return self.record(tenant_id, action, actor_id, resource_type, resource_id, details)
+
+    def ensure_partitions(self, db: Session, moments: Iterable[datetime]):
+        """Create the monthly partitions a batch needs (PostgreSQL only)"""
+        bind = db.get_bind()
+        if bind.dialect.name != "postgresql":
+            return
+        for month in {_month_start(m) for m in moments}:
+            key = (str(bind.url), month)
+            if key in self._partitions:
+                continue
+            db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(month)} "
+                f"PARTITION OF audit_events FOR VALUES "
+                f"FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+            ))
+            self._partitions.add(key)
+
+    def _write_batch(self, tenant_id: int, events: List[Tuple]):
+        """Write one tenant's events in a single statement"""
+        with db_manager.get_db(tenant_id) as db:
+            self.ensure_partitions(db, (event[1] for event in events))
+            connection = db.connection()
+            if connection.dialect.name == "postgresql" and len(events) >= self.copy_threshold:
+                columns = ", ".join(AUDIT_COLUMNS)
+                cursor = connection.connection.cursor()
+                with cursor.copy(f"COPY audit_events ({columns}) FROM STDIN") as copy:
+                    for event in events:
+                        copy.write_row(event[:-1] + (
+                            None if event[-1] is None else json.dumps(event[-1]),
+                        ))
+            else:
+                # executemany is sent as multi-row INSERT ... VALUES batches
+                db.execute(insert(AuditEvent), [dict(zip(AUDIT_COLUMNS, event)) for event in events])
+            db.commit()
+
+    async def flush(self) -> int:
+        """Write everything currently buffered; returns the number of events written"""
+        if not self._buffer:
+            return 0
+
+        events = []
+        while self._buffer and len(events) < self.capacity:
+            events.append(self._buffer.popleft())
+        _, space = self._events()
+        space.set()
+
+        by_tenant: Dict[int, List[Tuple]] = {}
+        for event in events:
+            by_tenant.setdefault(event[2], []).append(event)
+
+        written = 0
+        for tenant_id, batch in by_tenant.items():
+            try:
+                await run_in_threadpool(self._write_batch, tenant_id, batch)
+                written += len(batch)
+                self.stats["batches"] += 1
+            except Exception as e:
+                self.stats["flush_errors"] += 1
+                logger.error(f"Error writing {len(batch)} audit events for tenant {tenant_id}: {str(e)}")
+                # Put the batch back for the next flush if there is room
+                room = self.capacity - len(self._buffer)
+                if room > 0:
+                    self._buffer.extendleft(reversed(batch[:room]))
+                self.stats["dropped"] += max(len(batch) - room, 0)
+
+        self.stats["written"] += written
+        return written
+
+    async def _flush_loop(self):
+        wakeup, _ = self._events()
+        while not self._closing:
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
+            started = time.perf_counter()
+            written = await self.flush()
+            if written:
+                logger.debug(f"Flushed {written} audit events in {time.perf_counter() - started:.3f}s")
+
+    def start(self):
+        """Start the background writer"""
+        if self._task is None or self._task.done():
+            # Fresh events: a restarted app may be running on a new loop
+            self._wakeup = None
+            self._events()
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def close(self):
+        """Stop the writer and flush what is left"""
+        if self._task:
+            # Let an in-progress flush finish rather than losing its events
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+            self._closing = False
+        await self.flush()
+        logger.info(f"Audit log closed: {self.stats}")
+
+    def query(
+        self,
+        db: Session,
+        tenant_id: int,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        action: Optional[str] = None,
+        limit: int = 100
+    ) -> List[AuditEvent]:
+        """Most recent events first; time bounds let PostgreSQL skip partitions"""
+        query = select(AuditEvent).where(AuditEvent.tenant_id == tenant_id)
+        if since:
+            query = query.where(AuditEvent.occurred_at >= since)
+        if until:
+            query = query.where(AuditEvent.occurred_at < until)
+        if action:
+            query = query.where(AuditEvent.action == action)
+        query = query.order_by(AuditEvent.occurred_at.desc()).limit(limit)
+        return list(db.scalars(query))
+
+    def prune(self, db: Session, tenant_id: int, dedicated: bool,
+              before: Optional[datetime] = None) -> int:
+        """Remove events older than ``before`` (default: the retention period).
+
+        Dedicated databases hold a single tenant, so whole monthly partitions
+        are dropped; in the shared database only this tenant's rows are deleted.
+        """
+        before = before or datetime.now(timezone.utc) - timedelta(days=self.retention_days)
+        bind = db.get_bind()
+        removed = 0
+        if dedicated and bind.dialect.name == "postgresql":
+            partitions = db.execute(text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = 'audit_events'"
+            )).scalars().all()
+            cutoff = partition_name(_month_start(before))
+            for name in partitions:
+                # Names sort chronologically; keep the month containing the cutoff
+                if name < cutoff:
+                    db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                    removed += 1
+            # Forget cached partitions so dropped months are recreated if needed
+            self._partitions = {key for key in self._partitions if key[0] != str(bind.url)}
+        else:
+            result = db.execute(
+                delete(AuditEvent)
+                .where(AuditEvent.tenant_id == tenant_id)
+                .where(AuditEvent.occurred_at < before)
+                .execution_options(synchronize_session=False)
+            )
+            removed = result.rowcount
+        db.commit()
+        return removed
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "buffered": len(self._buffer), "capacity": self.capacity}
+
+
+audit_log = AuditLog()
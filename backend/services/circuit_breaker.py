@@ -0,0 +1,364 @@
+from typing import Deque, Dict, List, Optional, Tuple
+from collections import deque
+from contextlib import contextmanager
+import logging
+import threading
+import time
+
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from backend.serialization import ORJSONResponse
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# Exceptions (matched by class name anywhere in the MRO, so the optional
+# drivers need not be importable) that mean the backend itself is unwell:
+# builtin, redis and SQLAlchemy pool timeouts, connection errors, DBAPI
+# OperationalError, and Azure transport errors. Misses, constraint
+# violations and the like are the caller's problem, not the backend's.
+FAILURE_TYPES = frozenset({
+    "TimeoutError", "ConnectionError", "OperationalError", "InterfaceError",
+    "ServiceRequestError", "ServiceResponseError",
+})
+
+
+def is_backend_failure(exc: BaseException) -> bool:
+    if isinstance(exc, BackendUnavailable):
+        return False
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    if "HttpResponseError" in names:
+        return (getattr(exc, "status_code", None) or 0) >= 500
+    return not FAILURE_TYPES.isdisjoint(names)
+
+
+class BackendUnavailable(HTTPException):
+    """A tenant backend is failing or saturated; answered with 503 at once"""
+
+    def __init__(self, backend: str, tenant_id: Optional[int], reason: str, retry_after: int):
+        super().__init__(
+            status_code=503,
+            detail=f"Tenant {backend} temporarily unavailable",
+            headers={"Retry-After": str(retry_after)},
+        )
+        self.backend = backend
+        self.tenant_id = tenant_id
+        self.reason = reason  # "open" or "saturated"
+
+    def response(self) -> ORJSONResponse:
+        """For middleware, which runs outside FastAPI's exception handling"""
+        return ORJSONResponse({"detail": self.detail}, status_code=503, headers=self.headers)
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker over a sliding window of one-second buckets.
+
+    Closed, it counts outcomes; once at least ``min_calls`` calls in the last
+    ``window`` seconds have a failure rate of ``failure_rate`` or more, it
+    opens and every call fails fast for ``open_seconds``. It then goes half
+    open and admits ``half_open_calls`` trial calls: a success closes it, a
+    failure opens it again. Trials that never report back are re-admitted
+    after another ``open_seconds``. Thread-safe, since database outcomes are
+    reported from worker threads.
+    """
+
+    def __init__(self, window: int = 30, min_calls: int = 20, failure_rate: float = 0.5,
+                 open_seconds: float = 10.0, half_open_calls: int = 1):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.trips = 0
+        self._buckets: Deque[List[int]] = deque()  # [second, calls, failures]
+        self._calls = 0
+        self._failures = 0
+        self._trials = 0
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float):
+        horizon = int(now) - self.window
+        while self._buckets and self._buckets[0][0] <= horizon:
+            _, calls, failures = self._buckets.popleft()
+            self._calls -= calls
+            self._failures -= failures
+
+    def _reset(self):
+        self._buckets.clear()
+        self._calls = self._failures = self._trials = 0
+
+    def _trip(self, now: float):
+        self.state = OPEN
+        self.opened_at = now
+        self.trips += 1
+        self._reset()
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead; counts it as a trial when half open"""
+        now = time.monotonic()
+        with self._lock:
+            if self.state == OPEN:
+                if now - self.opened_at < self.open_seconds:
+                    return False
+                self.state = HALF_OPEN
+                self.opened_at = now
+                self._trials = 0
+            if self.state == HALF_OPEN:
+                if self._trials >= self.half_open_calls:
+                    if now - self.opened_at < self.open_seconds:
+                        return False
+                    self.opened_at = now
+                    self._trials = 0
+                self._trials += 1
+            return True
+
+    def record(self, ok: bool):
+        now = time.monotonic()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if ok:
+                    self.state = CLOSED
+                    self._reset()
+                else:
+                    self._trip(now)
+                return
+            if self.state == OPEN:
+                return
+            second = int(now)
+            if self._buckets and self._buckets[-1][0] == second:
+                bucket = self._buckets[-1]
+            else:
+                bucket = [second, 0, 0]
+                self._buckets.append(bucket)
+            bucket[1] += 1
+            self._calls += 1
+            if not ok:
+                bucket[2] += 1
+                self._failures += 1
+            self._prune(now)
+            if self._calls >= self.min_calls and self._failures >= self._calls * self.failure_rate:
+                self._trip(now)
+
+    def retry_after(self) -> int:
+        return max(1, int(self.open_seconds - (time.monotonic() - self.opened_at) + 0.999))
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {"state": self.state, "calls": self._calls, "failures": self._failures,
+                    "trips": self.trips}
+
+
+class Bulkhead:
+    """Caps concurrent calls to one backend; a call over the cap is refused
+    at once rather than queued behind calls that may never return"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.active >= self.limit:
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+
+
+class BackendGuard:
+    """Breaker and bulkhead around calls to one tenant backend.
+
+    Usable as a sync or async context manager, and reusable: it keeps no
+    per-call state, so one instance can guard concurrent calls.
+    """
+
+    def __init__(self, breakers: "TenantBreakers", backend: str, tenant_id: Optional[int]):
+        self.breakers = breakers
+        self.backend = backend
+        self.tenant_id = tenant_id
+        self.breaker = breakers.breaker(backend, tenant_id)
+        self.bulkhead = breakers.bulkhead(backend, tenant_id)
+
+    def __enter__(self):
+        self.breakers.admit(self.backend, self.tenant_id, self.breaker)
+        if not self.bulkhead.try_acquire():
+            self.breakers.stats["rejected"] += 1
+            raise BackendUnavailable(self.backend, self.tenant_id, "saturated", 1)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.bulkhead.release()
+        # A cancelled call says nothing about the backend
+        if exc is None or isinstance(exc, Exception):
+            self.breaker.record(exc is None or not is_backend_failure(exc))
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+class GuardedBlobClient:
+    """Blob client whose requests go through a tenant's blob guard. Only the
+    request that opens a download is guarded, not the body streamed after."""
+
+    def __init__(self, blob_client, guard: BackendGuard):
+        self._blob_client = blob_client
+        self._guard = guard
+
+    async def upload_blob(self, *args, **kwargs):
+        async with self._guard:
+            return await self._blob_client.upload_blob(*args, **kwargs)
+
+    async def download_blob(self, *args, **kwargs):
+        async with self._guard:
+            return await self._blob_client.download_blob(*args, **kwargs)
+
+    async def get_blob_properties(self, *args, **kwargs):
+        async with self._guard:
+            return await self._blob_client.get_blob_properties(*args, **kwargs)
+
+    async def delete_blob(self, *args, **kwargs):
+        async with self._guard:
+            return await self._blob_client.delete_blob(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._blob_client, name)
+
+
+class GuardedContainerClient:
+    """Container client handing out guarded blob clients"""
+
+    def __init__(self, container_client, guard: BackendGuard):
+        self._container_client = container_client
+        self._guard = guard
+
+    def get_blob_client(self, blob: str) -> GuardedBlobClient:
+        return GuardedBlobClient(self._container_client.get_blob_client(blob), self._guard)
+
+    def __getattr__(self, name):
+        return getattr(self._container_client, name)
+
+
+class TenantBreakers:
+    """Per-tenant circuit breakers and bulkheads for database, Redis and blob storage.
+
+    Each (backend, tenant) pair gets its own breaker and bulkhead, created on
+    first use, so a dedicated tenant whose Postgres or Redis is unreachable
+    fails fast with a 503 instead of holding workers for the pool or socket
+    timeout, while other tenants on the same worker are unaffected. Shared
+    tenants' database traffic goes through the shared engine and is tracked
+    under tenant ``None``.
+
+    Redis and blob calls are guarded one call at a time (``guard``). For the
+    database, outcomes come from engine events (``instrument_engine``), the
+    breaker is consulted when a session is handed out, and the bulkhead is
+    held for the request, since a request may wait on the pool at any query.
+    """
+
+    def __init__(self):
+        self.breaker_options = {"window": 30, "min_calls": 20, "failure_rate": 0.5,
+                                "open_seconds": 10.0, "half_open_calls": 1}
+        # Concurrent calls (database: requests) one tenant may have waiting on a backend
+        self.limits = {"database": 32, "redis": 64, "blob": 32}
+        self._breakers: Dict[Tuple[str, Optional[int]], CircuitBreaker] = {}
+        self._bulkheads: Dict[Tuple[str, Optional[int]], Bulkhead] = {}
+        self._lock = threading.Lock()
+        self.stats = {"fast_failures": 0, "rejected": 0}
+
+    def breaker(self, backend: str, tenant_id: Optional[int]) -> CircuitBreaker:
+        key = (backend, tenant_id)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(key, CircuitBreaker(**self.breaker_options))
+        return breaker
+
+    def bulkhead(self, backend: str, tenant_id: Optional[int]) -> Bulkhead:
+        key = (backend, tenant_id)
+        bulkhead = self._bulkheads.get(key)
+        if bulkhead is None:
+            with self._lock:
+                bulkhead = self._bulkheads.setdefault(key, Bulkhead(self.limits[backend]))
+        return bulkhead
+
+    def admit(self, backend: str, tenant_id: Optional[int],
+              breaker: Optional[CircuitBreaker] = None):
+        """Raise BackendUnavailable if the backend's breaker is open"""
+        breaker = breaker or self.breaker(backend, tenant_id)
+        if not breaker.allow():
+            self.stats["fast_failures"] += 1
+            raise BackendUnavailable(backend, tenant_id, "open", breaker.retry_after())
+
+    def guard(self, backend: str, tenant_id: Optional[int]) -> BackendGuard:
+        return BackendGuard(self, backend, tenant_id)
+
+    @contextmanager
+    def hold(self, backend: str, tenant_id: Optional[int]):
+        """Hold a slot of the tenant's bulkhead for a stretch of work, such
+        as all of a request's database use"""
+        bulkhead = self.bulkhead(backend, tenant_id)
+        if not bulkhead.try_acquire():
+            self.stats["rejected"] += 1
+            raise BackendUnavailable(backend, tenant_id, "saturated", 1)
+        try:
+            yield
+        finally:
+            bulkhead.release()
+
+    def guard_container(self, container_client, tenant_id: int) -> GuardedContainerClient:
+        return GuardedContainerClient(container_client, self.guard("blob", tenant_id))
+
+    def record(self, backend: str, tenant_id: Optional[int], ok: bool):
+        self.breaker(backend, tenant_id).record(ok)
+
+    def instrument_engine(self, engine, tenant_id: Optional[int]):
+        """Feed the tenant's database breaker from its engine: each pool
+        checkout is a success, each connection-level error a failure"""
+        breaker = self.breaker("database", tenant_id)
+
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            breaker.record(True)
+
+        def on_error(context):
+            if context.is_disconnect or is_backend_failure(context.original_exception):
+                breaker.record(False)
+
+        event.listen(engine, "checkout", on_checkout)
+        event.listen(engine, "handle_error", on_error)
+
+    def drop_tenant(self, tenant_id: int):
+        """Forget a tenant's breakers, e.g. after its backends were moved"""
+        with self._lock:
+            for key in [key for key in self._breakers if key[1] == tenant_id]:
+                del self._breakers[key]
+            for key in [key for key in self._bulkheads if key[1] == tenant_id]:
+                # In-flight calls release into the orphaned bulkhead harmlessly
+                del self._bulkheads[key]
+
+    def get_stats(self) -> Dict:
+        unhealthy = {
+            f"{backend}:{'shared' if tenant_id is None else tenant_id}": breaker.snapshot()
+            for (backend, tenant_id), breaker in list(self._breakers.items())
+            if breaker.state != CLOSED
+        }
+        return {
+            **self.stats,
+            "breakers": len(self._breakers),
+            "not_closed": unhealthy,
+            "saturated": sum(1 for bulkhead in list(self._bulkheads.values())
+                             if bulkhead.active >= bulkhead.limit),
+        }
+
+
+tenant_breakers = TenantBreakers()
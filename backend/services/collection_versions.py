@@ -0,0 +1,160 @@
+from typing import Dict, Optional, Set, Tuple
+import asyncio
+import logging
+import secrets
+import time
+
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+# Reads (ARGV[2] = 0) or bumps a version. A counter that is missing, never
+# set or lost to a flush or eviction, starts again at 0 under a fresh epoch,
+# so its versions can never repeat one handed out before the loss.
+# KEYS: counter key, epoch key   ARGV: fresh epoch, increment
+VERSION_SCRIPT = """
+if redis.call('SET', KEYS[1], 0, 'NX') then
+    redis.call('SET', KEYS[2], ARGV[1])
+else
+    redis.call('SET', KEYS[2], ARGV[1], 'NX')
+end
+local version = redis.call('INCRBY', KEYS[1], ARGV[2])
+return {redis.call('GET', KEYS[2]), version}
+"""
+
+Version = Tuple[str, int]
+
+
+class CollectionVersions:
+    """Per-tenant version counters for collections, for conditional GETs.
+
+    Services call ``bump`` after committing a change to a tenant's
+    collection; the counter lives in Redis (``INCR``), so every worker and
+    host sees the new version. Read endpoints derive their ETag from
+    ``current`` and answer a matching ``If-None-Match`` with 304 before
+    touching the database. ``current`` is served from memory for up to
+    ``local_ttl`` seconds and from one Redis round trip otherwise, so an
+    unchanged poll costs a dict lookup or a round trip.
+
+    A version is the counter plus an epoch kept next to it, rendered as
+    ``"<epoch>.<counter>"``. The epoch changes whenever the counter is found
+    missing, so a flushed or evicted counter starting over at 0 cannot hand
+    an old ETag a 304 for data it never saw.
+
+    ``bump`` is synchronous, for the sync service layer: it drops the local
+    copy and schedules the increment on the running loop, and ``current``
+    waits for this process's scheduled increments of that key before
+    answering, so a client never revalidates against a version older than
+    its own write. Other hosts see a change within ``local_ttl``.
+    """
+
+    def __init__(self):
+        # Load from environment variables in production
+        self.redis_url = "redis://localhost:6379/0"
+        self.prefix = "collection_version:"
+        self.local_ttl = 1.0
+        self.max_local = 10000
+        self._client: Optional[aioredis.Redis] = None
+        self._local: Dict[Tuple[int, str], Tuple[Version, float]] = {}
+        self._bumping: Dict[Tuple[int, str], Set[asyncio.Task]] = {}
+        self._deferred: Set[Tuple[int, str]] = set()
+        self.stats = {"bumps": 0, "local_hits": 0, "redis_reads": 0, "bump_errors": 0}
+        self._scripts = {}
+
+    def use_client(self, client: aioredis.Redis):
+        """Use an existing async Redis client (must decode responses)"""
+        self._client = client
+        self._scripts = {}
+
+    def _get_client(self) -> aioredis.Redis:
+        if self._client is None:
+            self._client = aioredis.from_url(self.redis_url, decode_responses=True)
+        return self._client
+
+    def _key(self, tenant_id: int, collection: str) -> str:
+        return f"{self.prefix}{tenant_id}:{collection}"
+
+    async def _version(self, key: Tuple[int, str], increment: int) -> Version:
+        if "version" not in self._scripts:
+            self._scripts["version"] = self._get_client().register_script(VERSION_SCRIPT)
+        counter_key = self._key(*key)
+        epoch, version = await self._scripts["version"](
+            keys=[counter_key, f"{counter_key}:epoch"],
+            args=[secrets.token_hex(4), increment],
+        )
+        return epoch, int(version)
+
+    def _remember(self, key: Tuple[int, str], version: Version):
+        if len(self._local) >= self.max_local:
+            self._local.clear()
+        self._local[key] = (version, time.monotonic() + self.local_ttl)
+
+    async def _increment(self, key: Tuple[int, str]):
+        try:
+            version = await self._version(key, 1)
+        except Exception as e:
+            # Read again on the next request rather than serve a stale version
+            self.stats["bump_errors"] += 1
+            self._deferred.add(key)
+            logger.error(f"Could not bump {key[1]} version of tenant {key[0]}: {str(e)}")
+            return
+        cached = self._local.get(key)
+        if cached is None or cached[0][0] != version[0] or cached[0][1] < version[1]:
+            self._remember(key, version)
+
+    def bump(self, tenant_id: int, collection: str):
+        """Record that a tenant's collection changed; call after the commit"""
+        key = (tenant_id, collection)
+        self.stats["bumps"] += 1
+        self._local.pop(key, None)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop (a script or a worker thread): applied on the next read here
+            self._deferred.add(key)
+            return
+        task = loop.create_task(self._increment(key))
+        tasks = self._bumping.setdefault(key, set())
+        tasks.add(task)
+
+        def done(finished):
+            tasks.discard(finished)
+            if not tasks and self._bumping.get(key) is tasks:
+                del self._bumping[key]
+        task.add_done_callback(done)
+
+    async def current(self, tenant_id: int, collection: str) -> str:
+        """The collection's version, ``"<epoch>.<counter>"``"""
+        key = (tenant_id, collection)
+        tasks = self._bumping.get(key)
+        if tasks:
+            await asyncio.gather(*list(tasks))
+        if key in self._deferred:
+            self._deferred.discard(key)
+            await self._increment(key)
+        cached = self._local.get(key)
+        if cached is not None and cached[1] > time.monotonic():
+            self.stats["local_hits"] += 1
+            return "%s.%d" % cached[0]
+        self.stats["redis_reads"] += 1
+        version = await self._version(key, 0)
+        self._remember(key, version)
+        return "%s.%d" % version
+
+    def drop_tenant(self, tenant_id: int):
+        for key in [key for key in self._local if key[0] == tenant_id]:
+            self._local.pop(key, None)
+
+    async def close(self):
+        for tasks in list(self._bumping.values()):
+            await asyncio.gather(*list(tasks), return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._scripts = {}
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "cached": len(self._local)}
+
+
+collection_versions = CollectionVersions()
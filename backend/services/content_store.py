@@ -0,0 +1,313 @@
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from datetime import UTC, datetime
+import asyncio
+import hashlib
+import json
+import logging
+
+from backend.services.circuit_breaker import BackendUnavailable
+from backend.services.file_metadata import metadata_key
+
+logger = logging.getLogger(__name__)
+
+
+class ManifestDownloader:
+    """Reads a byte range of a chunked file, fetching only the chunks it spans"""
+
+    def __init__(self, container_client, store: "ContentStore", manifest: Dict,
+                 offset: int, length: int):
+        self.container_client = container_client
+        self.store = store
+        self.manifest = manifest
+        self.offset = offset
+        self.length = length
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        chunk_size = self.manifest["chunk_size"]
+        tenant_id = self.manifest["tenant_id"]
+        end = self.offset + self.length
+        position = self.offset
+        while position < end:
+            index = position // chunk_size
+            within = position - index * chunk_size
+            take = min(chunk_size - within, end - position)
+            blob_client = self.container_client.get_blob_client(
+                self.store.chunk_path(tenant_id, self.manifest["chunks"][index])
+            )
+            downloader = await blob_client.download_blob(offset=within, length=take)
+            async for data in downloader.chunks():
+                yield data
+            position += take
+
+    async def readall(self) -> bytes:
+        return b"".join([data async for data in self.chunks()])
+
+
+class ManifestBlobClient:
+    """Blob-client facade over a manifest so DownloadService can stream it unchanged"""
+
+    def __init__(self, container_client, store: "ContentStore", manifest: Dict):
+        self.container_client = container_client
+        self.store = store
+        self.manifest = manifest
+
+    async def download_blob(self, offset: int = 0, length: Optional[int] = None, **kwargs):
+        if length is None:
+            length = self.manifest["size"] - offset
+        return ManifestDownloader(self.container_client, self.store, self.manifest, offset, length)
+
+    async def get_blob_properties(self) -> Dict:
+        return {"size": self.manifest["size"], "last_modified": self.manifest["uploaded_at"]}
+
+
+class ContentStore:
+    """Content-addressed, deduplicating file storage with per-file version manifests.
+
+    Files are split into fixed-size chunks named by their SHA-256 and stored
+    once per tenant under ``{tenant_id}/chunks/``. Each upload that changes a
+    file's content adds a manifest listing its chunk digests; unchanged chunks
+    are never written again.
+
+    Version numbers come from a counter in the tenant's Redis (``INCR``), so
+    concurrent uploads of one file never claim the same version. The file's
+    Redis metadata holds only the current version's summary; its chunk list
+    stays in the versioned manifest blob, which is immutable and so cached
+    in-process once read.
+    """
+
+    def __init__(self):
+        self.chunk_size = 4 * 1024 * 1024
+        self.max_concurrent_uploads = 4
+        self.max_cached_manifests = 1024
+        self._manifests: "OrderedDict[Tuple[int, str, int], Dict]" = OrderedDict()
+
+    def chunk_path(self, tenant_id: int, digest: str) -> str:
+        return f"{tenant_id}/chunks/{digest[:2]}/{digest}"
+
+    def manifest_path(self, tenant_id: int, filename: str, version) -> str:
+        name = version if isinstance(version, str) else f"{version:08d}"
+        return f"{tenant_id}/manifests/{filename}/{name}.json"
+
+    @staticmethod
+    def valid_filename(filename: Optional[str]) -> bool:
+        """A relative name whose segments can't leave the tenant's prefix"""
+        if not filename or "\\" in filename or "\x00" in filename:
+            return False
+        return all(segment not in ("", ".", "..") for segment in filename.split("/"))
+
+    def legacy_path(self, tenant_id: int, filename: str) -> str:
+        # Whole-file blobs from before chunking. Bare names in a shared
+        # container can't be told apart by tenant, so they are only read
+        # once moved under the tenant's prefix
+        return f"{tenant_id}/files/{filename}"
+
+    # Redis keys are relative to the tenant's namespace (see TenantRedis)
+
+    @staticmethod
+    def chunk_index_key() -> str:
+        return "chunks"
+
+    @staticmethod
+    def versions_key(filename: str) -> str:
+        return f"versions:{filename}"
+
+    @staticmethod
+    def version_counter_key(filename: str) -> str:
+        return f"version_counter:{filename}"
+
+    async def _next_version(self, redis_client, filename: str, current: Optional[Dict]) -> int:
+        key = self.version_counter_key(filename)
+        version = await redis_client.incr(key)
+        if current and version <= current["version"]:
+            # The counter went with a cache loss: move it past the durable
+            # latest. Increments stay atomic, so racing uploads still differ
+            version = await redis_client.incr(key, current["version"] + 1 - version)
+        return version
+
+    async def _upload_new_chunks(self, container_client, redis_client, tenant_id: int,
+                                 stream) -> Dict:
+        """Hash the stream chunk by chunk and upload only chunks the tenant lacks"""
+        index_key = self.chunk_index_key()
+        file_hash = hashlib.sha256()
+        digests: List[str] = []
+        size = 0
+        new_bytes = 0
+        in_flight = set()
+        seen = set()
+
+        async def upload(digest: str, data: bytes):
+            blob_client = container_client.get_blob_client(self.chunk_path(tenant_id, digest))
+            await blob_client.upload_blob(data, overwrite=True)
+            # Not evictable: a forgotten chunk would be uploaded and counted again
+            await redis_client.sadd(index_key, digest, evictable=False)
+
+        try:
+            while True:
+                data = await stream.read(self.chunk_size)
+                if not data:
+                    break
+                digest = hashlib.sha256(data).hexdigest()
+                file_hash.update(data)
+                digests.append(digest)
+                size += len(data)
+
+                if digest in seen or await redis_client.sismember(index_key, digest):
+                    continue
+                seen.add(digest)
+                new_bytes += len(data)
+
+                if len(in_flight) >= self.max_concurrent_uploads:
+                    done, in_flight = await asyncio.wait(
+                        in_flight, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        task.result()
+                in_flight.add(asyncio.ensure_future(upload(digest, data)))
+
+            if in_flight:
+                for result in await asyncio.gather(*in_flight, return_exceptions=True):
+                    if isinstance(result, Exception):
+                        raise result
+        except BaseException:
+            for task in in_flight:
+                task.cancel()
+            raise
+
+        return {
+            "content_hash": file_hash.hexdigest(),
+            "chunks": digests,
+            "size": size,
+            "new_bytes": new_bytes,
+        }
+
+    async def store(self, tenant_id: int, container_client, redis_client, filename: str,
+                    stream, content_type: Optional[str]) -> Dict:
+        """Store a new version of ``filename`` from an async ``read(n)`` stream.
+
+        Returns the current manifest plus ``new_bytes`` (bytes actually written)
+        and ``deduplicated`` (True when the content matched the latest version
+        and only metadata was touched).
+        """
+        current = await self.get_manifest(redis_client, container_client, tenant_id, filename)
+        stored = await self._upload_new_chunks(container_client, redis_client, tenant_id, stream)
+        uploaded_at = datetime.now(UTC).isoformat()
+
+        if current and current["content_hash"] == stored["content_hash"]:
+            manifest = {**current, "uploaded_at": uploaded_at}
+            await self._write_current(redis_client, manifest)
+            return {**manifest, "new_bytes": 0, "deduplicated": True}
+
+        manifest = {
+            "tenant_id": tenant_id,
+            "filename": filename,
+            "version": await self._next_version(redis_client, filename, current),
+            "size": stored["size"],
+            "content_hash": stored["content_hash"],
+            "content_type": content_type,
+            "chunk_size": self.chunk_size,
+            "chunks": stored["chunks"],
+            "uploaded_at": uploaded_at,
+        }
+        body = json.dumps(manifest).encode()
+        # The versioned manifest is the durable record; "latest" is a pointer
+        # used to rebuild Redis metadata after a cache loss
+        for name in (manifest["version"], "latest"):
+            await container_client.get_blob_client(
+                self.manifest_path(tenant_id, filename, name)
+            ).upload_blob(body, overwrite=True)
+        self._remember(manifest)
+
+        await redis_client.rpush(
+            self.versions_key(filename),
+            json.dumps({
+                "version": manifest["version"],
+                "size": manifest["size"],
+                "content_hash": manifest["content_hash"],
+                "uploaded_at": uploaded_at,
+            })
+        )
+        await self._write_current(redis_client, manifest)
+        logger.info(f"Stored {filename} v{manifest['version']} for tenant {tenant_id}: "
+                    f"{stored['size']} bytes, {stored['new_bytes']} new")
+        return {**manifest, "new_bytes": stored["new_bytes"], "deduplicated": False}
+
+    async def _write_current(self, redis_client, manifest: Dict):
+        """Cache the current version as the file's metadata entry.
+
+        The chunk list is left out, so the entry stays small however large
+        the file; ``version`` refers to the manifest that has it.
+        """
+        metadata = {
+            name: manifest[name]
+            for name in ("filename", "version", "size", "content_hash",
+                         "content_type", "uploaded_at")
+        }
+        metadata["etag"] = f'"{manifest["content_hash"]}"'
+        await redis_client.set(metadata_key(manifest["filename"]), json.dumps(metadata))
+
+    def _remember(self, manifest: Dict):
+        key = (manifest["tenant_id"], manifest["filename"], manifest["version"])
+        self._manifests[key] = manifest
+        self._manifests.move_to_end(key)
+        while len(self._manifests) > self.max_cached_manifests:
+            self._manifests.popitem(last=False)
+
+    async def load_version(self, container_client, tenant_id: int, filename: str,
+                           version: int) -> Optional[Dict]:
+        """One version's manifest, from the in-process cache or blob storage"""
+        key = (tenant_id, filename, version)
+        manifest = self._manifests.get(key)
+        if manifest is not None:
+            self._manifests.move_to_end(key)
+            return manifest
+        manifest = await self._load_manifest_blob(container_client, tenant_id, filename, version)
+        if manifest:
+            self._remember(manifest)
+        return manifest
+
+    async def _load_manifest_blob(self, container_client, tenant_id: int, filename: str,
+                                  version) -> Optional[Dict]:
+        blob_client = container_client.get_blob_client(
+            self.manifest_path(tenant_id, filename, version)
+        )
+        try:
+            downloader = await blob_client.download_blob()
+            return json.loads(await downloader.readall())
+        except BackendUnavailable:
+            raise
+        except Exception:
+            return None
+
+    async def get_manifest(self, redis_client, container_client, tenant_id: int,
+                           filename: str, version: Optional[int] = None) -> Optional[Dict]:
+        """Latest (or a specific) manifest; Redis first, blob storage on a miss"""
+        if version is None:
+            raw = await redis_client.get(metadata_key(filename))
+            if raw is not None:
+                metadata = json.loads(raw)
+                if "version" in metadata:
+                    manifest = await self.load_version(
+                        container_client, tenant_id, filename, metadata["version"]
+                    )
+                    if manifest:
+                        return manifest
+            manifest = await self._load_manifest_blob(container_client, tenant_id, filename, "latest")
+            if manifest:
+                await self._write_current(redis_client, manifest)
+            return manifest
+        return await self.load_version(container_client, tenant_id, filename, version)
+
+    async def list_versions(self, redis_client, tenant_id: int, filename: str) -> List[Dict]:
+        entries = await redis_client.lrange(self.versions_key(filename), 0, -1)
+        return [json.loads(entry) for entry in entries]
+
+    def open(self, container_client, manifest: Dict) -> ManifestBlobClient:
+        return ManifestBlobClient(container_client, self, manifest)
+
+    def drop_tenant(self, tenant_id: int):
+        for key in [key for key in self._manifests if key[0] == tenant_id]:
+            del self._manifests[key]
+
+
+content_store = ContentStore()
@@ -1,5 +1,7 @@
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from typing import Optional
+import asyncio
 from backend.models.tenant import Tenant, TenancyType
 from fastapi import HTTPException
 import logging
@@ -32,9 +34,9 @@ class DatabaseService:
 
     @staticmethod
     async def check_db_health(db: Session) -> bool:
-        """Check database health"""
+        """Check database health without blocking the event loop"""
         try:
-            db.execute("SELECT 1")
+            await asyncio.to_thread(db.execute, text("SELECT 1"))
             return True
         except Exception as e:
             logger.error(f"Database health check failed: {str(e)}")
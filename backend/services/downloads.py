@@ -0,0 +1,175 @@
+from typing import AsyncIterator, Dict, Optional, Tuple
+from datetime import UTC, datetime
+import asyncio
+import logging
+
+from fastapi import HTTPException
+
+from backend.services.circuit_breaker import BackendUnavailable
+from backend.services.content_store import content_store
+from backend.services.file_metadata import get_metadata, make_etag, set_metadata
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadService:
+    def __init__(self):
+        # Ranges at least this large are fetched as concurrent segments
+        self.parallel_threshold = 16 * 1024 * 1024
+        self.segment_size = 4 * 1024 * 1024
+        self.max_concurrency = 4
+
+    async def get_file_metadata(self, redis_client, container_client, tenant_id: int,
+                                filename: str, version: Optional[int] = None) -> Dict:
+        """Metadata from the tenant's Redis, falling back to blob storage on a miss"""
+        if version is not None:
+            manifest = await content_store.get_manifest(
+                redis_client, container_client, tenant_id, filename, version
+            )
+            if not manifest:
+                raise HTTPException(status_code=404, detail="File version not found")
+            return {**manifest, "etag": f'"{manifest["content_hash"]}"'}
+
+        metadata = await get_metadata(redis_client, filename)
+        if metadata is not None:
+            return metadata
+
+        # Versioned files keep a "latest" manifest pointer in blob storage
+        manifest = await content_store.get_manifest(
+            redis_client, container_client, tenant_id, filename
+        )
+        if manifest:
+            return {**manifest, "etag": f'"{manifest["content_hash"]}"'}
+
+        # Files uploaded before content-addressed storage are plain blobs
+        blob_client = container_client.get_blob_client(
+            content_store.legacy_path(tenant_id, filename)
+        )
+        try:
+            properties = await blob_client.get_blob_properties()
+        except BackendUnavailable:
+            raise
+        except Exception as e:
+            logger.info(f"No blob for {filename}: {str(e)}")
+            raise HTTPException(status_code=404, detail="File not found")
+
+        last_modified = properties.get("last_modified")
+        if isinstance(last_modified, datetime):
+            uploaded_at = last_modified.isoformat()
+        elif last_modified is not None:
+            uploaded_at = datetime.fromtimestamp(last_modified, UTC).isoformat()
+        else:
+            uploaded_at = ""
+        content_settings = properties.get("content_settings") or {}
+        metadata = {
+            "size": properties["size"],
+            "content_type": content_settings.get("content_type") or "application/octet-stream",
+            "uploaded_at": uploaded_at,
+            "etag": make_etag(filename, properties["size"], uploaded_at),
+        }
+        # Backfill so the next request skips the HEAD
+        await set_metadata(redis_client, filename, metadata)
+        return metadata
+
+    @staticmethod
+    def etag_matches(header: Optional[str], etag: str) -> bool:
+        """Evaluate If-None-Match (weak comparison, as RFC 9110 requires)"""
+        if not header:
+            return False
+        if header.strip() == "*":
+            return True
+        bare = etag.removeprefix("W/")
+        return any(tag.strip().removeprefix("W/") == bare for tag in header.split(","))
+
+    @staticmethod
+    def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+        """Parse a single-range ``Range`` header into an inclusive (start, end).
+
+        Returns None when the whole file should be served, including for
+        multi-range requests, which servers may answer with a full 200.
+        """
+        if not header or not header.startswith("bytes="):
+            return None
+        spec = header[len("bytes="):].strip()
+        if "," in spec:
+            return None
+
+        first, _, last = spec.partition("-")
+        try:
+            if first == "":
+                # Suffix range: the final N bytes
+                length = int(last)
+                if length <= 0:
+                    raise ValueError
+                start, end = max(size - length, 0), size - 1
+            else:
+                start = int(first)
+                end = int(last) if last else size - 1
+                end = min(end, size - 1)
+        except ValueError:
+            return None
+
+        if start >= size or start > end:
+            raise HTTPException(
+                status_code=416,
+                detail="Range not satisfiable",
+                headers={"Content-Range": f"bytes */{size}"}
+            )
+        return start, end
+
+    async def _stream_sequential(self, blob_client, offset: int, length: int) -> AsyncIterator[bytes]:
+        downloader = await blob_client.download_blob(offset=offset, length=length)
+        async for chunk in downloader.chunks():
+            yield chunk
+
+    async def _fetch_segment(self, blob_client, offset: int, length: int) -> bytes:
+        downloader = await blob_client.download_blob(offset=offset, length=length)
+        return await downloader.readall()
+
+    async def _stream_parallel(self, blob_client, offset: int, length: int) -> AsyncIterator[bytes]:
+        """Fetch fixed-size segments concurrently and yield them in order.
+
+        At most ``max_concurrency`` segments are in flight or waiting to be
+        sent, so memory is bounded by max_concurrency * segment_size.
+        """
+        segments = [
+            (start, min(self.segment_size, offset + length - start))
+            for start in range(offset, offset + length, self.segment_size)
+        ]
+        pending = []
+        next_segment = 0
+        try:
+            while next_segment < len(segments) or pending:
+                while next_segment < len(segments) and len(pending) < self.max_concurrency:
+                    start, size = segments[next_segment]
+                    pending.append(asyncio.ensure_future(
+                        self._fetch_segment(blob_client, start, size)
+                    ))
+                    next_segment += 1
+                yield await pending.pop(0)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def open(self, container_client, tenant_id: int, filename: str, metadata: Dict):
+        """Blob client to read a file through: its manifest, or the legacy blob"""
+        if "chunks" in metadata:
+            return content_store.open(container_client, metadata)
+        if "version" in metadata:
+            # Cached metadata refers to the manifest holding the chunk list
+            manifest = await content_store.load_version(
+                container_client, tenant_id, filename, metadata["version"]
+            )
+            if not manifest:
+                raise HTTPException(status_code=404, detail="File not found")
+            return content_store.open(container_client, manifest)
+        return container_client.get_blob_client(content_store.legacy_path(tenant_id, filename))
+
+    def stream(self, blob_client, offset: int, length: int) -> AsyncIterator[bytes]:
+        """Stream ``length`` bytes of a blob starting at ``offset``"""
+        if length >= self.parallel_threshold and self.max_concurrency > 1:
+            return self._stream_parallel(blob_client, offset, length)
+        return self._stream_sequential(blob_client, offset, length)
+
+
+download_service = DownloadService()
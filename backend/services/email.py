@@ -0,0 +1,101 @@
+from typing import Callable, Dict, List, Optional
+import asyncio
+import inspect
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LocalSink:
+    """Keeps delivered messages in memory; for tests and local development"""
+
+    def __init__(self):
+        self.messages: List[Dict] = []
+
+    def __call__(self, message: Dict):
+        self.messages.append(message)
+
+    def last_to(self, to: str) -> Optional[Dict]:
+        for message in reversed(self.messages):
+            if message["to"] == to:
+                return message
+        return None
+
+
+class EmailService:
+    def __init__(self):
+        # Load from environment variables in production
+        self.sender = "no-reply@example.com"
+        self._sink: Callable[[Dict], None] = self._log_sink
+        # Request handlers queue mail instead of waiting on delivery
+        self.queue_size = 10000
+        self.senders = 4
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.dropped = 0
+
+    def _log_sink(self, message: Dict):
+        logger.info(f"Email to {message['to']}: {message['subject']}")
+
+    def use_sink(self, sink: Callable[[Dict], None]):
+        """Replace the delivery backend (SMTP/API client in production)"""
+        self._sink = sink
+
+    async def send(self, to: str, subject: str, body: str):
+        message = {"from": self.sender, "to": to, "subject": subject, "body": body}
+        result = self._sink(message)
+        if inspect.isawaitable(result):
+            await result
+
+    def enqueue(self, to: str, subject: str, body: str):
+        """Queue a message for background delivery without waiting on it"""
+        if not self._tasks:
+            self.start()
+        try:
+            self._queue.put_nowait((to, subject, body))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.error(f"Email queue full; dropped message to {to}")
+
+    async def _deliver(self):
+        while True:
+            to, subject, body = await self._queue.get()
+            try:
+                await self.send(to, subject, body)
+            except Exception as e:
+                logger.error(f"Failed to send email to {to}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def start(self):
+        """Start the delivery tasks on the running loop"""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+        if not self._tasks:
+            loop = asyncio.get_running_loop()
+            self._tasks = [loop.create_task(self._deliver()) for _ in range(self.senders)]
+
+    async def close(self):
+        """Deliver what is queued, then stop"""
+        if self._queue is not None and self._tasks:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=10)
+            except asyncio.TimeoutError:
+                logger.error(f"Email queue not drained on shutdown; {self._queue.qsize()} messages lost")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+
+email_service = EmailService()
+
+
+async def send_welcome_email(email: str, first_name: str, tenant_name: str):
+    """Send the welcome email to a new tenant's owner"""
+    await email_service.send(
+        email,
+        f"Welcome to {tenant_name}",
+        f"Hi {first_name},\n\nYour workspace {tenant_name} is ready."
+    )
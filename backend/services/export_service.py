@@ -0,0 +1,218 @@
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+from datetime import UTC, date, datetime
+import csv
+import enum
+import io
+import json
+import logging
+import zlib
+
+import orjson
+from fastapi import HTTPException
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+from backend.database import db_manager
+from backend.models.todo import Todo
+from backend.models.user import User
+from backend.serialization import TODO_FIELDS
+from backend.services.file_metadata import KEY_PREFIX
+
+logger = logging.getLogger(__name__)
+
+USER_FIELDS = (
+    "id", "email", "first_name", "last_name", "tenant_id",
+    "role", "auth_type", "is_active", "created_at",
+)
+FILE_FIELDS = ("filename", "size", "content_type", "uploaded_at")
+
+RECORD_TYPES = ("todos", "users", "files")
+FORMATS = ("ndjson", "csv")
+
+
+class ExportEncoder:
+    """Incrementally encodes record batches as NDJSON or CSV, optionally gzipped"""
+
+    def __init__(self, fmt: str = "ndjson", compress: bool = False, level: int = 6):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported export format {fmt}")
+        self.fmt = fmt
+        # wbits=31 produces a gzip container rather than a raw zlib stream
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31) if compress else None
+        self._csv_header_written = set()
+
+    def encode(self, kind: str, fields: Sequence[str], rows: Sequence[Sequence]) -> bytes:
+        if self.fmt == "ndjson":
+            data = b"".join(
+                orjson.dumps({"type": kind, **dict(zip(fields, row))}) + b"\n"
+                for row in rows
+            )
+        else:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if kind not in self._csv_header_written:
+                writer.writerow(fields)
+                self._csv_header_written.add(kind)
+            writer.writerows([self._csv_value(v) for v in row] for row in rows)
+            data = buffer.getvalue().encode()
+        return self._compressor.compress(data) if self._compressor else data
+
+    def finish(self) -> bytes:
+        return self._compressor.flush() if self._compressor else b""
+
+    @staticmethod
+    def _csv_value(value):
+        if isinstance(value, enum.Enum):
+            return value.value
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return value
+
+
+class ExportService:
+    def __init__(self):
+        self.batch_size = 1000
+
+    def _iter_db_batches(self, tenant_id: int, kind: str, tenant=None) -> Iterator[List[Tuple]]:
+        """Yield row batches from a server-side cursor; one batch in memory at a time"""
+        if kind == "todos":
+            # Todos live in the tenant's own database when it has one
+            model, fields, db_tenant = Todo, TODO_FIELDS, tenant_id
+        else:
+            model, fields, db_tenant = User, USER_FIELDS, None
+
+        stmt = (
+            select(*[getattr(model, field) for field in fields])
+            .where(model.tenant_id == tenant_id)
+            .order_by(model.id)
+            .execution_options(stream_results=True, yield_per=self.batch_size)
+        )
+        if tenant is not None and db_tenant:
+            # From the tenant's row, found even once the tenant is inactive
+            session = db_manager.get_db_for(tenant)
+        else:
+            session = db_manager.get_db(db_tenant)
+        with session as db:
+            for partition in db.execute(stmt).partitions():
+                yield [tuple(row) for row in partition]
+
+    async def _iter_file_batches(self, redis_client) -> AsyncIterator[List[Tuple]]:
+        """Yield file metadata batches by SCANning the tenant's Redis"""
+        cursor = 0
+        while True:
+            cursor, keys = await redis_client.scan(cursor, match=f"{KEY_PREFIX}*", count=self.batch_size)
+            if keys:
+                values = await redis_client.mget(keys)
+                batch = []
+                for key, value in zip(keys, values):
+                    if value is None:
+                        continue
+                    metadata = json.loads(value)
+                    filename = key.decode() if isinstance(key, bytes) else key
+                    batch.append((
+                        filename[len(KEY_PREFIX):],
+                        metadata.get("size"),
+                        metadata.get("content_type"),
+                        metadata.get("uploaded_at"),
+                    ))
+                if batch:
+                    yield batch
+            if cursor == 0:
+                break
+
+    async def stream_export(
+        self,
+        tenant_id: int,
+        include: Sequence[str] = RECORD_TYPES,
+        fmt: str = "ndjson",
+        compress: bool = False,
+        redis_client=None,
+        tenant=None
+    ) -> AsyncIterator[bytes]:
+        """Stream a tenant's records as encoded chunks.
+
+        Each batch is fetched only when the consumer asks for the next chunk, so
+        when served through StreamingResponse the ASGI send loop provides the
+        backpressure and memory stays bounded by ``batch_size``. Passing the
+        tenant's row exports a tenant that has already been disabled.
+        """
+        encoder = ExportEncoder(fmt, compress)
+        fields_by_kind = {"todos": TODO_FIELDS, "users": USER_FIELDS, "files": FILE_FIELDS}
+        rows_exported: Dict[str, int] = {}
+
+        for kind in include:
+            count = 0
+            if kind == "files":
+                if redis_client is None:
+                    logger.warning(f"Skipping file metadata export for tenant {tenant_id}: no Redis client")
+                    continue
+                async for batch in self._iter_file_batches(redis_client):
+                    count += len(batch)
+                    chunk = encoder.encode(kind, FILE_FIELDS, batch)
+                    if chunk:
+                        yield chunk
+            else:
+                batches = self._iter_db_batches(tenant_id, kind, tenant)
+                try:
+                    while True:
+                        # The cursor is blocking; keep it off the event loop
+                        batch = await run_in_threadpool(next, batches, None)
+                        if batch is None:
+                            break
+                        count += len(batch)
+                        chunk = encoder.encode(kind, fields_by_kind[kind], batch)
+                        if chunk:
+                            yield chunk
+                finally:
+                    await run_in_threadpool(batches.close)
+            rows_exported[kind] = count
+
+        tail = encoder.finish()
+        if tail:
+            yield tail
+        logger.info(f"Exported tenant {tenant_id}: {rows_exported}")
+
+    @staticmethod
+    def validate_request(include: Sequence[str], fmt: str):
+        """Reject exports that can't be encoded as requested"""
+        unknown = [kind for kind in include if kind not in RECORD_TYPES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown record types: {unknown}")
+        if fmt not in FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unsupported format {fmt}")
+        if fmt == "csv" and len(include) != 1:
+            raise HTTPException(status_code=400, detail="CSV exports take exactly one record type")
+
+    async def write_export(
+        self,
+        tenant_id: int,
+        path: str,
+        include: Sequence[str] = RECORD_TYPES,
+        fmt: str = "ndjson",
+        compress: bool = True,
+        redis_client=None,
+        tenant=None
+    ) -> int:
+        """Write an export to a local file; returns the number of bytes written"""
+        written = 0
+        with open(path, "wb") as f:
+            async for chunk in self.stream_export(tenant_id, include, fmt, compress, redis_client, tenant):
+                f.write(chunk)
+                written += len(chunk)
+        return written
+
+    @staticmethod
+    def content_type(fmt: str, compress: bool) -> str:
+        if compress:
+            return "application/gzip"
+        return "application/x-ndjson" if fmt == "ndjson" else "text/csv"
+
+    @staticmethod
+    def filename(tenant_id: int, include: Sequence[str], fmt: str, compress: bool,
+                 timestamp: Optional[datetime] = None) -> str:
+        stamp = (timestamp or datetime.now(UTC)).strftime('%Y%m%d_%H%M%S')
+        name = f"tenant_{tenant_id}_{'-'.join(include)}_{stamp}.{fmt}"
+        return f"{name}.gz" if compress else name
+
+
+export_service = ExportService()
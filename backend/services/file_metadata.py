@@ -0,0 +1,35 @@
+from typing import Dict, Optional
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "file:"
+
+
+def metadata_key(filename: str) -> str:
+    """Redis key holding a file's cached metadata"""
+    return f"{KEY_PREFIX}{filename}"
+
+
+def make_etag(filename: str, size: int, uploaded_at: str) -> str:
+    """Strong ETag for one stored revision of a file"""
+    digest = hashlib.sha1(f"{filename}:{size}:{uploaded_at}".encode()).hexdigest()
+    return f'"{digest}"'
+
+
+async def get_metadata(redis_client, filename: str) -> Optional[Dict]:
+    """Read file metadata cached by upload; None on a miss"""
+    raw = await redis_client.get(metadata_key(filename))
+    if raw is None:
+        return None
+    metadata = json.loads(raw)
+    if "etag" not in metadata:
+        # Entries written before ETags were recorded
+        metadata["etag"] = make_etag(filename, metadata["size"], metadata.get("uploaded_at", ""))
+    return metadata
+
+
+async def set_metadata(redis_client, filename: str, metadata: Dict):
+    await redis_client.set(metadata_key(filename), json.dumps(metadata))
@@ -0,0 +1,215 @@
+from typing import Awaitable, Callable, Dict, Mapping, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import hashlib
+import logging
+import re
+import time
+
+from jose import JWTError, jwt
+
+logger = logging.getLogger(__name__)
+
+# (status, headers, JSON body) for a GET of the certs URL
+Fetcher = Callable[[str], Awaitable[Tuple[int, Mapping[str, str], Dict]]]
+
+MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class SigningKeysUnavailable(Exception):
+    """No signing keys to verify with: the fetch failed and none are cached.
+
+    Not a ``ValueError``: the token may be fine, so callers answer 503
+    rather than reject it.
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__("Google signing keys unavailable")
+        self.retry_after = retry_after
+
+
+class GoogleTokenVerifier:
+    """Verifies Google ID tokens without blocking the event loop.
+
+    Google's signing keys (JWKS) are fetched asynchronously and cached for
+    the ``max-age`` of the response's Cache-Control header. A background task
+    refreshes them ``refresh_margin`` seconds before they expire, so requests
+    never wait on the fetch. A token signed with a key we don't have yet
+    (rotation) triggers one immediate refresh, and concurrent requests share
+    it. Verified claims are cached by token for ``claims_ttl`` seconds, never
+    past the token's own expiry.
+
+    Verification failures raise ``ValueError`` like ``google.oauth2.id_token``;
+    ``SigningKeysUnavailable`` when there are no keys to verify against.
+    """
+
+    def __init__(self):
+        # Load from environment variables in production
+        self.client_id = "YOUR_GOOGLE_CLIENT_ID"
+        self.certs_url = "https://www.googleapis.com/oauth2/v3/certs"
+        self.issuers = ("accounts.google.com", "https://accounts.google.com")
+        self.default_max_age = 3600
+        self.refresh_margin = 300
+        self.retry_interval = 30  # also the least time between forced refreshes
+        self.fetch_timeout = 5.0
+        self.claims_ttl = 60
+        self.claims_cache_size = 10000
+        self._fetch: Fetcher = self._http_fetch
+        self._keys: Dict[str, Dict] = {}
+        self._expires_at = 0.0
+        self._forced_at = 0.0
+        self._lock = asyncio.Lock()
+        self._claims: "OrderedDict[str, Tuple[Dict, float]]" = OrderedDict()
+        self._session = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"fetches": 0, "fetch_errors": 0, "claims_hits": 0, "verified": 0, "rejected": 0}
+
+    def use_fetcher(self, fetch: Fetcher):
+        """Fetch the JWKS with ``fetch`` instead of HTTP (tests, stand-ins)"""
+        self._fetch = fetch
+        self._keys = {}
+        self._expires_at = 0.0
+        self._forced_at = 0.0
+        self._claims.clear()
+
+    async def _http_fetch(self, url: str):
+        if self._session is None or self._session.closed:
+            import aiohttp
+
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.fetch_timeout)
+            )
+        async with self._session.get(url) as response:
+            return response.status, response.headers, await response.json()
+
+    def _max_age(self, headers: Mapping[str, str]) -> int:
+        match = MAX_AGE.search(headers.get("Cache-Control", headers.get("cache-control", "")))
+        max_age = int(match.group(1)) if match else self.default_max_age
+        age = headers.get("Age", headers.get("age"))
+        return max(0, max_age - int(age)) if age and age.isdigit() else max_age
+
+    async def refresh(self, force: bool = False):
+        """Fetch the JWKS unless another caller just did"""
+        async with self._lock:
+            now = time.time()
+            if not force and now < self._expires_at - self.refresh_margin:
+                return
+            if force:
+                # Unknown kids are attacker-controlled; don't let them
+                # turn into a fetch per request
+                if now - self._forced_at < self.retry_interval:
+                    return
+                self._forced_at = now
+            self.stats["fetches"] += 1
+            try:
+                status, headers, body = await self._fetch(self.certs_url)
+                if status != 200:
+                    raise ValueError(f"JWKS fetch returned {status}")
+                keys = {key["kid"]: key for key in body["keys"]}
+            except Exception as e:
+                self.stats["fetch_errors"] += 1
+                logger.error(f"Failed to fetch Google signing keys: {str(e)}")
+                if not self._keys:
+                    raise SigningKeysUnavailable(self.retry_interval)
+                return
+            # Keep retired keys until the new set expires too, so tokens
+            # signed just before a rotation still verify
+            retired = {kid: key for kid, key in self._keys.items() if kid not in keys}
+            self._keys = {**retired, **keys} if now < self._expires_at else keys
+            self._expires_at = now + self._max_age(headers)
+
+    async def _get_key(self, kid: str) -> Dict:
+        if time.time() >= self._expires_at:
+            await self.refresh()
+        key = self._keys.get(kid)
+        if key is None:
+            # Possibly a key published since our last fetch
+            await self.refresh(force=True)
+            key = self._keys.get(kid)
+        if key is None:
+            raise ValueError(f"Unknown signing key {kid}")
+        return key
+
+    def _cached_claims(self, digest: str) -> Optional[Dict]:
+        entry = self._claims.get(digest)
+        if entry is None:
+            return None
+        claims, expires_at = entry
+        if expires_at <= time.time():
+            del self._claims[digest]
+            return None
+        self._claims.move_to_end(digest)
+        return claims
+
+    async def verify(self, token: str) -> Dict:
+        """Claims of a valid ID token for our client id; raises ValueError
+        (or SigningKeysUnavailable)"""
+        digest = hashlib.sha256(token.encode()).hexdigest()
+        claims = self._cached_claims(digest)
+        if claims is not None:
+            self.stats["claims_hits"] += 1
+            return claims
+
+        try:
+            header = jwt.get_unverified_header(token)
+            key = await self._get_key(header.get("kid", ""))
+            claims = jwt.decode(
+                token, key, algorithms=[key.get("alg", "RS256")],
+                audience=self.client_id, options={"verify_at_hash": False}
+            )
+        except JWTError as e:
+            self.stats["rejected"] += 1
+            raise ValueError(f"Invalid ID token: {str(e)}")
+        except ValueError:
+            self.stats["rejected"] += 1
+            raise
+        if claims.get("iss") not in self.issuers:
+            self.stats["rejected"] += 1
+            raise ValueError(f"Wrong issuer {claims.get('iss')}")
+
+        self.stats["verified"] += 1
+        self._claims[digest] = (claims, min(time.time() + self.claims_ttl, claims["exp"]))
+        if len(self._claims) > self.claims_cache_size:
+            self._claims.popitem(last=False)
+        return claims
+
+    async def _refresh_loop(self):
+        while True:
+            delay = self._expires_at - self.refresh_margin - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                await self.refresh()
+            except Exception:
+                pass  # logged in refresh
+            if time.time() >= self._expires_at - self.refresh_margin:
+                # Fetch failed; try again shortly rather than spinning
+                await asyncio.sleep(self.retry_interval)
+
+    def start(self):
+        """Keep the keys fresh in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "keys": sorted(self._keys),
+            "keys_expire_in": round(max(0.0, self._expires_at - time.time()), 1),
+            "cached_claims": len(self._claims),
+        }
+
+
+google_verifier = GoogleTokenVerifier()
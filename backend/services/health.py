@@ -0,0 +1,268 @@
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import asyncio
+import logging
+import time
+
+from sqlalchemy import text
+
+from backend.database import db_manager
+from backend.models.tenant import Tenant, TenancyType
+from backend.services.tenant_resources import tenant_resources
+from backend.storage.registry import blob_registry
+
+logger = logging.getLogger(__name__)
+
+Probe = Callable[[], Awaitable[None]]
+
+
+def _ping(connection, timeout: float):
+    if connection.dialect.name == "postgresql":
+        # Bounded on the server too, so a stuck ping frees its thread; the
+        # setting ends with the ping's transaction
+        connection.execute(text(f"SET LOCAL statement_timeout = {int(timeout * 1000)}"))
+    connection.execute(text("SELECT 1"))
+
+
+def _ping_engine(engine, timeout: float):
+    with engine.connect() as connection:
+        _ping(connection, timeout)
+
+
+class HealthChecker:
+    """Concurrent, time-boxed and cached health probes.
+
+    A probe is an async callable that raises when its dependency is unwell.
+    Probes run concurrently, each cut off after ``probe_timeout`` seconds,
+    and their results are cached for ``ttl`` seconds; callers arriving while
+    a probe is in flight share it, so a burst of load-balancer checks costs
+    one round trip per dependency.
+
+    Readiness only probes the platform dependencies (shared database, shared
+    Redis, shared blob storage), so it costs the same with ten tenants or ten
+    thousand. Tenant databases this process has open are swept in the
+    background, ``sweep_concurrency`` at a time, and the aggregate reports
+    the last sweep; a single tenant is probed in depth only on request.
+
+    ``wait_for`` cannot stop a blocking database ping, so pings run on a
+    small executor of their own and carry a statement timeout: a hung
+    database ties up at most ``probe_threads`` threads, never the default
+    pool that request handlers use.
+    """
+
+    def __init__(self):
+        self.ttl = 5.0
+        self.probe_timeout = 2.0
+        self.sweep_interval = 30.0
+        self.sweep_concurrency = 16
+        # A sweep batch plus the platform and tenant database probes
+        self.probe_threads = 20
+        self.max_cached = 10000
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._redis_factory: Callable[[object], object] = self._redis_for
+        self._redis_clients: Dict[str, object] = {}
+        self._cache: Dict[str, Tuple[Dict, float]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._sweep: Dict = {"checked_at": None, "tenants_checked": 0, "unhealthy": {}}
+        self._task: Optional[asyncio.Task] = None
+        self.started_at = time.time()
+        self.stats = {"probes": 0, "cache_hits": 0, "failures": 0, "timeouts": 0, "sweeps": 0}
+
+    def use_redis(self, factory: Callable[[object], object]):
+        """Build Redis clients with ``factory(tenant)`` (None for the shared
+        instance) instead of from URLs (tests, stand-ins)"""
+        self._redis_factory = factory
+
+    def _redis_for(self, tenant):
+        import redis.asyncio as aioredis
+
+        url = tenant_resources.redis_url(tenant) if tenant is not None else tenant_resources.shared_redis_url
+        if url not in self._redis_clients:
+            self._redis_clients[url] = aioredis.from_url(url, socket_connect_timeout=self.probe_timeout)
+        return self._redis_clients[url]
+
+    # Running probes
+
+    async def _blocking(self, fn, *args):
+        """Run a blocking ping on the probe executor"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.probe_threads, thread_name_prefix="health-probe")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _execute(self, probe: Probe) -> Dict:
+        self.stats["probes"] += 1
+        started = time.perf_counter()
+        result = {"status": "ok"}
+        try:
+            await asyncio.wait_for(probe(), timeout=self.probe_timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            result = {"status": "timeout"}
+        except Exception as e:
+            self.stats["failures"] += 1
+            result = {"status": "fail", "error": str(e)[:200]}
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        result["checked_at"] = time.time()
+        return result
+
+    async def run(self, name: str, probe: Probe) -> Dict:
+        """Result of ``probe``, from the cache if it ran in the last ``ttl`` seconds"""
+        cached = self._cache.get(name)
+        if cached is not None and cached[1] > time.monotonic():
+            self.stats["cache_hits"] += 1
+            return cached[0]
+        inflight = self._inflight.get(name)
+        if inflight is None:
+            inflight = self._inflight[name] = asyncio.ensure_future(self._execute(probe))
+            inflight.add_done_callback(lambda _: self._inflight.pop(name, None))
+        result = await asyncio.shield(inflight)
+        if len(self._cache) >= self.max_cached:
+            now = time.monotonic()
+            self._cache = {key: entry for key, entry in self._cache.items() if entry[1] > now}
+        self._cache[name] = (result, time.monotonic() + self.ttl)
+        return result
+
+    async def run_all(self, probes: Dict[str, Probe]) -> Dict[str, Dict]:
+        names = list(probes)
+        results = await asyncio.gather(*(self.run(name, probes[name]) for name in names))
+        return dict(zip(names, results))
+
+    # Probes
+
+    def _database_probe(self, tenant_id: Optional[int] = None) -> Probe:
+        async def probe():
+            if tenant_id is None:
+                await self._blocking(_ping_engine, db_manager.shared_engine, self.probe_timeout)
+                return
+            def ping():
+                with db_manager.get_db(tenant_id) as db:
+                    _ping(db.connection(), self.probe_timeout)
+            await self._blocking(ping)
+        return probe
+
+    def _redis_probe(self, tenant=None) -> Probe:
+        async def probe():
+            await self._redis_factory(tenant).ping()
+        return probe
+
+    def _blob_probe(self, tenant) -> Probe:
+        async def probe():
+            container = blob_registry.get_container_client(tenant)
+            # One listing page proves the credentials and the endpoint
+            async for _ in container.list_blobs(name_starts_with=f"{tenant.id}/"):
+                break
+        return probe
+
+    def platform_probes(self) -> Dict[str, Probe]:
+        # Any shared tenant resolves to the shared container; 0 is never a tenant
+        shared = SimpleNamespace(id=0, tenancy_type=TenancyType.SHARED, blob_storage_config=None)
+        return {
+            "database": self._database_probe(),
+            "redis": self._redis_probe(),
+            "blob": self._blob_probe(shared),
+        }
+
+    # Checks
+
+    def liveness(self) -> Dict:
+        """The process is up and its event loop is serving; no I/O"""
+        return {"status": "ok", "uptime_seconds": round(time.time() - self.started_at, 1)}
+
+    async def readiness(self) -> Dict:
+        """Platform dependencies; ``ready`` is False if any of them is down"""
+        checks = await self.run_all(self.platform_probes())
+        ready = all(check["status"] == "ok" for check in checks.values())
+        return {"status": "ok" if ready else "unavailable", "ready": ready, "checks": checks}
+
+    async def aggregate(self) -> Dict:
+        """Readiness plus the last background sweep of tenant databases"""
+        return {**await self.readiness(), "tenants": self._sweep}
+
+    async def tenant(self, tenant_id: int) -> Optional[Dict]:
+        """Deep check of one tenant's database, Redis and blob storage; None if unknown"""
+        def load():
+            with db_manager.get_db() as db:
+                tenant = db.query(Tenant).filter_by(id=tenant_id).first()
+                if tenant is not None:
+                    db.expunge(tenant)
+                return tenant
+        tenant = await asyncio.to_thread(load)
+        if tenant is None:
+            return None
+        checks = {}
+        if tenant.is_active:
+            checks = await self.run_all({
+                f"tenant:{tenant_id}:database": self._database_probe(tenant_id),
+                f"tenant:{tenant_id}:redis": self._redis_probe(tenant),
+                f"tenant:{tenant_id}:blob": self._blob_probe(tenant),
+            })
+            checks = {name.rsplit(":", 1)[1]: check for name, check in checks.items()}
+        healthy = tenant.is_active and all(check["status"] == "ok" for check in checks.values())
+        return {
+            "tenant_id": tenant_id,
+            "tenancy_type": tenant.tenancy_type.value,
+            "active": tenant.is_active,
+            "status": "ok" if healthy else "unavailable",
+            "checks": checks,
+        }
+
+    # Background sweep
+
+    async def sweep(self) -> Dict:
+        """Ping every tenant engine open in this process, a few at a time"""
+        semaphore = asyncio.Semaphore(self.sweep_concurrency)
+        engines = list(db_manager.tenant_engines.items())
+
+        async def check(engine):
+            async with semaphore:
+                return await self._execute(
+                    lambda: self._blocking(_ping_engine, engine, self.probe_timeout)
+                )
+
+        results = await asyncio.gather(*(check(engine) for _, engine in engines))
+        self._sweep = {
+            "checked_at": time.time(),
+            "tenants_checked": len(engines),
+            "unhealthy": {
+                tenant_id: result for (tenant_id, _), result in zip(engines, results)
+                if result["status"] != "ok"
+            },
+        }
+        self.stats["sweeps"] += 1
+        return self._sweep
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Tenant health sweep failed: {str(e)}")
+
+    def start(self):
+        """Start the background tenant sweep"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._sweep_loop())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for client in self._redis_clients.values():
+            await client.aclose()
+        self._redis_clients.clear()
+        if self._executor is not None:
+            # Pings still stuck end with their statement timeout
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "cached_results": len(self._cache)}
+
+
+health_checker = HealthChecker()
@@ -0,0 +1,224 @@
+from typing import Any, Dict, Optional, Tuple
+from functools import wraps
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import time
+import uuid
+
+from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+from starlette.datastructures import UploadFile
+
+from backend.serialization import ORJSONResponse
+
+logger = logging.getLogger(__name__)
+
+HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+# Response headers stored with the body, so a replay describes the same
+# resource as the original; cookies and framing headers are left out
+STORED_HEADERS = ("ETag", "Location", "Content-Location", "Last-Modified", "Cache-Control", "Link")
+
+
+class Idempotency:
+    """Replays the stored response of a write retried with the same ``Idempotency-Key``.
+
+    Applied per route with ``@idempotency.idempotent()`` rather than as ASGI
+    middleware, because the tenant and its Redis are only known once the
+    tenant context has run. The first request with a key takes a lock in the
+    tenant's Redis, runs the handler and stores its response there for
+    ``ttl`` seconds; repeats get that response back, with its
+    ``STORED_HEADERS`` and an ``Idempotent-Replayed`` header, and the
+    handler never runs again. Keys are scoped to the tenant's Redis
+    namespace, so tenants can't collide.
+
+    Concurrent duplicates are coalesced: within a process they await the
+    same execution, and across processes they poll for the stored response
+    while the lock is held (at most ``wait_timeout`` seconds, then 409). A
+    key reused with a different request body is rejected with 422. Only
+    successful responses are stored; an error releases the lock so a retry
+    runs the handler again.
+    """
+
+    def __init__(self):
+        self.ttl = 24 * 3600  # seconds a response is replayed
+        self.lock_ttl = 60.0  # seconds, longer than any write should take
+        self.wait_timeout = 10.0
+        self.poll_interval = 0.05
+        self.max_poll_interval = 0.5
+        self.max_key_length = 255
+        self.max_body_bytes = 64 * 1024  # larger responses are not stored
+        self._inflight: Dict[Tuple[int, str], asyncio.Future] = {}
+        self.stats = {"executed": 0, "replayed": 0, "coalesced": 0, "conflicts": 0,
+                      "mismatches": 0, "not_stored": 0}
+
+    @staticmethod
+    def _name(key: str) -> str:
+        # Hashed so any client-chosen key makes a short, safe Redis key
+        return f"idempotency:{hashlib.sha256(key.encode()).hexdigest()[:32]}"
+
+    @staticmethod
+    async def _hash_upload(upload: UploadFile) -> str:
+        # The whole content, so a same-named file with other bytes differs;
+        # rewound afterwards for the handler
+        digest = hashlib.sha256()
+        await upload.seek(0)
+        while chunk := await upload.read(1024 * 1024):
+            digest.update(chunk)
+        await upload.seek(0)
+        return digest.hexdigest()
+
+    async def fingerprint(self, request, kwargs: Dict[str, Any]) -> str:
+        """Hash of what the request asks for, so a reused key can be told apart"""
+        digest = hashlib.sha256(f"{request.method} {request.url.path}".encode())
+        for name in sorted(kwargs):
+            value = kwargs[name]
+            if isinstance(value, BaseModel):
+                part = value.model_dump_json()
+            elif isinstance(value, UploadFile):
+                part = f"{value.filename}:{value.content_type}:{await self._hash_upload(value)}"
+            elif isinstance(value, (int, float, str, bool)) and name != "token":
+                part = repr(value)
+            elif hasattr(value, "id"):
+                part = f"id={value.id}"  # the caller, e.g. the current user
+            else:
+                continue
+            digest.update(f"|{name}={part}".encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _encode(result: Any, fingerprint: str) -> Optional[str]:
+        if isinstance(result, StreamingResponse):
+            return None
+        response = result if isinstance(result, Response) else ORJSONResponse(result)
+        return json.dumps({
+            "fingerprint": fingerprint,
+            "status_code": response.status_code,
+            "media_type": response.media_type,
+            "headers": {name: response.headers[name] for name in STORED_HEADERS
+                        if name in response.headers},
+            "body": base64.b64encode(response.body).decode(),
+        })
+
+    def _replay(self, record: str, fingerprint: str) -> Response:
+        stored = json.loads(record)
+        if stored["fingerprint"] != fingerprint:
+            self.stats["mismatches"] += 1
+            raise HTTPException(
+                status_code=422,
+                detail=f"{HEADER} was already used for a different request"
+            )
+        self.stats["replayed"] += 1
+        return Response(
+            content=base64.b64decode(stored["body"]),
+            status_code=stored["status_code"],
+            media_type=stored["media_type"],
+            headers={**stored.get("headers", {}), REPLAY_HEADER: "true"},
+        )
+
+    async def _execute(self, redis_client, name: str, fingerprint: str,
+                       call) -> Tuple[Any, Optional[str]]:
+        """Run the handler under the cross-process lock; returns its result
+        and the stored record (None if it was not stored)"""
+        lock = f"{name}:lock"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.wait_timeout
+        interval = self.poll_interval
+        while True:
+            record = await redis_client.get(name)
+            if record is not None:
+                return self._replay(record, fingerprint), record
+            if await redis_client.acquire(lock, token, int(self.lock_ttl * 1000)):
+                break
+            # Another process has it in flight: wait for its response, or
+            # for its lock to lapse if it died
+            if time.monotonic() >= deadline:
+                self.stats["conflicts"] += 1
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"A request with this {HEADER} is still in progress",
+                    headers={"Retry-After": "1"},
+                )
+            self.stats["coalesced"] += 1
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, self.max_poll_interval)
+
+        try:
+            # The holder before us may have stored its response and released
+            record = await redis_client.get(name)
+            if record is not None:
+                return self._replay(record, fingerprint), record
+            self.stats["executed"] += 1
+            result = await call()
+            status_code = result.status_code if isinstance(result, Response) else 200
+            record = self._encode(result, fingerprint) if status_code < 400 else None
+            if record is None or len(record) > self.max_body_bytes:
+                self.stats["not_stored"] += 1
+                return result, None
+            # Evictable: under memory pressure the oldest records go first,
+            # and a retry that finds none simply runs again
+            await redis_client.set(name, record, ex=self.ttl)
+            return result, record
+        finally:
+            try:
+                await redis_client.release(lock, token)
+            except Exception as e:
+                # Expires by itself after lock_ttl
+                logger.warning(f"Could not release idempotency lock {lock}: {str(e)}")
+
+    def idempotent(self):
+        """Decorator for write endpoints honouring the ``Idempotency-Key`` header"""
+        def decorator(func):
+            @wraps(func)
+            async def wrapper(request, *args, **kwargs):
+                key = request.headers.get(HEADER)
+                redis_client = getattr(request.state, "redis", None)
+                if not key or redis_client is None:
+                    return await func(request, *args, **kwargs)
+                if len(key) > self.max_key_length:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"{HEADER} must be at most {self.max_key_length} characters"
+                    )
+
+                name = self._name(key)
+                fingerprint = await self.fingerprint(request, kwargs)
+                call = lambda: func(request, *args, **kwargs)
+                slot = (request.state.tenant_id, name)
+                inflight = self._inflight.get(slot)
+                if inflight is not None:
+                    # Same process: wait for the execution already under way
+                    self.stats["coalesced"] += 1
+                    succeeded, record = await asyncio.shield(inflight)
+                    if record is not None:
+                        return self._replay(record, fingerprint)
+                    if succeeded:
+                        self.stats["conflicts"] += 1
+                        raise HTTPException(
+                            status_code=409,
+                            detail=f"A request with this {HEADER} was processed but its response was not kept"
+                        )
+                    # It failed, so this is a retry like any other
+                    return (await self._execute(redis_client, name, fingerprint, call))[0]
+
+                inflight = self._inflight[slot] = asyncio.get_running_loop().create_future()
+                outcome = (False, None)
+                try:
+                    result, record = await self._execute(redis_client, name, fingerprint, call)
+                    outcome = (True, record)
+                    return result
+                finally:
+                    del self._inflight[slot]
+                    inflight.set_result(outcome)
+            return wrapper
+        return decorator
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "in_flight": len(self._inflight)}
+
+
+idempotency = Idempotency()
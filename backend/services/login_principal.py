@@ -0,0 +1,119 @@
+from typing import Any, Mapping, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import MappingProxyType
+import threading
+import time
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+from starlette.concurrency import run_in_threadpool
+
+from backend.config.tenant_config import config_manager
+from backend.database import db_manager
+from backend.models.tenant import TenancyType
+from backend.models.user import User
+
+
+@dataclass(frozen=True)
+class LoginPrincipal:
+    """Everything login and token checks need about a user, in one object"""
+    id: int
+    email: str
+    role: Optional[str]
+    tenant_id: int
+    tenant_name: str
+    tenancy_type: TenancyType
+    config: Mapping[str, Any]
+
+    @property
+    def features(self) -> Mapping[str, Any]:
+        return self.config.get("features", {})
+
+
+class PrincipalLoader:
+    """Loads login principals with one joined query and caches them by email.
+
+    The user and their tenant come back in a single SELECT; the effective
+    config is the memoized per-tier config, so nothing else is queried or
+    merged per login. Principals are cached for ``ttl`` seconds and dropped
+    when their tenant is invalidated.
+    """
+
+    def __init__(self):
+        self.ttl = 30.0
+        self.max_entries = 10000
+        self._cache: "OrderedDict[str, Tuple[LoginPrincipal, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _from_db(self, db: Session, email: str) -> Optional[LoginPrincipal]:
+        user = db.execute(
+            select(User).options(joinedload(User.tenant)).where(User.email == email)
+        ).scalar_one_or_none()
+        if user is None or not user.is_active or user.tenant is None:
+            return None
+        if not user.tenant.is_active:
+            raise HTTPException(status_code=403, detail=f"Tenant {user.tenant_id} is inactive")
+        return LoginPrincipal(
+            id=user.id,
+            email=user.email,
+            role=user.role.value if user.role else None,
+            tenant_id=user.tenant_id,
+            tenant_name=user.tenant.name,
+            tenancy_type=user.tenant.tenancy_type,
+            config=MappingProxyType(config_manager.get_tier_config(user.tenant.tenancy_type)),
+        )
+
+    def _cached(self, email: str) -> Optional[LoginPrincipal]:
+        with self._lock:
+            entry = self._cache.get(email)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._cache[email]
+                return None
+            self._cache.move_to_end(email)
+            return principal
+
+    def _store(self, principal: LoginPrincipal):
+        with self._lock:
+            self._cache[principal.email] = (principal, time.monotonic() + self.ttl)
+            self._cache.move_to_end(principal.email)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def load_sync(self, email: str, db: Optional[Session] = None) -> Optional[LoginPrincipal]:
+        """Principal for an active user, or None; 403 if their tenant is inactive"""
+        principal = self._cached(email)
+        if principal is not None:
+            return principal
+        if db is None:
+            with db_manager.get_db() as db:
+                principal = self._from_db(db, email)
+        else:
+            principal = self._from_db(db, email)
+        if principal is not None:
+            self._store(principal)
+        return principal
+
+    async def load(self, email: str, db: Optional[Session] = None) -> Optional[LoginPrincipal]:
+        """``load_sync`` without blocking the event loop on a cache miss"""
+        principal = self._cached(email)
+        if principal is not None:
+            return principal
+        return await run_in_threadpool(self.load_sync, email, db)
+
+    def invalidate(self, email: str):
+        with self._lock:
+            self._cache.pop(email, None)
+
+    def invalidate_tenant(self, tenant_id: int):
+        with self._lock:
+            for email in [email for email, (principal, _) in self._cache.items()
+                          if principal.tenant_id == tenant_id]:
+                del self._cache[email]
+
+
+principal_loader = PrincipalLoader()
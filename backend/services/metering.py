@@ -0,0 +1,345 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import asyncio
+import logging
+import threading
+import time
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from backend.database import db_manager
+from backend.models.usage import UsageDay, UsageHour, UsageMinute
+
+logger = logging.getLogger(__name__)
+
+# Rollup table and bucket width (seconds) per granularity
+GRANULARITIES = {
+    "minute": (UsageMinute, 60),
+    "hour": (UsageHour, 3600),
+    "day": (UsageDay, 86400),
+}
+
+def _bucket(minute: int, width: int) -> datetime:
+    return datetime.fromtimestamp(minute * 60 // width * width, timezone.utc)
+
+
+class Metering:
+    """Per-tenant usage metering with minute, hour and day rollups.
+
+    ``record`` adds to an in-memory aggregate keyed by tenant, resource and
+    minute, so a burst of events for the same tenant costs one dict update
+    each and memory grows with active tenants rather than with events. A
+    background task swaps the aggregates out every ``flush_interval``
+    seconds and upserts them into the three rollup tables of the shared
+    database in one transaction, adding to whatever other workers have
+    already written. A failed flush is merged back for the next attempt.
+
+    Quota checks and billing reports read the rollups (plus this worker's
+    unflushed aggregates), never raw events. At most ``max_keys``
+    tenant/resource/minute aggregates are held. Once ``flush_at`` of them
+    are in use the flusher is woken early, so the aggregates are swapped
+    out before they fill; events that would need a new one beyond
+    ``max_keys`` are dropped and counted.
+    """
+
+    def __init__(self):
+        self.flush_interval = 5.0
+        self.max_keys = 50000
+        self.flush_at = 0.8  # fraction of max_keys that triggers an early flush
+        self.read_ttl = 5.0  # seconds a rollup total is reused by quota checks
+        self.read_cache_size = 10000
+        # Minute and hour rows older than this are pruned; day rows are kept
+        # because storage usage is the sum of every day's delta
+        self.retention = {"minute": timedelta(days=2), "hour": timedelta(days=90)}
+        self.prune_interval = 3600.0
+        self._pending: Dict[Tuple[int, str], Dict[int, List[float]]] = {}
+        self._flushing: Dict[Tuple[int, str], Dict[int, List[float]]] = {}
+        self._keys = 0
+        self._lock = threading.Lock()
+        self._reads: Dict[Tuple, Tuple[float, float]] = {}
+        self._generation = 0  # bumped by every flush, so reads racing one aren't cached
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_requested = False
+        self._closing = False
+        self._pruned_at = 0.0
+        self.stats = {
+            "recorded": 0,
+            "dropped": 0,
+            "flushes": 0,
+            "early_flushes": 0,
+            "rows_upserted": 0,
+            "flush_errors": 0,
+            "read_hits": 0,
+            "read_misses": 0,
+        }
+
+    def record(self, tenant_id: int, resource: str, amount: float = 1.0) -> bool:
+        """Count ``amount`` of ``resource`` for a tenant; returns False if dropped.
+
+        Safe to call from any thread.
+        """
+        minute = int(time.time()) // 60
+        with self._lock:
+            series = self._pending.get((tenant_id, resource))
+            if series is None:
+                series = self._pending[(tenant_id, resource)] = {}
+            entry = series.get(minute)
+            if entry is None:
+                if self._keys >= self.max_keys:
+                    self.stats["dropped"] += 1
+                    if self.stats["dropped"] % 1000 == 1:
+                        logger.warning(f"Metering aggregates full, {self.stats['dropped']} events dropped so far")
+                    self._request_flush()
+                    return False
+                series[minute] = [amount, 1]
+                self._keys += 1
+                if self._keys >= self.max_keys * self.flush_at:
+                    self._request_flush()
+            else:
+                entry[0] += amount
+                entry[1] += 1
+            self.stats["recorded"] += 1
+        return True
+
+    def _request_flush(self):
+        """Wake the flusher now rather than at its next interval; holds the lock"""
+        if self._flush_requested or self._loop is None or self._loop.is_closed():
+            return
+        self._flush_requested = True
+        self.stats["early_flushes"] += 1
+        # record may run on any thread, and Event.set only on the loop's
+        self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _merge_back(self, batch: Dict[Tuple[int, str], Dict[int, List[float]]]):
+        with self._lock:
+            for key, series in batch.items():
+                pending = self._pending.setdefault(key, {})
+                for minute, (value, events) in series.items():
+                    entry = pending.get(minute)
+                    if entry is not None:
+                        entry[0] += value
+                        entry[1] += events
+                    elif self._keys < self.max_keys:
+                        pending[minute] = [value, events]
+                        self._keys += 1
+                    else:
+                        self.stats["dropped"] += events
+
+    def _rows(self, batch) -> Dict[str, List[Dict]]:
+        """Roll minute aggregates up into rows for every granularity"""
+        rows = {}
+        for granularity, (_, width) in GRANULARITIES.items():
+            buckets: Dict[Tuple, List[float]] = {}
+            for (tenant_id, resource), series in batch.items():
+                for minute, (value, events) in series.items():
+                    key = (tenant_id, resource, _bucket(minute, width))
+                    total = buckets.setdefault(key, [0.0, 0])
+                    total[0] += value
+                    total[1] += events
+            # Sorted so concurrent flushes from several workers lock rows
+            # in the same order and cannot deadlock
+            rows[granularity] = [
+                {"tenant_id": tenant_id, "resource": resource, "bucket_start": bucket,
+                 "value": value, "events": events}
+                for (tenant_id, resource, bucket), (value, events) in sorted(buckets.items())
+            ]
+        return rows
+
+    def _upsert(self, db: Session, model, rows: List[Dict]):
+        dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+        statement = dialect.insert(model)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=["tenant_id", "resource", "bucket_start"],
+            set_={
+                "value": model.value + statement.excluded.value,
+                "events": model.events + statement.excluded.events,
+            },
+        ), rows)
+
+    def _write(self, rows: Dict[str, List[Dict]]):
+        with db_manager.get_db() as db:
+            for granularity, (model, _) in GRANULARITIES.items():
+                if rows[granularity]:
+                    self._upsert(db, model, rows[granularity])
+            db.commit()
+
+    async def flush(self) -> int:
+        """Write every pending aggregate; returns the number of rows upserted"""
+        with self._lock:
+            if not self._pending:
+                return 0
+            batch, self._pending, self._keys = self._pending, {}, 0
+            self._flushing = batch
+
+        rows = self._rows(batch)
+        count = sum(len(granularity_rows) for granularity_rows in rows.values())
+        try:
+            await run_in_threadpool(self._write, rows)
+        except Exception as e:
+            self.stats["flush_errors"] += 1
+            logger.error(f"Error flushing {count} usage rollup rows: {str(e)}")
+            self._flushing = {}
+            self._merge_back(batch)
+            return 0
+        self._flushing = {}
+        # Cached totals predate this flush and would now miss its events
+        self._generation += 1
+        self._reads.clear()
+        self.stats["flushes"] += 1
+        self.stats["rows_upserted"] += count
+        return count
+
+    def prune(self, db: Session, now: Optional[datetime] = None) -> int:
+        """Delete minute and hour rollups past their retention"""
+        now = now or datetime.now(timezone.utc)
+        removed = 0
+        for granularity, keep in self.retention.items():
+            model = GRANULARITIES[granularity][0]
+            result = db.execute(
+                delete(model)
+                .where(model.bucket_start < now - keep)
+                .execution_options(synchronize_session=False)
+            )
+            removed += result.rowcount
+        db.commit()
+        return removed
+
+    def _prune_due(self):
+        with db_manager.get_db() as db:
+            removed = self.prune(db)
+        if removed:
+            logger.info(f"Pruned {removed} expired usage rollup rows")
+
+    async def _flush_loop(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._closing:
+                return
+            self._wakeup.clear()
+            with self._lock:
+                self._flush_requested = False
+            started = time.perf_counter()
+            written = await self.flush()
+            if written:
+                logger.debug(f"Flushed {written} usage rollup rows in {time.perf_counter() - started:.3f}s")
+            if time.monotonic() - self._pruned_at >= self.prune_interval:
+                self._pruned_at = time.monotonic()
+                try:
+                    await run_in_threadpool(self._prune_due)
+                except Exception as e:
+                    logger.error(f"Error pruning usage rollups: {str(e)}")
+
+    def start(self):
+        """Start the background flusher"""
+        if self._task is None or self._task.done():
+            self._pruned_at = time.monotonic()
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._flush_requested = False
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def close(self):
+        """Stop the flusher and write what is left"""
+        if self._task:
+            # Let an in-progress flush finish rather than losing its batch
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+            self._loop = None
+            self._closing = False
+        await self.flush()
+        logger.info(f"Metering closed: {self.stats}")
+
+    # Reads
+
+    def _unflushed(self, tenant_id: int, resource: str, since_minute: int) -> float:
+        with self._lock:
+            total = 0.0
+            for batch in (self._pending, self._flushing):
+                for minute, (value, _) in batch.get((tenant_id, resource), {}).items():
+                    if minute >= since_minute:
+                        total += value
+            return total
+
+    def _rollup_total(self, tenant_id: int, resource: str, granularity: str,
+                      since: Optional[datetime]) -> float:
+        model = GRANULARITIES[granularity][0]
+        query = select(func.coalesce(func.sum(model.value), 0.0)).where(
+            model.tenant_id == tenant_id, model.resource == resource
+        )
+        if since is not None:
+            query = query.where(model.bucket_start >= since)
+        with db_manager.get_db() as db:
+            return float(db.execute(query).scalar())
+
+    async def total(self, tenant_id: int, resource: str,
+                    window: Optional[str] = None) -> float:
+        """Usage of ``resource`` in the current ``window`` bucket, or ever if None.
+
+        Flushed rollups are cached for ``read_ttl`` seconds; this worker's
+        unflushed aggregates are always added on top.
+        """
+        if window is None:
+            granularity, since = "day", None
+            since_minute = 0
+        else:
+            granularity = window
+            width = GRANULARITIES[window][1]
+            since_minute = int(time.time()) // width * width // 60
+            since = _bucket(since_minute, 60)
+
+        key = (tenant_id, resource, granularity, since)
+        cached = self._reads.get(key)
+        if cached is not None and cached[1] > time.monotonic():
+            self.stats["read_hits"] += 1
+            flushed = cached[0]
+        else:
+            self.stats["read_misses"] += 1
+            generation = self._generation
+            flushed = await run_in_threadpool(self._rollup_total, tenant_id, resource, granularity, since)
+            if generation == self._generation:
+                if len(self._reads) >= self.read_cache_size:
+                    self._reads.clear()
+                self._reads[key] = (flushed, time.monotonic() + self.read_ttl)
+        return flushed + self._unflushed(tenant_id, resource, since_minute)
+
+    def report(self, db: Session, tenant_id: int, granularity: str = "day",
+               since: Optional[datetime] = None, until: Optional[datetime] = None,
+               resource: Optional[str] = None) -> List[Dict]:
+        """Rollup rows for billing, oldest bucket first"""
+        model = GRANULARITIES[granularity][0]
+        query = select(model.resource, model.bucket_start, model.value, model.events).where(
+            model.tenant_id == tenant_id
+        )
+        if resource:
+            query = query.where(model.resource == resource)
+        if since:
+            query = query.where(model.bucket_start >= since)
+        if until:
+            query = query.where(model.bucket_start < until)
+        query = query.order_by(model.bucket_start, model.resource)
+        return [
+            {"resource": row.resource, "bucket_start": row.bucket_start,
+             "value": row.value, "events": row.events}
+            for row in db.execute(query)
+        ]
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "pending_keys": self._keys,
+            "max_keys": self.max_keys,
+            "cached_reads": len(self._reads),
+        }
+
+
+metering = Metering()
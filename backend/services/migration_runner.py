@@ -0,0 +1,215 @@
+from typing import Callable, Dict, Iterable, List, Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, UTC
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.pool import NullPool
+
+from backend.database import db_manager
+from backend.models.tenant import Tenant
+
+logger = logging.getLogger(__name__)
+
+# pg_advisory_lock key shared by every runner; each tenant has its own
+# database, so one key gives one lock per tenant
+MIGRATION_LOCK_KEY = zlib.crc32(b"tenant-schema-migration")
+
+# Alembic installs its ``context``/``op`` proxies globally, so migrations
+# within one process must not overlap
+_alembic_lock = threading.Lock()
+
+COMPLETE = ("upgraded", "up_to_date")
+
+
+def migrate_database(alembic_ini: str, db_url: str, revision: str = "head",
+                     lock_timeout: str = "5s") -> Dict:
+    """Upgrade one database to ``revision`` under an advisory lock.
+
+    Returns a result dict whose ``status`` is ``upgraded``, ``up_to_date``,
+    ``locked`` (another runner holds the lock) or ``failed``. Module-level so
+    it can run in a worker process.
+    """
+    from alembic import command
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+
+    started = time.perf_counter()
+    result = {"status": "failed", "from": None, "to": None, "error": None}
+    engine = None
+    try:
+        engine = create_engine(db_url, poolclass=NullPool)
+        postgres = engine.dialect.name == "postgresql"
+        with engine.connect() as connection:
+            if postgres:
+                locked = connection.execute(
+                    text("SELECT pg_try_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY}
+                ).scalar()
+                connection.commit()
+                if not locked:
+                    result["status"] = "locked"
+                    return result
+            try:
+                if postgres:
+                    # Fail fast instead of queueing DDL behind long transactions
+                    connection.execute(
+                        text("SELECT set_config('lock_timeout', :timeout, false)"),
+                        {"timeout": lock_timeout}
+                    )
+                    connection.commit()
+
+                result["from"] = MigrationContext.configure(connection).get_current_revision()
+                config = Config(alembic_ini)
+                config.attributes["connection"] = connection
+                with _alembic_lock:
+                    command.upgrade(config, revision)
+                connection.commit()
+                result["to"] = MigrationContext.configure(connection).get_current_revision()
+                result["status"] = "upgraded" if result["to"] != result["from"] else "up_to_date"
+            finally:
+                if postgres:
+                    connection.rollback()
+                    connection.execute(
+                        text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY}
+                    )
+                    connection.commit()
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {str(e)}"
+    finally:
+        if engine is not None:
+            engine.dispose()
+        result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+class MigrationRunner:
+    """Applies schema migrations to the shared database and every tenant database.
+
+    Targets come from ``tenants.db_connection`` in the shared database and are
+    migrated by a pool of worker processes. Each result is written to a state
+    file as it completes, so an interrupted or partly failed rollout can be
+    resumed without touching databases that are already done.
+    """
+
+    def __init__(self):
+        self.alembic_ini = "alembic.ini"
+        self.concurrency = 16
+        self.lock_timeout = "5s"
+        self.state_path = "migration_state.json"
+        self.checkpoint_interval = 1.0  # seconds between state file writes
+
+    def discover(self, include_shared: bool = True,
+                 tenant_ids: Optional[Iterable[int]] = None) -> List[Dict]:
+        """Databases to migrate: the shared one plus each distinct tenant database"""
+        targets = []
+        if include_shared and not tenant_ids:
+            targets.append({"key": "shared", "tenant_id": None, "db_url": db_manager.shared_db_url})
+
+        query = select(Tenant.id, Tenant.db_connection).where(
+            Tenant.db_connection.isnot(None)
+        ).order_by(Tenant.id)
+        if tenant_ids:
+            query = query.where(Tenant.id.in_(list(tenant_ids)))
+
+        seen = {db_manager.shared_db_url}
+        with db_manager.get_db() as db:
+            for tenant_id, db_url in db.execute(query):
+                if db_url in seen:
+                    continue
+                seen.add(db_url)
+                targets.append({"key": f"tenant:{tenant_id}", "tenant_id": tenant_id, "db_url": db_url})
+        return targets
+
+    def load_state(self) -> Dict:
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def save_state(self, state: Dict):
+        """Write the state file atomically so a crash never leaves it truncated"""
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def run(
+        self,
+        revision: str = "head",
+        resume: bool = False,
+        include_shared: bool = True,
+        tenant_ids: Optional[Iterable[int]] = None,
+        progress: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """Migrate every target; returns counts by status.
+
+        With ``resume``, targets the state file records as complete for the
+        same revision are skipped and only the rest (failed, locked, never
+        reached) are attempted.
+        """
+        targets = self.discover(include_shared, tenant_ids)
+        state = self.load_state() if resume else {}
+        if state.get("revision") != revision:
+            state = {"revision": revision, "targets": {}}
+        state["started_at"] = datetime.now(UTC).isoformat()
+
+        pending = [
+            target for target in targets
+            if state["targets"].get(target["key"], {}).get("status") not in COMPLETE
+        ]
+        counts = {"skipped": len(targets) - len(pending)}
+        logger.info(f"Migrating {len(pending)} of {len(targets)} databases to {revision} "
+                    f"with {self.concurrency} workers")
+
+        started = last_saved = time.perf_counter()
+        finished = 0
+        with ProcessPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = {
+                pool.submit(migrate_database, self.alembic_ini, target["db_url"],
+                            revision, self.lock_timeout): target
+                for target in pending
+            }
+            for future in as_completed(futures):
+                target = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # The worker process itself died
+                    result = {"status": "failed", "error": f"{type(e).__name__}: {str(e)}"}
+                result["tenant_id"] = target["tenant_id"]
+                result["finished_at"] = datetime.now(UTC).isoformat()
+                state["targets"][target["key"]] = result
+                # Re-running a finished database is a cheap no-op, so losing
+                # the last interval to a crash only costs a few extra checks
+                if time.perf_counter() - last_saved >= self.checkpoint_interval:
+                    self.save_state(state)
+                    last_saved = time.perf_counter()
+
+                finished += 1
+                counts[result["status"]] = counts.get(result["status"], 0) + 1
+                elapsed = time.perf_counter() - started
+                report = {
+                    "target": target["key"],
+                    "result": result,
+                    "finished": finished,
+                    "total": len(pending),
+                    "counts": dict(counts),
+                    "eta_seconds": round(elapsed / finished * (len(pending) - finished), 1),
+                }
+                if result["status"] == "failed":
+                    logger.error(f"Migration of {target['key']} failed: {result['error']}")
+                if progress:
+                    progress(report)
+
+        state["finished_at"] = datetime.now(UTC).isoformat()
+        self.save_state(state)
+        counts["seconds"] = round(time.perf_counter() - started, 3)
+        return counts
+
+
+migration_runner = MigrationRunner()
@@ -2,14 +2,18 @@ from functools import wraps
 import logging
 from typing import Optional, Dict
 import time
+from backend.services.metering import metering
+from backend.services.resource_quotas import quotas
+from backend.services.shared_state import shared_state
 
 logger = logging.getLogger(__name__)
 
 class TenantMetrics:
     def __init__(self):
         self.use_prometheus = False  # Set to True when you want to use Prometheus
-        self._request_counts: Dict[str, int] = {}
-        self._response_times: Dict[str, float] = {}
+        # Counts and latency histograms live in shared memory so every
+        # worker process reports the same aggregated numbers
+        self.counters = shared_state.counters
         
     def track_request(self):
         """Decorator to track API requests"""
@@ -17,20 +21,34 @@ class TenantMetrics:
             @wraps(func)
             async def wrapper(request, *args, **kwargs):
                 tenant_id = request.state.tenant_id
-                path = request.url.path
+                # The route template, not the URL: ids and file names in
+                # paths would fill the shared counter table
+                route = request.scope.get("route")
+                if route is not None:
+                    path = request.scope.get("root_path", "") + route.path
+                else:
+                    path = request.url.path
                 key = f"{tenant_id}:{path}"
                 
                 start_time = time.time()
+                if tenant_id:
+                    # Rejected calls are not counted, so the tenant gets
+                    # through again once the minute rolls over
+                    await quotas.check_quota(tenant_id, "api_calls_per_minute", 1)
+                metering.record(tenant_id, "api_calls")
                 try:
+                    # Tracing is the tenant context middleware's, so the
+                    # trace also covers resolving the tenant
                     result = await func(request, *args, **kwargs)
                     
                     # Update metrics
-                    self._request_counts[key] = self._request_counts.get(key, 0) + 1
-                    self._response_times[key] = time.time() - start_time
+                    duration = time.time() - start_time
+                    self.counters.add(f"requests|{key}")
+                    self.counters.observe(f"latency|{key}", duration)
                     
                     # Log metrics
                     logger.info(f"Request metrics - tenant: {tenant_id}, path: {path}, "
-                              f"duration: {self._response_times[key]:.3f}s")
+                              f"duration: {duration:.3f}s")
                     
                     return result
                 except Exception as e:
@@ -41,17 +59,17 @@ class TenantMetrics:
         return decorator
     
     def get_metrics(self, tenant_id: Optional[int] = None) -> Dict:
-        """Get current metrics"""
-        if tenant_id:
-            return {
-                "requests": {k: v for k, v in self._request_counts.items() 
-                           if k.startswith(f"{tenant_id}:")},
-                "response_times": {k: v for k, v in self._response_times.items() 
-                                 if k.startswith(f"{tenant_id}:")}
-            }
+        """Get current metrics, aggregated over every worker process"""
+        prefix = f"requests|{tenant_id}:" if tenant_id else "requests|"
+        requests = {
+            key.split("|", 1)[1]: int(count)
+            for key, count in self.counters.items(prefix).items()
+        }
         return {
-            "requests": self._request_counts,
-            "response_times": self._response_times
+            "requests": requests,
+            "response_times": {
+                key: self.counters.histogram(f"latency|{key}") for key in requests
+            }
         }
 
 metrics = TenantMetrics() 
\ No newline at end of file
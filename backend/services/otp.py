@@ -0,0 +1,225 @@
+from typing import Dict, Optional
+from dataclasses import dataclass
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+import time
+import uuid
+
+import redis.asyncio as aioredis
+
+from backend.services.email import email_service
+
+logger = logging.getLogger(__name__)
+
+# Issues a code unless the email or tenant has sent too many recently.
+# KEYS: code key, email send window, tenant send window
+# ARGV: now, payload, ttl, window, email limit, tenant limit, member
+SEND_SCRIPT = """
+local now, window = tonumber(ARGV[1]), tonumber(ARGV[4])
+local windows = {KEYS[2], KEYS[3]}
+local limits = {tonumber(ARGV[5]), tonumber(ARGV[6])}
+for i, key in ipairs(windows) do
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    if redis.call('ZCARD', key) >= limits[i] then
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        return {0, tostring(tonumber(oldest[2]) + window - now)}
+    end
+end
+for _, key in ipairs(windows) do
+    redis.call('ZADD', key, now, ARGV[7])
+    redis.call('EXPIRE', key, math.ceil(window))
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return {1, ''}
+"""
+
+# Checks a code: throttles first, then GETs the stored code and DELetes it
+# on a match, all in one step so a code can be redeemed exactly once. The
+# tenant window is named by the caller from a prior read of the code; if the
+# code now stored belongs to another tenant, nothing is done and status 2
+# asks the caller to read again.
+# KEYS: code key, email attempt window[, tenant attempt window]
+# ARGV: tenant ('' for none), now, digest, window, email limit, tenant limit,
+#       member
+VERIFY_SCRIPT = """
+local now, window = tonumber(ARGV[2]), tonumber(ARGV[4])
+local stored = redis.call('GET', KEYS[1])
+local code = stored and cjson.decode(stored)
+local tenant = code and code['tenant_id'] or ''
+if tenant ~= ARGV[1] then
+    return {2, ''}
+end
+local windows = {KEYS[2]}
+local limits = {tonumber(ARGV[5])}
+if tenant ~= '' then
+    windows[2] = KEYS[3]
+    limits[2] = tonumber(ARGV[6])
+end
+for i, key in ipairs(windows) do
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    if redis.call('ZCARD', key) >= limits[i] then
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        return {-1, tostring(tonumber(oldest[2]) + window - now)}
+    end
+end
+if code and code['digest'] == ARGV[3] then
+    redis.call('DEL', KEYS[1], windows[1])
+    return {1, stored}
+end
+for _, key in ipairs(windows) do
+    redis.call('ZADD', key, now, ARGV[7])
+    redis.call('EXPIRE', key, math.ceil(window))
+end
+return {0, ''}
+"""
+
+
+class OTPThrottled(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"Too many attempts; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class OTPGrant:
+    """What a redeemed code proves: the login it was issued for"""
+    email: str
+    user_id: int
+    tenant_id: int
+    tenancy_type: str
+
+
+class OTPService:
+    """One-time login codes kept in Redis, never in the database.
+
+    Only an HMAC of each code is stored, under a key that expires after
+    ``ttl`` seconds. Sending is a single Lua script; verifying reads the
+    code, whose tenant names the throttling window the script is given, then
+    runs a script, so a login is two Redis round trips. Every key a script
+    touches is passed in KEYS. Sends and verification attempts are
+    limited per email and per tenant over sliding windows (sorted sets of
+    timestamps), which bounds brute-forcing a code and stops login storms
+    from reaching Postgres.
+    """
+
+    def __init__(self):
+        # Load from environment variables in production
+        self.redis_url = "redis://localhost:6379/0"
+        self.secret = b"your-otp-secret"
+        self.prefix = "otp:"
+        self.digits = 6
+        self.ttl = 300
+        self.send_window = 600.0
+        self.sends_per_email = 3
+        self.sends_per_tenant = 200
+        self.attempt_window = 900.0
+        self.attempts_per_email = 5
+        self.attempts_per_tenant = 500
+        # Reads of a code replaced under a verification before giving up
+        self.verify_retries = 3
+        self._client: Optional[aioredis.Redis] = None
+        self._scripts: Dict[str, object] = {}
+
+    def use_client(self, client: aioredis.Redis):
+        """Use an existing async Redis client (must decode responses)"""
+        self._client = client
+        self._scripts = {}
+
+    def _get_client(self) -> aioredis.Redis:
+        if self._client is None:
+            self._client = aioredis.from_url(self.redis_url, decode_responses=True)
+        return self._client
+
+    def _script(self, name: str, source: str):
+        if name not in self._scripts:
+            self._scripts[name] = self._get_client().register_script(source)
+        return self._scripts[name]
+
+    def _digest(self, email: str, code: str) -> str:
+        return hmac.new(self.secret, f"{email}:{code}".encode(), hashlib.sha256).hexdigest()
+
+    def _code_key(self, email: str) -> str:
+        return f"{self.prefix}code:{email}"
+
+    async def issue(self, email: str, user_id: int, tenant_id: int, tenancy_type: str) -> str:
+        """Store a new code for ``email``, replacing any earlier one; returns it.
+
+        Raises ``OTPThrottled`` when the email or tenant is over its send limit.
+        """
+        email = email.lower()
+        code = f"{secrets.randbelow(10 ** self.digits):0{self.digits}d}"
+        payload = json.dumps({
+            "digest": self._digest(email, code),
+            "user_id": user_id,
+            "tenant_id": str(tenant_id),
+            "tenancy_type": tenancy_type,
+        })
+        sent, retry_after = await self._script("send", SEND_SCRIPT)(
+            keys=[self._code_key(email), f"{self.prefix}sends:email:{email}",
+                  f"{self.prefix}sends:tenant:{tenant_id}"],
+            args=[time.time(), payload, self.ttl, self.send_window,
+                  self.sends_per_email, self.sends_per_tenant, uuid.uuid4().hex]
+        )
+        if not int(sent):
+            raise OTPThrottled(float(retry_after))
+        return code
+
+    async def send(self, email: str, user_id: int, tenant_id: int, tenancy_type: str):
+        """Issue a code and queue the email carrying it"""
+        code = await self.issue(email, user_id, tenant_id, tenancy_type)
+        email_service.enqueue(
+            email,
+            "Your login code",
+            f"Your login code is {code}. It expires in {self.ttl // 60} minutes."
+        )
+
+    async def verify(self, email: str, code: str) -> Optional[OTPGrant]:
+        """Redeem ``code``; returns the grant, or None if wrong or expired.
+
+        Raises ``OTPThrottled`` when the email or tenant is over its attempt limit.
+        """
+        email = email.lower()
+        code_key = self._code_key(email)
+        digest = self._digest(email, code)
+        for _ in range(self.verify_retries):
+            # The script may only touch keys it is given, so the tenant
+            # window is named from the code as stored now
+            stored = await self._get_client().get(code_key)
+            tenant = json.loads(stored)["tenant_id"] if stored else ""
+            keys = [code_key, f"{self.prefix}attempts:email:{email}"]
+            if tenant:
+                keys.append(f"{self.prefix}attempts:tenant:{tenant}")
+            status, value = await self._script("verify", VERIFY_SCRIPT)(
+                keys=keys,
+                args=[tenant, time.time(), digest, self.attempt_window,
+                      self.attempts_per_email, self.attempts_per_tenant, uuid.uuid4().hex]
+            )
+            if int(status) != 2:
+                break
+        else:
+            # Replaced by codes of other tenants throughout; not this one
+            return None
+        status = int(status)
+        if status < 0:
+            raise OTPThrottled(float(value))
+        if not status:
+            return None
+        stored = json.loads(value)
+        return OTPGrant(
+            email=email,
+            user_id=stored["user_id"],
+            tenant_id=int(stored["tenant_id"]),
+            tenancy_type=stored["tenancy_type"],
+        )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._scripts = {}
+
+
+otp_service = OTPService()
@@ -0,0 +1,294 @@
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import logging
+import threading
+import time
+
+import redis.asyncio as aioredis
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.util import queue as sqla_queue
+
+from backend.config.tenant_config import config_manager
+from backend.models.tenant import TenancyType
+
+logger = logging.getLogger(__name__)
+
+
+class TunedQueuePool(QueuePool):
+    """QueuePool that records checkout waits and can be resized in place"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._connecting = threading.local()
+        self._reset_window()
+
+    def _reset_window(self):
+        self.checkouts = 0
+        self.slow_checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.peak_in_use = self.checkedout()
+
+    def _create_connection(self):
+        started = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            self._connecting.seconds = getattr(self._connecting, "seconds", 0.0) + time.perf_counter() - started
+
+    def _do_get(self):
+        self._connecting.seconds = 0.0
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        # Opening a new connection is not queueing; pre-warming covers that
+        wait = time.perf_counter() - started - self._connecting.seconds
+        with self._stats_lock:
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            if wait >= pool_tuner.slow_wait:
+                self.slow_checkouts += 1
+            self.peak_in_use = max(self.peak_in_use, self.checkedout())
+        return record
+
+    def take_window(self) -> Dict:
+        """Counters since the previous call"""
+        with self._stats_lock:
+            window = {
+                "checkouts": self.checkouts,
+                "slow_checkouts": self.slow_checkouts,
+                "timeouts": self.timeouts,
+                "wait_mean_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+                "peak_in_use": self.peak_in_use,
+            }
+            self._reset_window()
+        return window
+
+    def resize(self, pool_size: int, max_overflow: int):
+        """Change the persistent size and overflow limit without reconnecting.
+
+        ``_overflow`` counts open connections beyond the queue size, so it is
+        shifted by the size change. Idle connections above a smaller size are
+        closed now; busy ones are closed when they are returned.
+        """
+        with self._overflow_lock:
+            self._overflow -= pool_size - self._pool.maxsize
+            self._pool.maxsize = pool_size
+            self._max_overflow = max_overflow
+        while self._pool.qsize() > pool_size:
+            try:
+                record = self._pool.get(False)
+            except sqla_queue.Empty:
+                break
+            try:
+                record.close()
+            finally:
+                self._dec_overflow()
+
+
+class PoolTuner:
+    """Sizes each tenant's database pool from its observed demand.
+
+    Every ``interval`` seconds each registered pool's window is inspected:
+    slow or timed-out checkouts, or a peak above the persistent size, grow
+    it; ``shrink_after`` quiet windows in a row (peak at most half the size)
+    shrink it. Sizes stay between ``min_pool_size`` and the tier's
+    ``resources.database.pool_size``, and size plus overflow never exceeds
+    ``max_connections``.
+
+    Tenants with traffic are recorded in a Redis sorted set together with
+    their tuned size, so a freshly started process can pre-warm the pools
+    of tenants that were busy recently at the size they needed.
+    """
+
+    def __init__(self):
+        # Load from environment variables in production
+        self.redis_url = "redis://localhost:6379/0"
+        self.hot_key = "pools:hot_tenants"
+        self.size_key = "pools:tenant_sizes"
+        self.hot_ttl = 24 * 3600  # seconds a tenant stays hot after its last request
+        self.interval = 10.0
+        self.slow_wait = 0.05  # seconds; a checkout this slow counts as queueing
+        self.slow_ratio = 0.05
+        self.shrink_after = 6
+        self.min_pool_size = 1
+        self.initial_pool_size = 3
+        self.engines: Dict[Optional[int], Tuple[Any, TenancyType]] = {}
+        self._quiet: Dict[Optional[int], int] = {}
+        self._touched: Dict[int, float] = {}
+        self._resizes = 0
+        self._client: Optional[aioredis.Redis] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def limits(self, tenancy_type: TenancyType) -> Dict[str, int]:
+        """Pool bounds for a tier from ``resources.database``"""
+        config = config_manager.get_resource_config(tenancy_type).get("database", {})
+        max_size = config.get("pool_size", 5)
+        max_overflow = config.get("max_overflow", 10)
+        max_connections = config.get("max_connections", max_size + max_overflow)
+        return {
+            "min_size": min(self.min_pool_size, max_size),
+            "max_size": min(max_size, max_connections),
+            "max_overflow": max_overflow,
+            "max_connections": max_connections,
+        }
+
+    def engine_options(self, tenancy_type: TenancyType, pool_size: Optional[int] = None) -> Dict:
+        """``create_engine`` pool arguments for a new tenant engine"""
+        limits = self.limits(tenancy_type)
+        size = pool_size or self.initial_pool_size
+        size = max(limits["min_size"], min(size, limits["max_size"]))
+        return {
+            "poolclass": TunedQueuePool,
+            "pool_size": size,
+            "max_overflow": self._overflow_for(size, limits),
+        }
+
+    def _overflow_for(self, size: int, limits: Dict[str, int]) -> int:
+        return max(0, min(limits["max_overflow"], limits["max_connections"] - size))
+
+    def register(self, tenant_id: Optional[int], engine, tenancy_type: TenancyType):
+        """Track an engine's pool; ``tenant_id`` None is the shared database"""
+        if isinstance(engine.pool, TunedQueuePool):
+            self.engines[tenant_id] = (engine, tenancy_type)
+
+    def unregister(self, tenant_id: Optional[int]):
+        self.engines.pop(tenant_id, None)
+        self._quiet.pop(tenant_id, None)
+
+    def touch(self, tenant_id: int):
+        """Note traffic for a tenant; persisted on the next tick"""
+        self._touched[tenant_id] = time.time()
+
+    def _pools(self):
+        # Engines swap in a new pool on dispose(), so look it up each time
+        for tenant_id, (engine, tenancy_type) in list(self.engines.items()):
+            if isinstance(engine.pool, TunedQueuePool):
+                yield tenant_id, engine.pool, tenancy_type
+
+    def tune(self) -> Dict[Optional[int], Dict]:
+        """Inspect every pool's last window and resize where needed"""
+        decisions = {}
+        for tenant_id, pool, tenancy_type in self._pools():
+            window = pool.take_window()
+            limits = self.limits(tenancy_type)
+            size = pool.size()
+            target = size
+
+            queueing = window["timeouts"] or (
+                window["checkouts"] and window["slow_checkouts"] / window["checkouts"] >= self.slow_ratio
+            )
+            if queueing or window["peak_in_use"] > size:
+                self._quiet[tenant_id] = 0
+                target = min(limits["max_size"], max(window["peak_in_use"], size + max(1, size // 2)))
+            elif window["peak_in_use"] <= size // 2:
+                self._quiet[tenant_id] = self._quiet.get(tenant_id, 0) + 1
+                if self._quiet[tenant_id] >= self.shrink_after:
+                    self._quiet[tenant_id] = 0
+                    target = max(limits["min_size"], window["peak_in_use"], size // 2)
+            else:
+                self._quiet[tenant_id] = 0
+
+            if target != size:
+                pool.resize(target, self._overflow_for(target, limits))
+                self._resizes += 1
+                logger.info(f"Resized pool for {tenant_id or 'shared'} from {size} to {target} "
+                            f"(peak {window['peak_in_use']}, timeouts {window['timeouts']}, "
+                            f"max wait {window['wait_max_ms']}ms)")
+            decisions[tenant_id] = {**window, "size": target, "previous_size": size}
+        return decisions
+
+    def use_client(self, client: aioredis.Redis):
+        """Use an existing async Redis client (must decode responses)"""
+        self._client = client
+
+    def _get_client(self) -> aioredis.Redis:
+        if self._client is None:
+            self._client = aioredis.from_url(self.redis_url, decode_responses=True)
+        return self._client
+
+    async def persist(self):
+        """Record recently active tenants and their current pool sizes"""
+        touched, self._touched = self._touched, {}
+        if not touched:
+            return
+        sizes = {
+            tenant_id: pool.size()
+            for tenant_id, pool, _ in self._pools() if tenant_id in touched
+        }
+        pipe = self._get_client().pipeline(transaction=False)
+        pipe.zadd(self.hot_key, {str(tenant_id): seen for tenant_id, seen in touched.items()}, gt=True)
+        pipe.zremrangebyscore(self.hot_key, "-inf", time.time() - self.hot_ttl)
+        if sizes:
+            pipe.hset(self.size_key, mapping={str(tenant_id): size for tenant_id, size in sizes.items()})
+        await pipe.execute()
+
+    async def hot_tenants(self, limit: int) -> Dict[int, int]:
+        """Most recently active tenants mapped to their last tuned pool size"""
+        client = self._get_client()
+        tenant_ids = await client.zrevrangebyscore(
+            self.hot_key, "+inf", time.time() - self.hot_ttl, start=0, num=limit
+        )
+        if not tenant_ids:
+            return {}
+        sizes = await client.hmget(self.size_key, tenant_ids)
+        return {
+            int(tenant_id): int(size) if size else self.initial_pool_size
+            for tenant_id, size in zip(tenant_ids, sizes)
+        }
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.tune()
+                await self.persist()
+            except Exception as e:
+                logger.error(f"Pool tuning failed: {str(e)}")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.persist()
+        except Exception as e:
+            logger.error(f"Failed to persist hot tenants: {str(e)}")
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def get_stats(self) -> Dict:
+        pools = {}
+        for tenant_id, pool, tenancy_type in self._pools():
+            pools["shared" if tenant_id is None else str(tenant_id)] = {
+                "tenancy_type": tenancy_type.value,
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "window_checkouts": pool.checkouts,
+                "window_timeouts": pool.timeouts,
+                "window_peak_in_use": pool.peak_in_use,
+            }
+        return {"resizes": self._resizes, "pending_hot": len(self._touched), "pools": pools}
+
+
+pool_tuner = PoolTuner()
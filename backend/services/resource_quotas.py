@@ -1,7 +1,19 @@
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime
 import asyncio
 from fastapi import HTTPException
+from backend.config.tenant_config import config_manager
+from backend.models.tenant import TenancyType
+from backend.services.metering import metering
+from backend.services.shared_state import shared_state
+from backend.services.tenant_redis import tenant_keyspace
+
+# Quotas whose usage is metered: resource, rollup window (None for all
+# time) and the size of one quota unit in metered units
+METERED_QUOTAS = {
+    'storage_gb': ('storage_bytes', None, 1024 * 1024 * 1024),
+    'api_calls_per_minute': ('api_calls', 'minute', 1),
+}
 
 class ResourceQuotas:
     def __init__(self):
@@ -12,7 +24,9 @@ class ResourceQuotas:
             'max_file_size_mb': 100
         }
         
-        self.usage_cache = {}  # Cache for usage metrics
+        # Usage counters for unmetered resources, shared by every worker
+        # process on this host
+        self.usage_cache = shared_state.counters
         
     async def check_quota(self, tenant_id: int, resource_type: str, amount: float):
         """Check if operation would exceed quota"""
@@ -27,23 +41,39 @@ class ResourceQuotas:
             
     async def get_limit(self, tenant_id: int, resource_type: str) -> float:
         """Get resource limit for tenant"""
+        if resource_type == 'redis_mb':
+            # Enforced by the tenant's keyspace, which is bound per tier
+            from backend.database import db_manager
+            tenancy_type = TenancyType(db_manager.get_tenant_info(tenant_id)["tenancy_type"])
+            return self.tier_limit(tenancy_type, resource_type)
         # In production, fetch from database
         return self.default_limits.get(resource_type)
+
+    def tier_limit(self, tenancy_type: Optional[TenancyType], resource_type: str) -> float:
+        """A tier's limit from its ``quotas`` config; the default without a tier"""
+        if tenancy_type is None:
+            return self.default_limits.get(resource_type)
+        tier_quotas = config_manager.get_tier_config(tenancy_type).get('quotas', {})
+        return tier_quotas.get(resource_type, self.default_limits.get(resource_type))
         
     async def get_usage(self, tenant_id: int, resource_type: str) -> float:
         """Get current resource usage"""
-        cache_key = f"{tenant_id}:{resource_type}"
-        
-        if cache_key not in self.usage_cache:
-            # In production, fetch from monitoring system
-            self.usage_cache[cache_key] = 0
-            
-        return self.usage_cache[cache_key]
+        if resource_type in METERED_QUOTAS:
+            resource, window, unit = METERED_QUOTAS[resource_type]
+            return await metering.total(tenant_id, resource, window) / unit
+        if resource_type == 'redis_mb':
+            # As of this process's latest write to the tenant's keyspace
+            return (tenant_keyspace.last_usage(tenant_id) or 0) / (1024 * 1024)
+        cache_key = f"usage|{tenant_id}:{resource_type}"
+        return self.usage_cache.get(cache_key)
         
     async def update_usage(self, tenant_id: int, resource_type: str, amount: float):
         """Update resource usage"""
-        cache_key = f"{tenant_id}:{resource_type}"
-        current = self.usage_cache.get(cache_key, 0)
-        self.usage_cache[cache_key] = current + amount
+        if resource_type in METERED_QUOTAS:
+            resource, _, unit = METERED_QUOTAS[resource_type]
+            metering.record(tenant_id, resource, amount * unit)
+            return
+        cache_key = f"usage|{tenant_id}:{resource_type}"
+        self.usage_cache.add(cache_key, amount)
 
-quotas = ResourceQuotas() 
\ No newline at end of file
+quotas = ResourceQuotas()
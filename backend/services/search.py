@@ -0,0 +1,434 @@
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+import heapq
+import logging
+import math
+import re
+
+from fastapi import HTTPException
+from sqlalchemy import case, func, literal, literal_column, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from backend.models.file import FileRecord
+from backend.models.todo import Todo
+from backend.serialization import TODO_FIELDS
+
+logger = logging.getLogger(__name__)
+
+DUE_BUCKETS = ("overdue", "today", "this_week", "later", "none")
+FILE_FIELDS = ("filename", "version", "size", "content_type", "uploaded_at")
+
+_TOKEN = re.compile(r"[^\W_]+")
+_COMPLETED = TODO_FIELDS.index("completed")
+_DUE_DATE = TODO_FIELDS.index("due_date")
+_CREATED_BY = TODO_FIELDS.index("created_by")
+_TODO_ID = TODO_FIELDS.index("id")
+_CONTENT_TYPE = FILE_FIELDS.index("content_type")
+
+
+def tokenize(value: Optional[str]) -> List[str]:
+    """Lower-cased word tokens; punctuation and underscores split words"""
+    return _TOKEN.findall(value.lower()) if value else []
+
+
+def _naive_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    if moment is not None and moment.tzinfo is not None:
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def due_bounds(now: Optional[datetime] = None) -> Tuple[datetime, datetime, datetime]:
+    """Start of today, start of tomorrow and one week from today (naive UTC)"""
+    today = _naive_utc(now or datetime.now(timezone.utc)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    return today, today + timedelta(days=1), today + timedelta(days=7)
+
+
+def due_bucket(due_date: Optional[datetime], bounds: Tuple[datetime, datetime, datetime]) -> str:
+    if due_date is None:
+        return "none"
+    due_date = _naive_utc(due_date)
+    today, tomorrow, week = bounds
+    if due_date < today:
+        return "overdue"
+    if due_date < tomorrow:
+        return "today"
+    if due_date < week:
+        return "this_week"
+    return "later"
+
+
+class InvertedIndex:
+    """In-process term -> {document: weight} index for one tenant's documents.
+
+    Used where the database has no full-text search (the SQLite stand-in).
+    Scoring is weighted term frequency times inverse document frequency;
+    every query term must match.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict] = defaultdict(dict)
+        self.doc_terms: Dict = {}
+        self.docs: Dict = {}
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, doc_id, fields: Iterable[Tuple[Optional[str], float]], doc: Sequence):
+        """Index ``doc`` under ``doc_id``; ``fields`` are (text, weight) pairs"""
+        self.remove(doc_id)
+        weights = Counter()
+        for value, weight in fields:
+            for token in tokenize(value):
+                weights[token] += weight
+        for term, weight in weights.items():
+            self.postings[term][doc_id] = weight
+        self.doc_terms[doc_id] = tuple(weights)
+        self.docs[doc_id] = doc
+
+    def remove(self, doc_id):
+        for term in self.doc_terms.pop(doc_id, ()):
+            posting = self.postings[term]
+            posting.pop(doc_id, None)
+            if not posting:
+                del self.postings[term]
+        self.docs.pop(doc_id, None)
+
+    def match(self, terms: List[str]) -> Dict:
+        """Scores of documents containing every term (all documents for no terms)"""
+        if not terms:
+            return dict.fromkeys(self.docs, 0.0)
+        postings = sorted((self.postings.get(term, {}) for term in set(terms)), key=len)
+        if not postings[0]:
+            return {}
+
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting.keys())
+            if not candidates:
+                return {}
+
+        total = len(self.docs)
+        scores = dict.fromkeys(candidates, 0.0)
+        for posting in postings:
+            idf = math.log(1 + total / len(posting))
+            for doc_id in candidates:
+                scores[doc_id] += posting[doc_id] * idf
+        return scores
+
+
+class SearchService:
+    """Ranked, paginated search over a tenant's todos and files.
+
+    PostgreSQL uses the generated ``search_vector`` columns and their GIN
+    indexes, so nothing extra happens on write. Other databases get an
+    in-process ``InvertedIndex`` per tenant, built from the database on the
+    first query and updated by the ``index_*``/``remove_*`` hooks after that.
+    """
+
+    def __init__(self):
+        self.text_search_config = "english"
+        self.max_page_size = 100
+        # (database url, tenant_id, kind) -> index
+        self._indexes: Dict[Tuple[str, int, str], InvertedIndex] = {}
+
+    @staticmethod
+    def _is_postgres(db: Session) -> bool:
+        return db.get_bind().dialect.name == "postgresql"
+
+    def _index_key(self, db: Session, tenant_id: int, kind: str) -> Tuple[str, int, str]:
+        return (str(db.get_bind().url), tenant_id, kind)
+
+    def _get_index(self, db: Session, tenant_id: int, kind: str,
+                   loader: Callable[[InvertedIndex], None]) -> InvertedIndex:
+        key = self._index_key(db, tenant_id, kind)
+        index = self._indexes.get(key)
+        if index is None:
+            index = InvertedIndex()
+            loader(index)
+            self._indexes[key] = index
+            logger.info(f"Built {kind} search index for tenant {tenant_id}: {len(index)} documents")
+        return index
+
+    def _loaded_index(self, db: Session, tenant_id: int, kind: str) -> Optional[InvertedIndex]:
+        if self._is_postgres(db):
+            return None
+        return self._indexes.get(self._index_key(db, tenant_id, kind))
+
+    def drop_tenant(self, tenant_id: int):
+        """Forget a tenant's in-process indexes"""
+        for key in [key for key in self._indexes if key[1] == tenant_id]:
+            del self._indexes[key]
+
+    def validate(self, due: Optional[str], page: int, page_size: int):
+        if due is not None and due not in DUE_BUCKETS:
+            raise HTTPException(status_code=400, detail=f"due must be one of {', '.join(DUE_BUCKETS)}")
+        if page < 1:
+            raise HTTPException(status_code=400, detail="page must be at least 1")
+        if not 0 < page_size <= self.max_page_size:
+            raise HTTPException(
+                status_code=400,
+                detail=f"page_size must be between 1 and {self.max_page_size}"
+            )
+
+    # Todos
+
+    @staticmethod
+    def _todo_fields(todo: Todo) -> List[Tuple[Optional[str], float]]:
+        # Title matches outweigh description matches, as with setweight A/B
+        return [(todo.title, 2.0), (todo.description, 1.0)]
+
+    def _load_todos(self, db: Session, tenant_id: int, index: InvertedIndex):
+        columns = [getattr(Todo, field) for field in TODO_FIELDS]
+        query = (
+            select(*columns)
+            .where(Todo.tenant_id == tenant_id)
+            .execution_options(stream_results=True, yield_per=5000)
+        )
+        title, description = TODO_FIELDS.index("title"), TODO_FIELDS.index("description")
+        for row in db.execute(query):
+            index.add(row[_TODO_ID], [(row[title], 2.0), (row[description], 1.0)], tuple(row))
+
+    def index_todo(self, db: Session, todo: Todo):
+        """Reflect a created or updated todo in a loaded in-process index"""
+        index = self._loaded_index(db, todo.tenant_id, "todos")
+        if index is not None:
+            row = tuple(getattr(todo, field) for field in TODO_FIELDS)
+            index.add(todo.id, self._todo_fields(todo), row)
+
+    def remove_todo(self, db: Session, tenant_id: int, todo_id: int):
+        index = self._loaded_index(db, tenant_id, "todos")
+        if index is not None:
+            index.remove(todo_id)
+
+    def search_todos(
+        self,
+        db: Session,
+        tenant_id: int,
+        query: str = "",
+        completed: Optional[bool] = None,
+        due: Optional[str] = None,
+        created_by: Optional[int] = None,
+        page: int = 1,
+        page_size: int = 20,
+        now: Optional[datetime] = None
+    ) -> Dict:
+        """Todos matching ``query`` and the facet filters, best match first.
+
+        Facet counts cover every match, not just the returned page.
+        """
+        self.validate(due, page, page_size)
+        bounds = due_bounds(now)
+        if self._is_postgres(db):
+            rows, total, facets = self._search_todos_postgres(
+                db, tenant_id, query, completed, due, created_by, page, page_size, bounds
+            )
+        else:
+            rows, total, facets = self._search_todos_index(
+                db, tenant_id, query, completed, due, created_by, page, page_size, bounds
+            )
+        return {
+            "query": query,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "results": [
+                {**dict(zip(TODO_FIELDS, row[:-1])), "rank": round(float(row[-1]), 6)}
+                for row in rows
+            ],
+            "facets": facets,
+        }
+
+    def _search_todos_postgres(self, db, tenant_id, query, completed, due, created_by,
+                               page, page_size, bounds):
+        today, tomorrow, week = bounds
+        vector = literal_column("todos.search_vector")
+        tsquery = func.websearch_to_tsquery(self.text_search_config, query)
+        bucket = case(
+            (Todo.due_date.is_(None), "none"),
+            (Todo.due_date < today, "overdue"),
+            (Todo.due_date < tomorrow, "today"),
+            (Todo.due_date < week, "this_week"),
+            else_="later",
+        )
+
+        conditions = [Todo.tenant_id == tenant_id]
+        if query.strip():
+            conditions.append(vector.op("@@")(tsquery))
+            rank = func.ts_rank_cd(vector, tsquery)
+        else:
+            rank = literal(0.0)
+        if completed is not None:
+            conditions.append(Todo.completed == completed)
+        if due is not None:
+            conditions.append(bucket == due)
+        if created_by is not None:
+            conditions.append(Todo.created_by == created_by)
+
+        columns = [getattr(Todo, field) for field in TODO_FIELDS]
+        rows = db.execute(
+            select(*columns, rank.label("rank"))
+            .where(*conditions)
+            .order_by(rank.desc(), Todo.id.desc())
+            .limit(page_size)
+            .offset((page - 1) * page_size)
+        ).all()
+
+        # All three facets in one scan of the match set; the bucket is
+        # computed once in a subquery so GROUPING SETS can refer to it
+        matches = select(
+            Todo.completed, bucket.label("due"), Todo.created_by
+        ).where(*conditions).subquery()
+        facet_rows = db.execute(
+            select(
+                func.grouping(matches.c.completed),
+                func.grouping(matches.c.due),
+                matches.c.completed,
+                matches.c.due,
+                matches.c.created_by,
+                func.count(),
+            ).group_by(
+                func.grouping_sets(matches.c.completed, matches.c.due, matches.c.created_by)
+            )
+        ).all()
+
+        facets = {"completed": {}, "due": dict.fromkeys(DUE_BUCKETS, 0), "created_by": {}}
+        total = 0
+        for no_completed, no_due, is_completed, bucket_name, creator, count in facet_rows:
+            if not no_completed:
+                facets["completed"][str(bool(is_completed)).lower()] = count
+                total += count
+            elif not no_due:
+                facets["due"][bucket_name] = count
+            else:
+                facets["created_by"][str(creator)] = count
+        return rows, total, facets
+
+    def _search_todos_index(self, db, tenant_id, query, completed, due, created_by,
+                            page, page_size, bounds):
+        index = self._get_index(
+            db, tenant_id, "todos", lambda idx: self._load_todos(db, tenant_id, idx)
+        )
+        scores = index.match(tokenize(query))
+
+        facets = {
+            "completed": Counter(),
+            "due": dict.fromkeys(DUE_BUCKETS, 0),
+            "created_by": Counter(),
+        }
+        hits = []
+        for doc_id, score in scores.items():
+            row = index.docs[doc_id]
+            is_completed = bool(row[_COMPLETED])
+            if completed is not None and is_completed != completed:
+                continue
+            bucket = due_bucket(row[_DUE_DATE], bounds)
+            if due is not None and bucket != due:
+                continue
+            if created_by is not None and row[_CREATED_BY] != created_by:
+                continue
+            hits.append((score, doc_id))
+            facets["completed"][str(is_completed).lower()] += 1
+            facets["due"][bucket] += 1
+            facets["created_by"][str(row[_CREATED_BY])] += 1
+
+        start = (page - 1) * page_size
+        top = heapq.nlargest(start + page_size, hits)
+        rows = [index.docs[doc_id] + (score,) for score, doc_id in top[start:]]
+        facets["completed"] = dict(facets["completed"])
+        facets["created_by"] = dict(facets["created_by"])
+        return rows, len(hits), facets
+
+    # Files
+
+    def index_file(self, db: Session, tenant_id: int, manifest: Dict):
+        """Upsert the searchable record for a file's current version"""
+        values = {
+            "tenant_id": tenant_id,
+            "filename": manifest["filename"],
+            "version": manifest["version"],
+            "size": manifest["size"],
+            "content_type": manifest.get("content_type"),
+            "uploaded_at": datetime.fromisoformat(manifest["uploaded_at"]),
+        }
+        dialect = postgresql if self._is_postgres(db) else sqlite
+        statement = dialect.insert(FileRecord).values(**values)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=["tenant_id", "filename"],
+            set_={key: statement.excluded[key] for key in FILE_FIELDS},
+        ))
+        db.commit()
+
+        index = self._loaded_index(db, tenant_id, "files")
+        if index is not None:
+            index.add(values["filename"], [(values["filename"], 1.0)],
+                      tuple(values[field] for field in FILE_FIELDS))
+
+    def _load_files(self, db: Session, tenant_id: int, index: InvertedIndex):
+        columns = [getattr(FileRecord, field) for field in FILE_FIELDS]
+        for row in db.execute(select(*columns).where(FileRecord.tenant_id == tenant_id)):
+            index.add(row[0], [(row[0], 1.0)], tuple(row))
+
+    def search_files(self, db: Session, tenant_id: int, query: str = "",
+                     content_type: Optional[str] = None, page: int = 1,
+                     page_size: int = 20) -> Dict:
+        """Files whose names match ``query``, with a content type facet"""
+        self.validate(None, page, page_size)
+        if self._is_postgres(db):
+            vector = literal_column("files.search_vector")
+            tsquery = func.plainto_tsquery("simple", " ".join(tokenize(query)))
+            conditions = [FileRecord.tenant_id == tenant_id]
+            rank = literal(0.0)
+            if query.strip():
+                conditions.append(vector.op("@@")(tsquery))
+                rank = func.ts_rank_cd(vector, tsquery)
+            facet_rows = db.execute(
+                select(FileRecord.content_type, func.count())
+                .where(*conditions)
+                .group_by(FileRecord.content_type)
+            ).all()
+            if content_type is not None:
+                conditions.append(FileRecord.content_type == content_type)
+            columns = [getattr(FileRecord, field) for field in FILE_FIELDS]
+            rows = db.execute(
+                select(*columns, rank.label("rank"))
+                .where(*conditions)
+                .order_by(rank.desc(), FileRecord.filename)
+                .limit(page_size)
+                .offset((page - 1) * page_size)
+            ).all()
+            facets = {str(value): count for value, count in facet_rows}
+            total = facets.get(str(content_type), 0) if content_type is not None else sum(facets.values())
+        else:
+            index = self._get_index(
+                db, tenant_id, "files", lambda idx: self._load_files(db, tenant_id, idx)
+            )
+            scores = index.match(tokenize(query))
+            facets = Counter(str(index.docs[doc_id][_CONTENT_TYPE]) for doc_id in scores)
+            hits = sorted(
+                ((score, doc_id) for doc_id, score in scores.items()
+                 if content_type is None or index.docs[doc_id][_CONTENT_TYPE] == content_type),
+                key=lambda hit: (-hit[0], hit[1])
+            )
+            total = len(hits)
+            start = (page - 1) * page_size
+            rows = [index.docs[doc_id] + (score,) for score, doc_id in hits[start:start + page_size]]
+            facets = dict(facets)
+
+        return {
+            "query": query,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "results": [
+                {**dict(zip(FILE_FIELDS, row[:-1])), "rank": round(float(row[-1]), 6)}
+                for row in rows
+            ],
+            "facets": {"content_type": facets},
+        }
+
+
+search_service = SearchService()
@@ -0,0 +1,288 @@
+from typing import Dict, Iterable, Optional
+import hashlib
+import mmap
+import multiprocessing
+import struct
+import threading
+import time
+
+import orjson
+
+# Counter slot: key hash, key (utf-8, truncated for display), value
+COUNTER_KEY_SIZE = 112
+COUNTER_SLOT = struct.Struct(f"<Q{COUNTER_KEY_SIZE}sd")
+# Kept in every segment from the start, so a full table still reports
+DROPPED_KEY = "counters|dropped"
+TRUNCATED_KEY = "counters|truncated"
+# Tenant cache entry header: seqlock, tenant id, expiry, payload length
+TENANT_HEADER = struct.Struct("<qqdI4x")
+TENANT_ENTRY_SIZE = 512
+TENANT_PAYLOAD_SIZE = TENANT_ENTRY_SIZE - TENANT_HEADER.size
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+def _key_hash(key: str) -> int:
+    # Zero marks an empty slot
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+
+
+class SharedCounters:
+    """Float counters in a shared mmap, one segment per worker process.
+
+    Each worker only writes its own segment, so increments need no
+    cross-process locking; readers sum the key over every segment. A segment
+    is an open-addressing hash table of ``slots`` entries, and keys that
+    don't fit once it is full are counted under ``counters|dropped`` rather
+    than stored. Keys are matched by their full hash, but stored names are
+    cut at ``COUNTER_KEY_SIZE`` bytes; such keys are counted under
+    ``counters|truncated``, as ``items`` would list them under the cut name.
+    """
+
+    def __init__(self, slots: int = 4096):
+        self.slots = slots
+        self.segments = 0
+        self.segment = 0
+        self.dropped = 0
+        self._buf: Optional[mmap.mmap] = None
+        self._index: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def segment_size(self) -> int:
+        return self.slots * COUNTER_SLOT.size
+
+    def allocate(self, segments: int):
+        """Map the region; must happen before workers fork to be shared"""
+        self.segments = segments
+        self._buf = mmap.mmap(-1, segments * self.segment_size)
+        self.attach(0)
+
+    def attach(self, segment: int):
+        """Write to ``segment`` from now on, keeping what it already holds"""
+        self.segment = segment
+        self._index = {}
+        base = segment * self.segment_size
+        for slot, (key_hash, key, _) in enumerate(
+            COUNTER_SLOT.iter_unpack(self._buf[base:base + self.segment_size])
+        ):
+            if key_hash:
+                self._index[key.rstrip(b"\0").decode(errors="replace")] = base + slot * COUNTER_SLOT.size
+        with self._lock:
+            for key in (DROPPED_KEY, TRUNCATED_KEY):
+                self._slot_for(key)
+
+    def _ensure(self):
+        if self._buf is None:
+            self.allocate(1)
+
+    def _probe(self, base: int, key_hash: int) -> Iterable[int]:
+        start = key_hash % self.slots
+        for step in range(self.slots):
+            yield base + (start + step) % self.slots * COUNTER_SLOT.size
+
+    def _slot_for(self, key: str) -> Optional[int]:
+        offset = self._index.get(key)
+        if offset is not None:
+            return offset
+        key_hash = _key_hash(key)
+        for offset in self._probe(self.segment * self.segment_size, key_hash):
+            existing = struct.unpack_from("<Q", self._buf, offset)[0]
+            if existing in (0, key_hash):
+                if not existing:
+                    encoded = key.encode()
+                    COUNTER_SLOT.pack_into(self._buf, offset, key_hash, encoded[:COUNTER_KEY_SIZE], 0.0)
+                    if len(encoded) > COUNTER_KEY_SIZE:
+                        self._add(TRUNCATED_KEY, 1.0)
+                self._index[key] = offset
+                return offset
+        self.dropped += 1
+        if key != DROPPED_KEY:
+            self._add(DROPPED_KEY, 1.0)
+        return None
+
+    def _add(self, key: str, amount: float):
+        offset = self._slot_for(key)
+        if offset is None:
+            return
+        value_offset = offset + COUNTER_SLOT.size - 8
+        value = struct.unpack_from("<d", self._buf, value_offset)[0]
+        struct.pack_into("<d", self._buf, value_offset, value + amount)
+
+    def add(self, key: str, amount: float = 1.0):
+        self._ensure()
+        with self._lock:
+            self._add(key, amount)
+
+    def get(self, key: str) -> float:
+        """Sum of ``key`` over every worker"""
+        self._ensure()
+        key_hash = _key_hash(key)
+        total = 0.0
+        for segment in range(self.segments):
+            for offset in self._probe(segment * self.segment_size, key_hash):
+                existing, _, value = COUNTER_SLOT.unpack_from(self._buf, offset)
+                if existing == key_hash:
+                    total += value
+                    break
+                if not existing:
+                    break
+        return total
+
+    def items(self, prefix: str = "") -> Dict[str, float]:
+        """Every key starting with ``prefix``, summed over workers"""
+        self._ensure()
+        totals: Dict[str, float] = {}
+        encoded = prefix.encode()
+        for key_hash, key, value in COUNTER_SLOT.iter_unpack(self._buf):
+            if key_hash and key.startswith(encoded):
+                name = key.rstrip(b"\0").decode(errors="replace")
+                totals[name] = totals.get(name, 0.0) + value
+        return totals
+
+    def observe(self, name: str, value: float, buckets=LATENCY_BUCKETS):
+        """Record ``value`` in histogram ``name``"""
+        for bound in buckets:
+            if value <= bound:
+                self.add(f"{name}|le={bound}")
+                break
+        self.add(f"{name}|count")
+        self.add(f"{name}|sum", value)
+
+    def histogram(self, name: str, buckets=LATENCY_BUCKETS) -> Dict:
+        """Cumulative bucket counts, count, sum and mean for ``name``"""
+        count = self.get(f"{name}|count")
+        total = self.get(f"{name}|sum")
+        cumulative, running = {}, 0.0
+        for bound in buckets:
+            running += self.get(f"{name}|le={bound}")
+            cumulative[str(bound)] = int(running)
+        return {
+            "count": int(count),
+            "sum": total,
+            "mean": total / count if count else 0.0,
+            "buckets": cumulative,
+        }
+
+
+class SharedTenantCache:
+    """Tenant routing metadata in a shared mmap, visible to every worker.
+
+    Entries are direct-mapped by tenant id and expire after ``ttl`` seconds.
+    Writers serialize on a process-shared lock; readers take no lock and
+    instead retry when the entry's sequence number shows a write in
+    progress or completed while they were reading.
+
+    The sequence number doubles as the slot's generation: a caller filling
+    a miss takes ``generation`` before reading the database and passes it
+    to ``put``, which then skips the write if an ``invalidate`` (or any
+    other write) landed in between, so a lookup that raced an invalidation
+    can't cache what it read before it.
+    """
+
+    def __init__(self, slots: int = 8192, ttl: float = 30.0):
+        self.slots = slots
+        self.ttl = ttl
+        self._buf: Optional[mmap.mmap] = None
+        self._lock = None
+
+    def allocate(self):
+        """Map the region; must happen before workers fork to be shared"""
+        self._buf = mmap.mmap(-1, self.slots * TENANT_ENTRY_SIZE)
+        self._lock = multiprocessing.Lock()
+
+    def _ensure(self):
+        if self._buf is None:
+            self.allocate()
+
+    def _offset(self, tenant_id: int) -> int:
+        return tenant_id % self.slots * TENANT_ENTRY_SIZE
+
+    def get(self, tenant_id: int) -> Optional[Dict]:
+        self._ensure()
+        offset = self._offset(tenant_id)
+        for _ in range(3):
+            seq, cached_id, expires, length = TENANT_HEADER.unpack_from(self._buf, offset)
+            if seq % 2:
+                continue
+            start = offset + TENANT_HEADER.size
+            payload = self._buf[start:start + length]
+            if struct.unpack_from("<q", self._buf, offset)[0] != seq:
+                continue
+            if cached_id != tenant_id or expires <= time.time() or not length:
+                return None
+            return orjson.loads(payload)
+        return None
+
+    def generation(self, tenant_id: int) -> int:
+        """The slot's current generation, to pass to ``put``"""
+        self._ensure()
+        return struct.unpack_from("<q", self._buf, self._offset(tenant_id))[0]
+
+    def _write(self, tenant_id: int, expires: float, payload: bytes,
+               generation: Optional[int] = None) -> bool:
+        offset = self._offset(tenant_id)
+        with self._lock:
+            seq = struct.unpack_from("<q", self._buf, offset)[0]
+            if generation is not None and seq != generation:
+                return False
+            struct.pack_into("<q", self._buf, offset, seq + 1)
+            start = offset + TENANT_HEADER.size
+            self._buf[start:start + len(payload)] = payload
+            TENANT_HEADER.pack_into(self._buf, offset, seq + 2, tenant_id, expires, len(payload))
+        return True
+
+    def put(self, tenant_id: int, data: Dict, generation: Optional[int] = None) -> bool:
+        """Cache ``data``, unless the slot moved past ``generation``; entries
+        too large for a slot are not cached"""
+        self._ensure()
+        payload = orjson.dumps(data)
+        if len(payload) > TENANT_PAYLOAD_SIZE:
+            return False
+        return self._write(tenant_id, time.time() + self.ttl, payload, generation)
+
+    def invalidate(self, tenant_id: int):
+        self._ensure()
+        self._write(tenant_id, 0.0, b"")
+
+
+class SharedState:
+    """Process-shared counters and caches for pre-forked API workers.
+
+    ``allocate`` is called by the serving master before it forks, with one
+    counter segment per worker slot; each worker then calls ``attach`` with
+    its slot. A process that never calls ``allocate`` (a single uvicorn
+    process, a CLI) gets a private region with one segment on first use.
+    """
+
+    def __init__(self):
+        self.counters = SharedCounters()
+        self.tenant_cache = SharedTenantCache()
+
+    def allocate(self, segments: int, counter_slots: Optional[int] = None):
+        if counter_slots:
+            self.counters.slots = counter_slots
+        self.counters.allocate(segments)
+        self.tenant_cache.allocate()
+
+    def attach(self, segment: int):
+        self.counters.attach(segment)
+
+    def get_stats(self) -> Dict:
+        hits = int(self.counters.get("tenant_cache|hits"))
+        misses = int(self.counters.get("tenant_cache|misses"))
+        return {
+            "segments": self.counters.segments,
+            "segment": self.counters.segment,
+            "counter_slots": self.counters.slots,
+            # Over every worker: metrics lost to a full table, and keys
+            # listed under a cut name
+            "counters_dropped": int(self.counters.get(DROPPED_KEY)),
+            "counters_truncated": int(self.counters.get(TRUNCATED_KEY)),
+            "tenant_cache_hits": hits,
+            "tenant_cache_misses": misses,
+        }
+
+
+shared_state = SharedState()
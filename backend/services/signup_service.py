@@ -1,10 +1,10 @@
 from sqlalchemy.orm import Session
-from models.tenant import Tenant, TenancyType
-from models.user import User, UserRole
-from schemas.auth import TenantCreate, UserCreate
-from services.tenant_resources import tenant_resources
-from services.email import send_welcome_email
-from fastapi import HTTPException, BackgroundTasks
+from backend.models.tenant import Tenant, TenancyType
+from backend.models.user import User, UserRole
+from backend.schemas.auth import TenantCreate, UserCreate
+from backend.jobs.queue import job_queue
+from backend.services.audit import audit_log
+from fastapi import HTTPException
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,23 +13,22 @@ class SignupService:
     @staticmethod
     async def create_tenant_with_admin(
         db: Session,
-        tenant_data: TenantCreate,
-        background_tasks: BackgroundTasks
+        tenant_data: TenantCreate
     ):
         """Create a new tenant with admin user"""
         try:
             # Create tenant
+            tenancy_type = TenancyType(tenant_data.db_type)
             new_tenant = Tenant(
                 name=tenant_data.name,
-                tenancy_type=tenant_data.tenancy_type
+                tenancy_type=tenancy_type
             )
             
-            if tenant_data.tenancy_type in [TenancyType.DEDICATED, TenancyType.ENTERPRISE]:
-                # Set up dedicated resources
-                resources = await tenant_resources.create_tenant_resources(tenant_data.name)
-                new_tenant.db_connection = resources['database']['connection_string']
-                new_tenant.redis_config = resources['redis']
-                new_tenant.blob_storage_config = resources['blob_storage']
+            dedicated = tenancy_type in [TenancyType.DEDICATED, TenancyType.ENTERPRISE]
+            if dedicated:
+                # Dedicated resources are provisioned by a worker; the tenant
+                # is activated once they exist
+                new_tenant.is_active = False
             
             db.add(new_tenant)
             db.flush()  # Get tenant ID without committing
@@ -49,20 +48,49 @@ class SignupService:
             db.refresh(new_tenant)
             db.refresh(admin_user)
             
-            # Send welcome email in background
-            background_tasks.add_task(
-                send_welcome_email,
-                admin_user.email,
-                admin_user.first_name,
-                new_tenant.name
-            )
-            
-            return new_tenant, admin_user
-            
         except Exception as e:
             db.rollback()
             logger.error(f"Error creating tenant with admin: {str(e)}")
             raise HTTPException(status_code=400, detail=str(e))
+        
+        if not dedicated:
+            await audit_log.log(
+                new_tenant.id,
+                "tenant.create",
+                admin_user.id,
+                "tenant",
+                new_tenant.id,
+                {"tenancy_type": new_tenant.tenancy_type.value, "admin_email": admin_user.email}
+            )
+        
+        try:
+            if dedicated:
+                # The tenant's audit log lives in the database the job
+                # creates, so the job records the creation
+                await job_queue.enqueue(
+                    "provision_tenant",
+                    {"audit": {"actor_id": admin_user.id, "admin_email": admin_user.email}},
+                    tenant_id=new_tenant.id,
+                    priority="high",
+                    unique_key=f"provision:{new_tenant.id}"
+                )
+            
+            # Send welcome email from a worker process
+            await job_queue.enqueue(
+                "send_welcome_email",
+                {
+                    "email": admin_user.email,
+                    "first_name": admin_user.first_name,
+                    "tenant_name": new_tenant.name
+                },
+                tenant_id=new_tenant.id,
+                priority="low"
+            )
+        except Exception as e:
+            # The tenant exists; a failed enqueue must not fail the signup
+            logger.error(f"Error enqueueing jobs for tenant {new_tenant.id}: {str(e)}")
+        
+        return new_tenant, admin_user
     
     @staticmethod
     def create_user(db: Session, user_data: UserCreate):
@@ -72,6 +100,9 @@ class SignupService:
             tenant = db.query(Tenant).filter_by(id=user_data.tenant_id).first()
             if not tenant:
                 raise HTTPException(status_code=404, detail="Tenant not found")
+            if not tenant.is_active:
+                # Its database, where the audit trail goes, doesn't exist yet
+                raise HTTPException(status_code=409, detail="Tenant is still being provisioned")
             
             # Create user
             new_user = User(
@@ -87,8 +118,17 @@ class SignupService:
             db.commit()
             db.refresh(new_user)
             
+            audit_log.record(
+                new_user.tenant_id,
+                "user.create",
+                resource_type="user",
+                resource_id=new_user.id,
+                details={"email": new_user.email, "role": new_user.role.value}
+            )
             return new_user
             
+        except HTTPException:
+            raise
         except Exception as e:
             db.rollback()
             logger.error(f"Error creating user: {str(e)}")
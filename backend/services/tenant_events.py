@@ -0,0 +1,117 @@
+from typing import Callable, List, Optional
+import asyncio
+import inspect
+import logging
+
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+
+class TenantInvalidator:
+    """Tells every API and worker process to drop cached state for a tenant.
+
+    ``publish`` sends the tenant id on a shared Redis channel; each process
+    that called ``start`` runs its registered handlers (engine registry,
+    client caches, search indexes) when the message arrives, so a change of
+    tenancy takes effect everywhere within a round trip.
+    """
+
+    def __init__(self):
+        # Load from environment variables in production
+        self.redis_url = "redis://localhost:6379/0"
+        self.channel = "tenants:invalidate"
+        self.handlers: List[Callable[[int], object]] = []
+        self._client: Optional[aioredis.Redis] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def on_invalidate(self, handler: Callable[[int], object]):
+        """Register ``handler(tenant_id)``; may be sync or async"""
+        self.handlers.append(handler)
+        return handler
+
+    def install_default_handlers(self):
+        """Register the process-wide caches keyed by tenant"""
+        from backend.database import db_manager
+        from backend.services.circuit_breaker import tenant_breakers
+        from backend.services.collection_versions import collection_versions
+        from backend.services.content_store import content_store
+        from backend.services.login_principal import principal_loader
+        from backend.services.search import search_service
+        from backend.services.shared_state import shared_state
+        from backend.services.tenant_resources import tenant_resources
+        from backend.storage.registry import blob_registry
+
+        for handler in (shared_state.tenant_cache.invalidate, db_manager.cleanup_tenant,
+                        tenant_resources.evict, blob_registry.discard,
+                        search_service.drop_tenant, principal_loader.invalidate_tenant,
+                        tenant_breakers.drop_tenant, collection_versions.drop_tenant,
+                        content_store.drop_tenant):
+            if handler not in self.handlers:
+                self.on_invalidate(handler)
+
+    async def invalidate_local(self, tenant_id: int):
+        for handler in self.handlers:
+            try:
+                result = handler(tenant_id)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Invalidation handler {handler} failed for tenant {tenant_id}: {str(e)}")
+
+    def use_client(self, client: aioredis.Redis):
+        """Use an existing async Redis client (must decode responses)"""
+        self._client = client
+
+    def _get_client(self) -> aioredis.Redis:
+        if self._client is None:
+            self._client = aioredis.from_url(self.redis_url, decode_responses=True)
+        return self._client
+
+    async def publish(self, tenant_id: int):
+        """Invalidate this process now and every subscribed process via Redis"""
+        await self.invalidate_local(tenant_id)
+        try:
+            await self._get_client().publish(self.channel, str(tenant_id))
+        except Exception as e:
+            logger.error(f"Failed to broadcast invalidation for tenant {tenant_id}: {str(e)}")
+
+    async def _listen(self):
+        while True:
+            pubsub = self._get_client().pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                if asyncio.current_task().cancelling():
+                    # A cancel arriving mid-subscribe can be swallowed by the
+                    # client, which would leave close() waiting on listen()
+                    raise asyncio.CancelledError()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        await self.invalidate_local(int(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Tenant invalidation subscription lost: {str(e)}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def start(self):
+        """Subscribe to invalidations from other processes"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._listen())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+tenant_events = TenantInvalidator()
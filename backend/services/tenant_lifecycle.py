@@ -1,55 +1,83 @@
-from typing import Optional
-import asyncio
+from typing import Dict, Optional
+import logging
+import tempfile
 from datetime import datetime
-import boto3  # For S3 backups
+from starlette.concurrency import run_in_threadpool
+from backend.services.export_service import export_service
+from backend.services.tenant_redis import tenant_keyspace
+from backend.services.tenant_resources import tenant_resources
+from backend.services.tenant_purge import tenant_purge
+from backend.jobs.queue import job_queue
+
+logger = logging.getLogger(__name__)
 
 class TenantLifecycle:
     def __init__(self):
         self.backup_bucket = "tenant-backups"
-        self.s3 = boto3.client('s3')
+        self._s3 = None
+
+    @property
+    def s3(self):
+        """S3 client for backups; boto3 is imported on first use since it
+        dominates import time and most processes never back anything up"""
+        if self._s3 is None:
+            import boto3
+            self._s3 = boto3.client('s3')
+        return self._s3
+        
+    async def schedule_deletion(self, tenant_id: int) -> Optional[str]:
+        """Disable the tenant now and queue its purge for a worker; returns the job id"""
+        await tenant_purge.disable(tenant_id)
+        return await job_queue.enqueue(
+            "delete_tenant",
+            tenant_id=tenant_id,
+            priority="default",
+            unique_key=f"delete:{tenant_id}"
+        )
         
-    async def delete_tenant(self, tenant_id: int):
-        """Clean up all tenant resources"""
+    async def schedule_backup(self, tenant_id: int) -> Optional[str]:
+        """Queue a tenant backup for a worker; returns the job id"""
+        return await job_queue.enqueue(
+            "backup_tenant",
+            tenant_id=tenant_id,
+            priority="low",
+            unique_key=f"backup:{tenant_id}"
+        )
+        
+    async def delete_tenant(self, tenant_id: int) -> Dict[str, str]:
+        """Back up and purge all tenant resources, resuming an interrupted purge"""
         try:
-            # Get tenant info
-            with db_manager.get_db() as db:
-                tenant = db.query(Tenant).filter_by(id=tenant_id).first()
-                
-            # Backup data before deletion
-            await self.backup_tenant_data(tenant)
-            
-            # Delete resources in parallel
-            await asyncio.gather(
-                self.delete_database(tenant),
-                self.delete_redis(tenant),
-                self.delete_blob_storage(tenant)
-            )
-            
-            # Mark tenant as inactive
-            with db_manager.get_db() as db:
-                tenant.is_active = False
-                db.commit()
-                
+            return await tenant_purge.purge(tenant_id, backup=self.backup_tenant_data)
         except Exception as e:
             # Log error and potentially notify admin
             logger.error(f"Failed to delete tenant {tenant_id}: {str(e)}")
             raise
             
     async def backup_tenant_data(self, tenant) -> str:
-        """Create backup of all tenant data"""
+        """Back up all tenant data to the backup bucket; returns its key.
+
+        The record-level export holds every table a tenant owns and the file
+        metadata from its Redis namespace, so it doubles as the backup; it is
+        streamed to disk, then uploaded.
+        """
         timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
         backup_key = f"{tenant.id}/{timestamp}"
-        
-        # Backup database
-        db_backup = await self.backup_database(tenant)
-        
-        # Upload to S3
-        self.s3.upload_file(
-            db_backup,
-            self.backup_bucket,
-            f"{backup_key}/database.sql"
+        # Without it the export would skip file records and still succeed
+        redis_client = tenant_keyspace.bind(
+            tenant_resources.get_redis_connection(tenant), tenant.id, tenant.tenancy_type
         )
         
+        with tempfile.NamedTemporaryFile(suffix=".ndjson.gz") as export_file:
+            await export_service.write_export(
+                tenant.id, export_file.name, redis_client=redis_client, tenant=tenant
+            )
+            await run_in_threadpool(
+                self.s3.upload_file,
+                export_file.name,
+                self.backup_bucket,
+                f"{backup_key}/export.ndjson.gz"
+            )
+        
         return backup_key
         
     async def restore_tenant(self, tenant_id: int, backup_key: Optional[str] = None):
@@ -0,0 +1,364 @@
+from typing import Callable, Dict, List, Optional
+from dataclasses import dataclass
+from datetime import datetime, timedelta, UTC
+from types import SimpleNamespace
+import asyncio
+import logging
+import time
+
+import redis.asyncio as aioredis
+from sqlalchemy import create_engine, delete, func, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from starlette.concurrency import run_in_threadpool
+
+from backend.database import db_manager
+from backend.models.audit import AuditEvent
+from backend.models.file import FileRecord
+from backend.models.tenant import Tenant, TenancyType
+from backend.models.todo import Todo
+from backend.models.user import User
+from backend.services.audit import audit_log
+from backend.services.tenant_events import tenant_events
+from backend.services.tenant_redis import tenant_keyspace
+from backend.services.tenant_resources import tenant_resources, provision_tenant_database
+from backend.storage.registry import blob_registry
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TableSpec:
+    """How one tenant-scoped table is copied and kept in sync"""
+    model: object
+    tenant_column: object
+    # Expression that moves forward whenever a row is written; None means
+    # the rows are small reference data that is re-copied on every pass
+    changed_at: Optional[object] = None
+    # Rows can be deleted at the source (append-only tables skip the check)
+    deletes: bool = True
+
+    @property
+    def table(self):
+        return self.model.__table__
+
+
+# In foreign key order: the tenant and its users are copied as reference rows
+# so the dedicated database's todos can point at them
+TABLES = [
+    TableSpec(Tenant, Tenant.id),
+    TableSpec(User, User.tenant_id),
+    TableSpec(Todo, Todo.tenant_id, func.coalesce(Todo.updated_at, Todo.created_at)),
+    TableSpec(FileRecord, FileRecord.tenant_id, FileRecord.uploaded_at),
+    TableSpec(AuditEvent, AuditEvent.tenant_id, AuditEvent.occurred_at, deletes=False),
+]
+
+
+class TenantPromotion:
+    """Moves a shared tenant to dedicated resources while it keeps serving.
+
+    1. Provision a dedicated database (at the current schema), Redis and
+       blob storage.
+    2. Bulk-copy the tenant's rows out of the shared database, streamed
+       with COPY between PostgreSQL servers.
+    3. Copy the tenant's blobs and Redis keys.
+    4. Catch up on rows written meanwhile, using each table's write timestamp
+       as a watermark, until a pass finds few enough changes.
+    5. Deactivate the tenant for ``drain_seconds`` plus a final sync, then
+       flip ``tenancy_type`` and the connection settings in one transaction
+       and broadcast a cache invalidation so every process cuts over.
+
+    The shared rows are left in place; purge them once the tenant has run
+    on its dedicated resources for a while.
+    """
+
+    def __init__(self):
+        self.batch_size = 5000
+        self.catchup_rounds = 10
+        self.cutover_threshold = 100  # changed rows at which to stop catching up
+        self.overlap = timedelta(seconds=5)  # covers transactions committing late
+        self.drain_seconds = 2.0
+        self.blob_concurrency = 8
+
+    # Database copy (runs in a thread)
+
+    @staticmethod
+    def _db_now(engine):
+        with engine.connect() as connection:
+            now = func.clock_timestamp() if engine.dialect.name == "postgresql" else func.now()
+            return connection.execute(select(now)).scalar()
+
+    @staticmethod
+    def _upsert(connection, table, rows: List[Dict]):
+        if not rows:
+            return
+        dialect = postgresql if connection.dialect.name == "postgresql" else sqlite
+        statement = dialect.insert(table)
+        keys = [column.name for column in table.primary_key]
+        statement = statement.on_conflict_do_update(
+            index_elements=keys,
+            set_={
+                column.name: statement.excluded[column.name]
+                for column in table.columns if column.name not in keys
+            },
+        )
+        connection.execute(statement, rows)
+
+    def _clear_target(self, target, tenant_id: int):
+        """Remove rows left by an earlier, interrupted attempt"""
+        with target.begin() as connection:
+            for spec in reversed(TABLES):
+                connection.execute(delete(spec.table).where(spec.tenant_column == tenant_id))
+
+    def _copy_streaming(self, source, target, spec: TableSpec, tenant_id: int) -> int:
+        """Pipe COPY ... TO STDOUT on the source into COPY ... FROM STDIN on the target"""
+        columns = [column.name for column in spec.table.columns]
+        query = select(*spec.table.columns).where(spec.tenant_column == tenant_id).compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+        column_list = ", ".join(f'"{name}"' for name in columns)
+        with source.connect() as src, target.connect() as dst:
+            src_cursor = src.connection.cursor()
+            dst_cursor = dst.connection.cursor()
+            with src_cursor.copy(f"COPY ({query}) TO STDOUT") as copy_out, \
+                    dst_cursor.copy(f"COPY {spec.table.name} ({column_list}) FROM STDIN") as copy_in:
+                for data in copy_out:
+                    copy_in.write(data)
+            rows = dst_cursor.rowcount
+            dst.commit()
+        return rows
+
+    def _copy_batched(self, source, target, spec: TableSpec, tenant_id: int, since=None) -> int:
+        """Copy (or, with ``since``, upsert changed) rows in batches"""
+        query = select(spec.table).where(spec.tenant_column == tenant_id)
+        if since is not None and spec.changed_at is not None:
+            query = query.where(spec.changed_at >= since)
+        rows = 0
+        with source.connect() as src, target.begin() as dst:
+            result = src.execution_options(stream_results=True, yield_per=self.batch_size).execute(query)
+            for batch in result.mappings().partitions():
+                self._upsert(dst, spec.table, [dict(row) for row in batch])
+                rows += len(batch)
+        return rows
+
+    def _reconcile_deletes(self, source, target, spec: TableSpec, tenant_id: int) -> int:
+        """Delete target rows whose source row has gone; watermarks can't see deletes"""
+        key = list(spec.table.primary_key)[0]
+        with source.connect() as src:
+            live = set(src.execute(select(key).where(spec.tenant_column == tenant_id)).scalars())
+        with target.begin() as dst:
+            copied = set(dst.execute(select(key).where(spec.tenant_column == tenant_id)).scalars())
+            gone = list(copied - live)
+            for start in range(0, len(gone), 1000):
+                dst.execute(delete(spec.table).where(key.in_(gone[start:start + 1000])))
+        return len(gone)
+
+    @staticmethod
+    def _reset_sequences(target):
+        if target.dialect.name != "postgresql":
+            return
+        with target.begin() as connection:
+            for spec in TABLES:
+                key = list(spec.table.primary_key)[0]
+                if not key.autoincrement or len(spec.table.primary_key) > 1:
+                    continue
+                connection.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{spec.table.name}', '{key.name}'), "
+                    f"coalesce((SELECT max({key.name}) FROM {spec.table.name}), 1))"
+                ))
+
+    @staticmethod
+    def _create_audit_partitions(source, target, tenant_id: int):
+        """COPY into a partitioned table needs every month's partition to exist"""
+        if target.dialect.name != "postgresql":
+            return
+        with source.connect() as src:
+            months = list(src.execute(
+                select(func.date_trunc("month", AuditEvent.occurred_at))
+                .where(AuditEvent.tenant_id == tenant_id)
+                .distinct()
+            ).scalars())
+        with Session(target) as session:
+            audit_log.ensure_partitions(session, months + [datetime.now(UTC)])
+            session.commit()
+
+    def bulk_copy(self, source, target, tenant_id: int) -> Dict[str, int]:
+        self._clear_target(target, tenant_id)
+        self._create_audit_partitions(source, target, tenant_id)
+        streaming = source.dialect.name == target.dialect.name == "postgresql"
+        copied = {}
+        for spec in TABLES:
+            started = time.perf_counter()
+            if streaming:
+                copied[spec.table.name] = self._copy_streaming(source, target, spec, tenant_id)
+            else:
+                copied[spec.table.name] = self._copy_batched(source, target, spec, tenant_id)
+            logger.info(f"Copied {copied[spec.table.name]} {spec.table.name} rows for tenant "
+                        f"{tenant_id} in {time.perf_counter() - started:.1f}s")
+        self._reset_sequences(target)
+        return copied
+
+    def sync_changes(self, source, target, tenant_id: int, since, deletes: bool = False) -> int:
+        """Upsert rows written since ``since``; returns the number of changed rows"""
+        changed = 0
+        for spec in TABLES:
+            if spec.changed_at is None:
+                self._copy_batched(source, target, spec, tenant_id)
+                continue
+            changed += self._copy_batched(source, target, spec, tenant_id, since)
+            if deletes and spec.deletes:
+                changed += self._reconcile_deletes(source, target, spec, tenant_id)
+        if changed:
+            self._reset_sequences(target)
+        return changed
+
+    # Blobs and Redis
+
+    async def copy_blobs(self, source_container, target_container, tenant_id: int,
+                         refresh_pointers: bool = False) -> int:
+        """Copy the tenant's blobs that the target doesn't have yet.
+
+        Chunks and versioned manifests are immutable, so a name already in the
+        target is skipped; ``latest`` manifest pointers are rewritten with
+        ``refresh_pointers``.
+        """
+        prefix = f"{tenant_id}/"
+        existing = {blob["name"] async for blob in target_container.list_blobs(name_starts_with=prefix)}
+        names = [
+            blob["name"] async for blob in source_container.list_blobs(name_starts_with=prefix)
+            if blob["name"] not in existing
+            or (refresh_pointers and blob["name"].endswith("/latest.json"))
+        ]
+        semaphore = asyncio.Semaphore(self.blob_concurrency)
+
+        async def copy(name: str):
+            async with semaphore:
+                downloader = await source_container.get_blob_client(name).download_blob()
+                data = await downloader.readall()
+                await target_container.get_blob_client(name).upload_blob(data, overwrite=True)
+
+        await asyncio.gather(*[copy(name) for name in names])
+        return len(names)
+
+    async def copy_redis_keys(self, source_url: str, target_url: str, tenant_id: int) -> int:
+        """Copy every key in the tenant's Redis namespace, memory accounting included"""
+        source = aioredis.from_url(source_url)
+        target = aioredis.from_url(target_url)
+        copied = 0
+        try:
+            async for key in source.scan_iter(match=tenant_keyspace.pattern(tenant_id), count=500):
+                dump = await source.dump(key)
+                if dump is None:
+                    continue
+                ttl = await source.pttl(key)
+                await target.restore(key, max(ttl, 0), dump, replace=True)
+                copied += 1
+        finally:
+            await source.aclose()
+            await target.aclose()
+        return copied
+
+    # Orchestration
+
+    async def _set_active(self, tenant_id: int, is_active: bool):
+        def update():
+            with db_manager.get_db() as db:
+                db.query(Tenant).filter_by(id=tenant_id).update({"is_active": is_active})
+                db.commit()
+        await run_in_threadpool(update)
+        # Routing metadata is cached per host; make the change visible now
+        await tenant_events.publish(tenant_id)
+
+    async def promote(self, tenant_id: int, tenancy_type: TenancyType = TenancyType.DEDICATED,
+                      progress: Optional[Callable[[str, Dict], None]] = None) -> Dict:
+        """Move a shared tenant to dedicated resources; returns copy statistics"""
+        report = progress or (lambda step, details: logger.info(f"Promotion of tenant {tenant_id}: {step} {details}"))
+        started = time.perf_counter()
+
+        with db_manager.get_db() as db:
+            tenant = db.query(Tenant).filter_by(id=tenant_id).first()
+            if tenant is None:
+                raise ValueError(f"Tenant {tenant_id} not found")
+            if tenant.tenancy_type != TenancyType.SHARED:
+                raise ValueError(f"Tenant {tenant_id} is already {tenant.tenancy_type.value}")
+            if not tenant.is_active:
+                raise ValueError(f"Tenant {tenant_id} is inactive")
+            db.expunge(tenant)
+
+        resources = await tenant_resources.create_tenant_resources(tenant.name)
+        db_url = await provision_tenant_database(tenant.name)
+        report("provisioned", {"db": db_url.rsplit("/", 1)[-1]})
+
+        dedicated = SimpleNamespace(
+            id=tenant.id,
+            tenancy_type=tenancy_type,
+            redis_config=resources["redis_config"],
+            blob_storage_config=resources["blob_storage_config"],
+        )
+        source = db_manager.shared_engine
+        target = create_engine(db_url, poolclass=NullPool)
+        stats = {"rows": {}, "blobs": 0, "redis_keys": 0, "catchup": []}
+        source_container = blob_registry.get_container_client(tenant)
+        target_container = blob_registry.get_container_client(dedicated)
+        source_redis = tenant_resources.redis_url(tenant)
+        target_redis = tenant_resources.redis_url(dedicated)
+
+        try:
+            watermark = await run_in_threadpool(self._db_now, source)
+            stats["rows"] = await run_in_threadpool(self.bulk_copy, source, target, tenant_id)
+            report("copied", stats["rows"])
+
+            stats["blobs"] = await self.copy_blobs(source_container, target_container, tenant_id)
+            stats["redis_keys"] = await self.copy_redis_keys(source_redis, target_redis, tenant_id)
+            report("copied_files", {"blobs": stats["blobs"], "redis_keys": stats["redis_keys"]})
+
+            for _ in range(self.catchup_rounds):
+                pass_started = await run_in_threadpool(self._db_now, source)
+                changed = await run_in_threadpool(
+                    self.sync_changes, source, target, tenant_id, watermark - self.overlap
+                )
+                watermark = pass_started
+                stats["catchup"].append(changed)
+                report("caught_up", {"changed": changed})
+                if changed <= self.cutover_threshold:
+                    break
+
+            # Cut over: stop new requests, let in-flight ones finish, then
+            # apply the last changes, deletes included
+            await self._set_active(tenant_id, False)
+            try:
+                await asyncio.sleep(self.drain_seconds)
+                stats["final_changes"] = await run_in_threadpool(
+                    self.sync_changes, source, target, tenant_id,
+                    watermark - self.overlap - timedelta(seconds=self.drain_seconds), True
+                )
+                stats["blobs"] += await self.copy_blobs(
+                    source_container, target_container, tenant_id, refresh_pointers=True
+                )
+                await self.copy_redis_keys(source_redis, target_redis, tenant_id)
+
+                def flip():
+                    with db_manager.get_db() as db:
+                        row = db.query(Tenant).filter_by(id=tenant_id).with_for_update().one()
+                        row.tenancy_type = tenancy_type
+                        row.db_connection = db_url
+                        row.redis_config = resources["redis_config"]
+                        row.blob_storage_config = resources["blob_storage_config"]
+                        row.is_active = True
+                        db.commit()
+                await run_in_threadpool(flip)
+            except BaseException:
+                # Still on shared resources; let traffic back in
+                await self._set_active(tenant_id, True)
+                raise
+        finally:
+            target.dispose()
+
+        await tenant_events.publish(tenant_id)
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        report("promoted", {"seconds": stats["seconds"]})
+        return stats
+
+
+tenant_promotion = TenantPromotion()
@@ -0,0 +1,290 @@
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+import time
+
+import redis.asyncio as aioredis
+from sqlalchemy import delete, select, text
+from starlette.concurrency import run_in_threadpool
+
+from backend.database import db_manager
+from backend.models.audit import AuditEvent
+from backend.models.file import FileRecord
+from backend.models.tenant import Tenant, TenancyType
+from backend.models.todo import Todo
+from backend.models.user import User
+from backend.services.tenant_events import tenant_events
+from backend.services.tenant_redis import tenant_keyspace
+from backend.services.tenant_resources import tenant_resources, drop_tenant_database
+from backend.storage.registry import blob_registry
+
+logger = logging.getLogger(__name__)
+
+# Tenant-scoped tables in the shared database, children before parents.
+# Usage rollups are kept: they are billing records, not tenant data.
+PURGE_TABLES = [
+    (AuditEvent, AuditEvent.tenant_id),
+    (FileRecord, FileRecord.tenant_id),
+    (Todo, Todo.tenant_id),
+    (User, User.tenant_id),
+]
+
+# In the order they run; a resumed purge skips the ones already done
+PHASES = ("backup", "database", "redis", "blobs")
+
+REPLICATION_LAG = text(
+    "SELECT COALESCE(EXTRACT(EPOCH FROM MAX(replay_lag)), 0) FROM pg_stat_replication"
+)
+
+
+class TenantPurge:
+    """Deletes a tenant's data in small, throttled steps that can resume.
+
+    ``disable`` deactivates the tenant and broadcasts an invalidation, so it
+    stops serving on every host before anything is deleted. ``purge`` then
+    runs the phases in order:
+
+    1. backup: the caller's backup, skipped on resume once it has succeeded.
+    2. database: the tenant's shared-database rows are deleted ``batch_size``
+       at a time, each batch its own short transaction. Between batches the
+       engine waits while PostgreSQL replicas lag by more than
+       ``max_replication_lag`` seconds, and rests in proportion to how long
+       the batch took so purging uses at most ``duty_cycle`` of the time.
+       The batch size shrinks when batches run slower than
+       ``target_batch_seconds`` and grows back when they are fast. A
+       dedicated database is dropped outright.
+    3. redis: the tenant's keys are found with SCAN and removed with UNLINK
+       one page at a time, so Redis frees memory in the background.
+    4. blobs: the tenant's blobs are deleted ``blob_batch_size`` at a time,
+       up to ``blob_concurrency`` in parallel.
+
+    Progress (finished phases, rows deleted per table, the SCAN cursor, blob
+    counts) is checkpointed in a Redis hash after every batch, so a retried
+    job carries on where the last attempt stopped. The tenant row itself is
+    kept, inactive, as a tombstone.
+    """
+
+    def __init__(self):
+        # Load from environment variables in production
+        self.redis_url = "redis://localhost:6379/0"
+        self.prefix = "purge:"
+        self.batch_size = 1000
+        self.min_batch_size = 100
+        self.max_batch_size = 10000
+        self.target_batch_seconds = 0.5
+        self.duty_cycle = 0.5  # fraction of wall time spent deleting
+        self.max_replication_lag = 5.0  # seconds
+        self.lag_poll_interval = 1.0
+        self.scan_count = 500
+        self.blob_batch_size = 500
+        self.blob_concurrency = 16
+        self.checkpoint_ttl = 7 * 86400  # kept this long after a purge completes
+        self._client: Optional[aioredis.Redis] = None
+        self.stats = {"rows_deleted": 0, "redis_keys_unlinked": 0, "blobs_deleted": 0,
+                      "lag_waits": 0, "purges_completed": 0}
+
+    def use_client(self, client: aioredis.Redis):
+        """Use an existing async Redis client (must decode responses)"""
+        self._client = client
+
+    def _get_client(self) -> aioredis.Redis:
+        if self._client is None:
+            self._client = aioredis.from_url(self.redis_url, decode_responses=True)
+        return self._client
+
+    # Checkpoints
+
+    def _checkpoint_key(self, tenant_id: int) -> str:
+        return f"{self.prefix}{tenant_id}"
+
+    async def progress(self, tenant_id: int) -> Dict[str, str]:
+        """The checkpoint of a tenant's purge; empty if none was started"""
+        return await self._get_client().hgetall(self._checkpoint_key(tenant_id))
+
+    async def _save(self, tenant_id: int, **fields):
+        await self._get_client().hset(self._checkpoint_key(tenant_id), mapping=fields)
+
+    async def _advance(self, tenant_id: int, field: str, amount: int):
+        await self._get_client().hincrby(self._checkpoint_key(tenant_id), field, amount)
+
+    # Access
+
+    async def disable(self, tenant_id: int):
+        """Stop the tenant serving everywhere, before any data is touched"""
+        def deactivate():
+            with db_manager.get_db() as db:
+                db.query(Tenant).filter_by(id=tenant_id).update({"is_active": False})
+                db.commit()
+        await run_in_threadpool(deactivate)
+        await self._save(tenant_id, disabled_at=str(time.time()))
+        # Drops the shared tenant cache, login principals, engines and clients
+        await tenant_events.publish(tenant_id)
+
+    # Database
+
+    def _replication_lag(self) -> float:
+        engine = db_manager.shared_engine
+        if engine.dialect.name != "postgresql":
+            return 0.0
+        with engine.connect() as connection:
+            return float(connection.execute(REPLICATION_LAG).scalar() or 0.0)
+
+    async def _throttle(self, elapsed: float):
+        """Rest after a batch and wait out replica lag"""
+        if elapsed > self.target_batch_seconds:
+            self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+        elif elapsed < self.target_batch_seconds / 4:
+            self.batch_size = min(self.max_batch_size, self.batch_size * 2)
+        await asyncio.sleep(elapsed * (1 / self.duty_cycle - 1))
+        while await run_in_threadpool(self._replication_lag) > self.max_replication_lag:
+            self.stats["lag_waits"] += 1
+            await asyncio.sleep(self.lag_poll_interval)
+
+    def _delete_batch(self, model, tenant_column, tenant_id: int, limit: int) -> int:
+        key = list(model.__table__.primary_key)[0]
+        with db_manager.get_db() as db:
+            result = db.execute(
+                delete(model)
+                .where(key.in_(select(key).where(tenant_column == tenant_id).limit(limit)))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            return result.rowcount
+
+    async def purge_rows(self, tenant_id: int) -> int:
+        """Delete the tenant's shared-database rows in throttled batches"""
+        total = 0
+        for model, tenant_column in PURGE_TABLES:
+            table = model.__tablename__
+            while True:
+                started = time.perf_counter()
+                deleted = await run_in_threadpool(
+                    self._delete_batch, model, tenant_column, tenant_id, self.batch_size
+                )
+                elapsed = time.perf_counter() - started
+                if deleted:
+                    total += deleted
+                    self.stats["rows_deleted"] += deleted
+                    await self._advance(tenant_id, f"rows:{table}", deleted)
+                if deleted < self.batch_size:
+                    break
+                await self._throttle(elapsed)
+        return total
+
+    # Redis
+
+    def _key_patterns(self, tenant) -> List[str]:
+        if tenant.tenancy_type == TenancyType.SHARED or not tenant.redis_config:
+            return [tenant_keyspace.pattern(tenant.id)]
+        return ["*"]
+
+    async def purge_redis(self, tenant) -> int:
+        """SCAN for the tenant's keys and UNLINK them a page at a time"""
+        client = aioredis.from_url(tenant_resources.redis_url(tenant))
+        unlinked = 0
+        try:
+            checkpoint = await self.progress(tenant.id)
+            patterns = self._key_patterns(tenant)
+            start = int(checkpoint.get("redis_pattern", 0))
+            for index in range(start, len(patterns)):
+                cursor = int(checkpoint.get("redis_cursor", 0)) if index == start else 0
+                while True:
+                    cursor, keys = await client.scan(cursor, match=patterns[index], count=self.scan_count)
+                    if keys:
+                        unlinked += await client.unlink(*keys)
+                    await self._save(tenant.id, redis_pattern=index, redis_cursor=cursor)
+                    if not cursor:
+                        break
+                checkpoint = {}
+        finally:
+            await client.aclose()
+        self.stats["redis_keys_unlinked"] += unlinked
+        await self._advance(tenant.id, "redis_keys", unlinked)
+        return unlinked
+
+    # Blobs
+
+    async def purge_blobs(self, tenant) -> int:
+        """Delete the tenant's blobs in parallel batches"""
+        container = blob_registry.get_container_client(tenant)
+        semaphore = asyncio.Semaphore(self.blob_concurrency)
+
+        async def remove(name: str):
+            async with semaphore:
+                try:
+                    await container.get_blob_client(name).delete_blob()
+                except Exception as e:
+                    # Already gone after an interrupted attempt
+                    if "BlobNotFound" not in str(e) and "404" not in str(e):
+                        raise
+
+        deleted = 0
+        while True:
+            # Listing again after each batch never revisits deleted names
+            batch = []
+            async for blob in container.list_blobs(name_starts_with=f"{tenant.id}/"):
+                batch.append(blob["name"])
+                if len(batch) >= self.blob_batch_size:
+                    break
+            if not batch:
+                break
+            await asyncio.gather(*[remove(name) for name in batch])
+            deleted += len(batch)
+            self.stats["blobs_deleted"] += len(batch)
+            await self._advance(tenant.id, "blobs", len(batch))
+        return deleted
+
+    # Orchestration
+
+    async def purge(self, tenant_id: int,
+                    backup: Optional[Callable[[object], Awaitable[str]]] = None) -> Dict[str, str]:
+        """Purge a tenant, resuming from its checkpoint; returns the checkpoint"""
+        with db_manager.get_db() as db:
+            tenant = db.query(Tenant).filter_by(id=tenant_id).first()
+            if tenant is None:
+                raise ValueError(f"Tenant {tenant_id} not found")
+            db.expunge(tenant)
+
+        checkpoint = await self.progress(tenant_id)
+        if checkpoint.get("completed_at"):
+            return checkpoint
+        if tenant.is_active or "disabled_at" not in checkpoint:
+            await self.disable(tenant_id)
+
+        done = set(filter(None, checkpoint.get("phases", "").split(",")))
+        for phase in PHASES:
+            if phase in done:
+                continue
+            started = time.perf_counter()
+            if phase == "backup":
+                if backup is not None:
+                    await self._save(tenant_id, backup_key=await backup(tenant))
+            elif phase == "database":
+                await self.purge_rows(tenant_id)
+                if tenant.tenancy_type != TenancyType.SHARED and tenant.db_connection:
+                    await drop_tenant_database(tenant.db_connection)
+            elif phase == "redis":
+                await self.purge_redis(tenant)
+            elif phase == "blobs":
+                await self.purge_blobs(tenant)
+            done.add(phase)
+            await self._save(tenant_id, phases=",".join(p for p in PHASES if p in done))
+            logger.info(f"Purge of tenant {tenant_id}: {phase} done in {time.perf_counter() - started:.1f}s")
+
+        await self._save(tenant_id, completed_at=str(time.time()))
+        await self._get_client().expire(self._checkpoint_key(tenant_id), self.checkpoint_ttl)
+        self.stats["purges_completed"] += 1
+        # Processes may have cached clients or engines for the deleted resources
+        await tenant_events.publish(tenant_id)
+        return await self.progress(tenant_id)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "batch_size": self.batch_size}
+
+
+tenant_purge = TenantPurge()
@@ -0,0 +1,298 @@
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+import random
+import time
+
+from backend.models.tenant import TenancyType
+from backend.services.circuit_breaker import BackendGuard, tenant_breakers
+from backend.services.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Stores a value and accounts for its size, then evicts the tenant's least
+# recently used cache keys while the tenant is over its budget.
+# KEYS: key, sizes hash, usage counter, LRU zset
+# ARGV: op (set|sadd|rpush), value, ttl, evictable, now, budget, low water,
+#       key overhead, element overhead, max evictions
+WRITE_SCRIPT = """
+local key, sizes, usage_key, lru = KEYS[1], KEYS[2], KEYS[3], KEYS[4]
+local op, value = ARGV[1], ARGV[2]
+local budget, low_water = tonumber(ARGV[6]), tonumber(ARGV[7])
+local delta = 0
+if op == 'set' then
+    local new = string.len(key) + string.len(value) + tonumber(ARGV[8])
+    if tonumber(ARGV[3]) > 0 then
+        redis.call('SET', key, value, 'EX', ARGV[3])
+    else
+        redis.call('SET', key, value)
+    end
+    delta = new - tonumber(redis.call('HGET', sizes, key) or '0')
+    redis.call('HSET', sizes, key, new)
+else
+    local added
+    if op == 'sadd' then
+        added = redis.call('SADD', key, value)
+    else
+        redis.call('RPUSH', key, value)
+        added = 1
+    end
+    if added > 0 then
+        delta = string.len(value) + tonumber(ARGV[9])
+        if redis.call('HINCRBY', sizes, key, delta) == delta then
+            delta = delta + string.len(key) + tonumber(ARGV[8])
+            redis.call('HINCRBY', sizes, key, string.len(key) + tonumber(ARGV[8]))
+        end
+    end
+end
+if ARGV[4] == '1' then
+    redis.call('ZADD', lru, ARGV[5], key)
+end
+local usage = redis.call('INCRBY', usage_key, delta)
+local evicted = 0
+if budget > 0 and usage > budget then
+    while usage > low_water and evicted < tonumber(ARGV[10]) do
+        local oldest = redis.call('ZPOPMIN', lru)
+        if #oldest == 0 then break end
+        local size = tonumber(redis.call('HGET', sizes, oldest[1]) or '0')
+        redis.call('UNLINK', oldest[1])
+        redis.call('HDEL', sizes, oldest[1])
+        usage = redis.call('DECRBY', usage_key, size)
+        evicted = evicted + 1
+    end
+end
+return {usage, evicted}
+"""
+
+# Removes keys and their accounting. KEYS: sizes, usage, LRU, keys...
+DELETE_SCRIPT = """
+local freed, removed = 0, 0
+for i = 4, #KEYS do
+    freed = freed + tonumber(redis.call('HGET', KEYS[1], KEYS[i]) or '0')
+    removed = removed + redis.call('UNLINK', KEYS[i])
+    redis.call('HDEL', KEYS[1], KEYS[i])
+    redis.call('ZREM', KEYS[3], KEYS[i])
+end
+return {redis.call('DECRBY', KEYS[2], freed), removed}
+"""
+
+# Deletes a lock only if it is still held by the caller's token
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class TenantRedis:
+    """A tenant's view of a Redis client: every key lives in its namespace.
+
+    Keys passed in and returned are relative (``file:report.pdf``); on the
+    server they are stored as ``{tenant:42}:file:report.pdf``. The braces
+    are a cluster hash tag, so a tenant's keys share a slot and the write
+    and eviction scripts can touch them together. Only the commands below
+    are offered, so nothing can reach another tenant's keys.
+
+    Writes go through a Lua script that also records the value's size and,
+    for ``evictable`` keys, its last use. Values that cannot be rebuilt
+    (version history, the chunk index) must be written with ``evictable=False``.
+
+    Every command goes through the tenant's Redis breaker and bulkhead, and
+    is timed as a ``redis.<command>`` span of the request's trace.
+    """
+
+    def __init__(self, keyspace: "TenantKeyspace", client, tenant_id: int, budget: int,
+                 guard: BackendGuard):
+        self.keyspace = keyspace
+        self.client = client
+        self.tenant_id = tenant_id
+        self.budget = budget
+        self.guard = guard
+        self.prefix = keyspace.prefix(tenant_id)
+
+    @asynccontextmanager
+    async def _command(self, name: str):
+        """Run a command as a ``redis.<name>`` span, through the breaker"""
+        with tracer.span(f"redis.{name}", tenant_id=self.tenant_id):
+            async with self.guard:
+                yield
+
+    def key(self, name: str) -> str:
+        return f"{self.prefix}{name}"
+
+    def _strip(self, key) -> str:
+        key = key.decode() if isinstance(key, bytes) else key
+        return key[len(self.prefix):]
+
+    async def _write(self, op: str, name: str, value, ttl: int = 0, evictable: bool = True):
+        keyspace = self.keyspace
+        async with self._command(op):
+            usage, evicted = await keyspace.script("write", WRITE_SCRIPT, self.client)(
+                keys=[self.key(name), *keyspace.bookkeeping_keys(self.tenant_id)],
+                args=[op, value, ttl or 0, int(evictable), time.time(), self.budget,
+                      int(self.budget * keyspace.low_water), keyspace.key_overhead,
+                      keyspace.element_overhead, keyspace.max_evictions],
+                client=self.client,
+            )
+        keyspace.observe(self.tenant_id, int(usage), int(evicted))
+
+    async def _touch(self, names: Iterable[str]):
+        """Mark cache keys as recently used, for a sample of reads"""
+        if random.random() < self.keyspace.touch_rate:
+            now = time.time()
+            async with self._command("touch"):
+                await self.client.zadd(
+                    self.keyspace.bookkeeping_keys(self.tenant_id)[2],
+                    {self.key(name): now for name in names}, xx=True
+                )
+
+    async def get(self, name: str):
+        async with self._command("get"):
+            value = await self.client.get(self.key(name))
+        if value is not None:
+            await self._touch([name])
+        return value
+
+    async def mget(self, names: List[str]) -> List:
+        async with self._command("mget"):
+            values = await self.client.mget([self.key(name) for name in names])
+        await self._touch([name for name, value in zip(names, values) if value is not None])
+        return values
+
+    async def set(self, name: str, value, ex: Optional[int] = None, evictable: bool = True):
+        await self._write("set", name, value, ex or 0, evictable)
+
+    async def sadd(self, name: str, member, evictable: bool = True):
+        await self._write("sadd", name, member, evictable=evictable)
+
+    async def sismember(self, name: str, member) -> bool:
+        async with self._command("sismember"):
+            return bool(await self.client.sismember(self.key(name), member))
+
+    async def rpush(self, name: str, value, evictable: bool = False):
+        await self._write("rpush", name, value, evictable=evictable)
+
+    async def lrange(self, name: str, start: int, end: int) -> List:
+        async with self._command("lrange"):
+            return await self.client.lrange(self.key(name), start, end)
+
+    async def delete(self, *names: str) -> int:
+        if not names:
+            return 0
+        async with self._command("delete"):
+            usage, removed = await self.keyspace.script("delete", DELETE_SCRIPT, self.client)(
+                keys=[*self.keyspace.bookkeeping_keys(self.tenant_id), *map(self.key, names)],
+                args=[],
+                client=self.client,
+            )
+        self.keyspace.observe(self.tenant_id, int(usage), 0)
+        return int(removed)
+
+    async def scan(self, cursor: int = 0, match: str = "*", count: Optional[int] = None) -> Tuple[int, List[str]]:
+        """SCAN within the namespace; returned keys are relative"""
+        async with self._command("scan"):
+            cursor, keys = await self.client.scan(cursor, match=self.key(match), count=count)
+        return cursor, [self._strip(key) for key in keys if not self._strip(key).startswith("__")]
+
+    async def acquire(self, name: str, token: str, ttl_ms: int) -> bool:
+        """Take a short-lived lock; it is not counted against the budget"""
+        async with self._command("acquire"):
+            return bool(await self.client.set(self.key(name), token, nx=True, px=ttl_ms))
+
+    async def release(self, name: str, token: str) -> bool:
+        """Release a lock taken with ``token``, unless it expired and was retaken"""
+        async with self._command("release"):
+            return bool(await self.keyspace.script("release", RELEASE_SCRIPT, self.client)(
+                keys=[self.key(name)], args=[token], client=self.client,
+            ))
+
+    async def incr(self, name: str, amount: int = 1) -> int:
+        """Atomically add to a counter; like locks, not counted against the budget"""
+        async with self._command("incr"):
+            return int(await self.client.incrby(self.key(name), amount))
+
+    async def exists(self, name: str) -> bool:
+        async with self._command("exists"):
+            return bool(await self.client.exists(self.key(name)))
+
+    async def usage(self) -> int:
+        """Estimated bytes the tenant holds in this Redis"""
+        async with self._command("usage"):
+            value = await self.client.get(self.keyspace.bookkeeping_keys(self.tenant_id)[1])
+        return int(value or 0)
+
+
+class TenantKeyspace:
+    """Tenant-namespaced Redis access with per-tenant memory budgets.
+
+    ``bind`` wraps a Redis client in a ``TenantRedis`` for one tenant. Memory
+    is estimated incrementally from the sizes of the values written (plus a
+    fixed per-key and per-element overhead) rather than by asking Redis, and
+    is kept per tenant in the tenant's own namespace. When a write takes a
+    tenant past its tier's ``redis_mb`` quota, that tenant's least recently used
+    cache keys are evicted down to ``low_water`` of the budget in the same
+    script, so one tenant filling the shared instance only ever evicts its
+    own keys; the server itself should run with ``maxmemory-policy
+    noeviction``. Usage drifts up when keys expire by TTL and is corrected
+    as the expired keys reach the front of the LRU and are evicted.
+    """
+
+    def __init__(self):
+        self.key_overhead = 64  # bytes per key: dict entry, robj, expiry
+        self.element_overhead = 16  # bytes per set member or list entry
+        self.low_water = 0.9
+        self.max_evictions = 100  # per write, so a script never runs long
+        self.touch_rate = 0.1  # fraction of reads that refresh the LRU
+        self._scripts: Dict[str, object] = {}
+        self._usage: Dict[int, int] = {}
+        self.stats = {"evictions": 0, "over_budget_writes": 0}
+
+    @staticmethod
+    def prefix(tenant_id: int) -> str:
+        return f"{{tenant:{tenant_id}}}:"
+
+    def pattern(self, tenant_id: int) -> str:
+        """SCAN pattern matching every key of a tenant, bookkeeping included"""
+        return f"{self.prefix(tenant_id)}*"
+
+    def bookkeeping_keys(self, tenant_id: int) -> Tuple[str, str, str]:
+        """Sizes hash, usage counter and LRU zset of a tenant"""
+        prefix = self.prefix(tenant_id)
+        return f"{prefix}__sizes", f"{prefix}__usage", f"{prefix}__lru"
+
+    def script(self, name: str, source: str, client):
+        # A script object only holds the source and its SHA, so the first
+        # client's registration serves every client; each call passes its own
+        if name not in self._scripts:
+            self._scripts[name] = client.register_script(source)
+        return self._scripts[name]
+
+    def budget(self, tenancy_type: Optional[TenancyType]) -> int:
+        """Bytes a tenant of the tier may hold before its cache keys are evicted"""
+        from backend.services.resource_quotas import quotas
+
+        return int(quotas.tier_limit(tenancy_type, "redis_mb") * 1024 * 1024)
+
+    def bind(self, client, tenant_id: int,
+             tenancy_type: Optional[TenancyType] = None) -> TenantRedis:
+        """The tenant's view of ``client``, within its tier's ``redis_mb`` quota"""
+        return TenantRedis(self, client, tenant_id, self.budget(tenancy_type),
+                           tenant_breakers.guard("redis", tenant_id))
+
+    def observe(self, tenant_id: int, usage: int, evicted: int):
+        self._usage[tenant_id] = usage
+        if evicted:
+            self.stats["evictions"] += evicted
+            self.stats["over_budget_writes"] += 1
+            logger.info(f"Evicted {evicted} Redis keys of tenant {tenant_id} over its budget")
+
+    def last_usage(self, tenant_id: int) -> Optional[int]:
+        """Usage reported by this process's latest write for the tenant, if any"""
+        return self._usage.get(tenant_id)
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "tenants_tracked": len(self._usage)}
+
+
+tenant_keyspace = TenantKeyspace()
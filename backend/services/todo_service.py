@@ -1,9 +1,14 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from models.todo import Todo
-from schemas.todo import TodoCreate
+from typing import Iterator, List, Optional, Sequence
+from backend.models.todo import Todo
+from backend.schemas.todo import TodoCreate
+from backend.serialization import TODO_FIELDS
+from backend.services.collection_versions import collection_versions
+from backend.services.search import search_service
 from fastapi import HTTPException
-from config.tenant_config import config_manager
+from backend.config.tenant_config import config_manager
+from backend.database import db_manager
+from backend.models.tenant import TenancyType
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,6 +19,26 @@ class TodoService:
         """Get all todos for a tenant"""
         return db.query(Todo).filter_by(tenant_id=tenant_id).all()
     
+    @staticmethod
+    def get_todo_rows(db: Session, tenant_id: int) -> List[Sequence]:
+        """Get all todos for a tenant as plain row tuples in TODO_FIELDS order"""
+        columns = [getattr(Todo, field) for field in TODO_FIELDS]
+        return db.query(*columns).filter(Todo.tenant_id == tenant_id).order_by(Todo.id).all()
+    
+    @staticmethod
+    def iter_todo_rows(db: Session, tenant_id: int, batch_size: int = 1000) -> Iterator[Sequence]:
+        """Stream todo row tuples with a server-side cursor"""
+        columns = [getattr(Todo, field) for field in TODO_FIELDS]
+        query = (
+            db.query(*columns)
+            .filter(Todo.tenant_id == tenant_id)
+            .order_by(Todo.id)
+            .execution_options(stream_results=True)
+            .yield_per(batch_size)
+        )
+        for row in query:
+            yield tuple(row)
+    
     @staticmethod
     def get_todo(db: Session, todo_id: int, tenant_id: int) -> Optional[Todo]:
         """Get a specific todo"""
@@ -31,14 +56,16 @@ class TodoService:
         try:
             # Check quota
             current_todos = db.query(Todo).filter_by(tenant_id=tenant_id).count()
-            tenant_config = config_manager.get_tenant_config(tenant_id)
-            max_todos = tenant_config['quotas'].get('max_todos', 1000)
+            # The tier comes from the cached routing metadata, not a Tenant row
+            tenancy_type = TenancyType(db_manager.get_tenant_info(tenant_id)["tenancy_type"])
+            tenant_config = config_manager.get_tier_config(tenancy_type)
+            max_todos = tenant_config.get('quotas', {}).get('max_todos', 1000)
             
             if current_todos >= max_todos:
                 raise HTTPException(status_code=429, detail="Todo limit reached")
             
             new_todo = Todo(
-                **todo_data.dict(),
+                **todo_data.model_dump(),
                 tenant_id=tenant_id,
                 created_by=user_id
             )
@@ -46,6 +73,8 @@ class TodoService:
             db.add(new_todo)
             db.commit()
             db.refresh(new_todo)
+            collection_versions.bump(tenant_id, "todos")
+            search_service.index_todo(db, new_todo)
             
             return new_todo
             
@@ -60,11 +89,13 @@ class TodoService:
         try:
             todo = TodoService.get_todo(db, todo_id, tenant_id)
             
-            for key, value in todo_data.dict().items():
+            for key, value in todo_data.model_dump().items():
                 setattr(todo, key, value)
             
             db.commit()
             db.refresh(todo)
+            collection_versions.bump(tenant_id, "todos")
+            search_service.index_todo(db, todo)
             return todo
             
         except Exception as e:
@@ -79,6 +110,8 @@ class TodoService:
             todo = TodoService.get_todo(db, todo_id, tenant_id)
             db.delete(todo)
             db.commit()
+            collection_versions.bump(tenant_id, "todos")
+            search_service.remove_todo(db, tenant_id, todo_id)
             
         except Exception as e:
             db.rollback()
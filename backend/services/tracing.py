@@ -0,0 +1,319 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from collections import Counter
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import random
+import sys
+import threading
+import time
+import weakref
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    __slots__ = ("name", "attrs", "start", "end", "children")
+
+    def __init__(self, name: str, attrs: Optional[Dict] = None):
+        self.name = name
+        self.attrs = attrs or {}
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.children: List["Span"] = []
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "duration_ms": round(self.duration * 1000, 3),
+            **({"attrs": self.attrs} if self.attrs else {}),
+            **({"children": [c.to_dict() for c in self.children]} if self.children else {}),
+        }
+
+    def format_tree(self, indent: int = 0) -> str:
+        attrs = " ".join(f"{k}={v}" for k, v in self.attrs.items())
+        lines = [f"{'  ' * indent}{self.name} {self.duration * 1000:.2f}ms {attrs}".rstrip()]
+        for child in self.children:
+            lines.append(child.format_tree(indent + 1))
+        return "\n".join(lines)
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+# Tenant of the current request while its profiler session is active
+_profiled_tenant: ContextVar[Optional[int]] = ContextVar("profiled_tenant", default=None)
+
+
+class SamplingProfiler:
+    """Wall-clock stack sampler scoped to the asyncio tasks of selected tenants"""
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.sessions: Dict[int, Dict] = {}
+        self._task_tenants: "weakref.WeakKeyDictionary[asyncio.Task, int]" = weakref.WeakKeyDictionary()
+        self._loops: Dict[int, asyncio.AbstractEventLoop] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, tenant_id: int, duration: float = 30.0) -> Dict:
+        """Start (or restart) profiling a tenant for ``duration`` seconds"""
+        with self._lock:
+            self.sessions[tenant_id] = {
+                "started_at": time.time(),
+                "expires_at": time.time() + duration,
+                "samples": 0,
+                "stacks": Counter(),
+            }
+            if not self._thread or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="tenant-profiler", daemon=True
+                )
+                self._thread.start()
+        logger.info(f"Started profiler for tenant {tenant_id} ({duration}s)")
+        return self.status(tenant_id)
+
+    def stop(self, tenant_id: int) -> Optional[Dict]:
+        """Stop profiling a tenant and return its collected report"""
+        with self._lock:
+            session = self.sessions.pop(tenant_id, None)
+        if session:
+            logger.info(f"Stopped profiler for tenant {tenant_id}")
+            return self._report(tenant_id, session)
+        return None
+
+    def status(self, tenant_id: int, top: int = 50) -> Optional[Dict]:
+        session = self.sessions.get(tenant_id)
+        return self._report(tenant_id, session, top) if session else None
+
+    def is_active(self, tenant_id: int) -> bool:
+        session = self.sessions.get(tenant_id)
+        return bool(session) and not session.get("expired")
+
+    def register_task(self, tenant_id: int):
+        """Attribute the running task to a tenant while a session is active"""
+        if not self.is_active(tenant_id):
+            return
+        task = asyncio.current_task()
+        if task is not None:
+            self._task_tenants[task] = tenant_id
+            self._loops[threading.get_ident()] = task.get_loop()
+
+    def unregister_task(self):
+        task = asyncio.current_task()
+        if task is not None:
+            self._task_tenants.pop(task, None)
+
+    def _report(self, tenant_id: int, session: Dict, top: int = 50) -> Dict:
+        # The sampler thread keeps counting; iterate a copy taken under its lock
+        with self._lock:
+            samples = session["samples"]
+            stacks = Counter(session["stacks"])
+        return {
+            "tenant_id": tenant_id,
+            "started_at": session["started_at"],
+            "expires_at": session["expires_at"],
+            "samples": samples,
+            "interval_ms": self.interval * 1000,
+            # Collapsed "outer;...;inner count" stacks, flamegraph.pl compatible
+            "stacks": [
+                {"stack": stack, "count": count}
+                for stack, count in stacks.most_common(top)
+            ],
+        }
+
+    def _collapse(self, frame) -> str:
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            names.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def _run(self):
+        while True:
+            with self._lock:
+                now = time.time()
+                for tenant_id in [t for t, s in self.sessions.items() if s["expires_at"] < now]:
+                    logger.info(f"Profiler session for tenant {tenant_id} expired")
+                    self.sessions[tenant_id]["expired"] = True
+                if not any(not s.get("expired") for s in self.sessions.values()):
+                    self._thread = None
+                    return
+
+            frames = sys._current_frames()
+            for thread_id, loop in list(self._loops.items()):
+                task = asyncio.current_task(loop)
+                tenant_id = self._task_tenants.get(task) if task else None
+                if tenant_id is None or thread_id not in frames:
+                    continue
+                stack = self._collapse(frames[thread_id])
+                with self._lock:
+                    session = self.sessions.get(tenant_id)
+                    if session and not session.get("expired"):
+                        session["stacks"][stack] += 1
+                        session["samples"] += 1
+
+            time.sleep(self.interval)
+
+
+class Tracer:
+    def __init__(self):
+        # Load from environment variables in production
+        self.sample_rate = 0.05
+        self.slow_request_threshold = 1.0  # seconds
+        self.enabled = True
+        self.profiler = SamplingProfiler()
+        # tenant_id -> span name -> [total seconds, count]
+        self._breakdowns: Dict[int, Dict[str, List[float]]] = {}
+        self._engine_events_installed = False
+
+    def _should_sample(self, tenant_id: Optional[int]) -> bool:
+        if tenant_id is not None and self.profiler.is_active(tenant_id):
+            return True
+        return random.random() < self.sample_rate
+
+    @contextmanager
+    def trace_request(self, tenant_id: Optional[int], path: str, start: Optional[float] = None):
+        """Open the root span of a request; yields None when not sampled.
+
+        ``start`` backdates the root to work done before the tenant was
+        known, such as resolving it.
+        """
+        if start is None:
+            start = time.perf_counter()
+        if not self.enabled or not self._should_sample(tenant_id):
+            try:
+                yield None
+            finally:
+                duration = time.perf_counter() - start
+                if duration > self.slow_request_threshold:
+                    logger.warning(f"Slow request (unsampled) - tenant: {tenant_id}, "
+                                   f"path: {path}, duration: {duration:.3f}s")
+            return
+
+        root = Span("request", {"tenant_id": tenant_id, "path": path})
+        root.start = start
+        token = _current_span.set(root)
+        profiled = None
+        if tenant_id is not None and self.profiler.is_active(tenant_id):
+            self.profiler.register_task(tenant_id)
+            # Middleware runs the endpoint in a task of its own, which
+            # registers itself with its first span
+            profiled = _profiled_tenant.set(tenant_id)
+        try:
+            yield root
+        finally:
+            root.end = time.perf_counter()
+            _current_span.reset(token)
+            if profiled is not None:
+                _profiled_tenant.reset(profiled)
+            self.profiler.unregister_task()
+            self._record(tenant_id, root)
+            if root.duration > self.slow_request_threshold:
+                logger.warning(f"Slow request - tenant: {tenant_id}, path: {path}, "
+                               f"duration: {root.duration:.3f}s\n{root.format_tree()}")
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """Time a block as a child of the current span; free when not sampled"""
+        parent = _current_span.get()
+        if parent is None:
+            yield None
+            return
+
+        span = Span(name, attrs)
+        parent.children.append(span)
+        token = _current_span.set(span)
+        tenant_id = _profiled_tenant.get()
+        if tenant_id is not None:
+            self.profiler.register_task(tenant_id)
+        try:
+            yield span
+        finally:
+            span.end = time.perf_counter()
+            _current_span.reset(token)
+
+    def add_span(self, name: str, start: float, end: float, **attrs) -> Optional[Span]:
+        """Record an already timed block as a child of the current span"""
+        parent = _current_span.get()
+        if parent is None:
+            return None
+        span = Span(name, attrs)
+        span.start, span.end = start, end
+        parent.children.append(span)
+        return span
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def _record(self, tenant_id: Optional[int], root: Span):
+        """Fold a finished span tree into the per-tenant breakdown"""
+        breakdown = self._breakdowns.setdefault(tenant_id, {})
+        stack = [root]
+        while stack:
+            span = stack.pop()
+            entry = breakdown.setdefault(span.name, [0.0, 0])
+            entry[0] += span.duration
+            entry[1] += 1
+            stack.extend(span.children)
+
+    def get_breakdown(self, tenant_id: Optional[int] = None) -> Dict:
+        """Get accumulated time per span name for one or all tenants"""
+        def fmt(breakdown):
+            return {
+                name: {
+                    "count": count,
+                    "total_ms": round(total * 1000, 3),
+                    "avg_ms": round(total / count * 1000, 3),
+                }
+                for name, (total, count) in breakdown.items()
+            }
+
+        if tenant_id is not None:
+            return fmt(self._breakdowns.get(tenant_id, {}))
+        return {str(t): fmt(b) for t, b in self._breakdowns.items()}
+
+    def reset(self, tenant_id: Optional[int] = None):
+        if tenant_id is None:
+            self._breakdowns.clear()
+        else:
+            self._breakdowns.pop(tenant_id, None)
+
+    def install_engine_events(self):
+        """Time every SQL statement on every engine as a ``db.query`` span"""
+        if self._engine_events_installed:
+            return
+
+        @event.listens_for(Engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if _current_span.get() is None:
+                return
+            span = Span("db.query", {"statement": statement.split(None, 1)[0].upper()})
+            _current_span.get().children.append(span)
+            conn.info.setdefault("tracing_spans", []).append(span)
+
+        @event.listens_for(Engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            spans = conn.info.get("tracing_spans")
+            if spans:
+                spans.pop().end = time.perf_counter()
+
+        @event.listens_for(Engine, "handle_error")
+        def handle_error(context):
+            spans = context.connection.info.get("tracing_spans") if context.connection else None
+            if spans:
+                spans.pop().end = time.perf_counter()
+
+        self._engine_events_installed = True
+
+
+tracer = Tracer()
+tracer.install_engine_events()
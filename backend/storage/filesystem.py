@@ -0,0 +1,102 @@
+"""Filesystem blob storage backend.
+
+Implements the subset of the async Azure Blob Storage client API the app
+uses, on top of a local directory tree. Used for local development, tests
+and benchmarks.
+"""
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class FilesystemBlobDownloader:
+    """Minimal async counterpart of azure's StorageStreamDownloader"""
+
+    def __init__(self, path: Path, offset: int = 0, length: Optional[int] = None,
+                 chunk_size: int = 4 * 1024 * 1024):
+        self.path = path
+        self.offset = offset
+        self.size = path.stat().st_size
+        self.length = self.size - offset if length is None else min(length, self.size - offset)
+        self.chunk_size = chunk_size
+
+    async def chunks(self):
+        remaining = self.length
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            while remaining > 0:
+                data = f.read(min(self.chunk_size, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
+
+    async def readall(self) -> bytes:
+        return b"".join([chunk async for chunk in self.chunks()])
+
+
+class FilesystemBlobClient:
+    """Async blob client backed by a single file"""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    async def upload_blob(self, data, overwrite: bool = True, **kwargs):
+        if self.path.exists() and not overwrite:
+            raise FileExistsError(str(self.path))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "wb") as f:
+            if isinstance(data, (bytes, bytearray)):
+                f.write(data)
+            else:
+                shutil.copyfileobj(data, f)
+        os.replace(tmp_path, self.path)
+
+    async def download_blob(self, offset: int = 0, length: Optional[int] = None, **kwargs):
+        return FilesystemBlobDownloader(self.path, offset, length)
+
+    async def get_blob_properties(self) -> Dict:
+        stat = self.path.stat()
+        return {"size": stat.st_size, "last_modified": stat.st_mtime}
+
+    async def delete_blob(self, **kwargs):
+        self.path.unlink(missing_ok=True)
+
+
+class FilesystemContainerClient:
+    """Async container client backed by a directory"""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._prefix = os.path.join(os.path.abspath(root), "")
+
+    def get_blob_client(self, blob: str) -> FilesystemBlobClient:
+        # A blob name is not a path: one with ".." or a leading "/" must not
+        # reach files outside the container
+        path = os.path.normpath(os.path.join(self._prefix, blob))
+        if not path.startswith(self._prefix):
+            raise ValueError(f"Blob name outside the container: {blob!r}")
+        return FilesystemBlobClient(Path(path))
+
+    async def list_blobs(self, name_starts_with: Optional[str] = None):
+        if not self.root.exists():
+            return
+        for path in sorted(self.root.rglob("*")):
+            name = path.relative_to(self.root).as_posix()
+            if path.is_file() and (not name_starts_with or name.startswith(name_starts_with)):
+                yield {"name": name, "size": path.stat().st_size}
+
+
+class FilesystemBlobServiceClient:
+    """Async blob service client backed by a directory tree"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def get_container_client(self, container: str) -> FilesystemContainerClient:
+        return FilesystemContainerClient(self.root / container)
+
+    async def close(self):
+        pass
@@ -0,0 +1,224 @@
+from typing import Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import logging
+import time
+
+from backend.models.tenant import TenancyType
+
+logger = logging.getLogger(__name__)
+
+
+class BlobClientRegistry:
+    """Process-wide cache of blob service and container clients.
+
+    Every Azure client shares one pooled aiohttp session, so TLS connections
+    to the storage endpoints are reused across tenants and requests. Shared
+    tenants share a single service client; dedicated tenants get their own,
+    which are evicted after ``idle_ttl`` seconds without use or when more than
+    ``max_dedicated_clients`` are cached.
+    """
+
+    def __init__(self):
+        # Load from environment variables in production
+        self.backend = "azure"
+        self.shared_config = {
+            "connection_string": "DefaultEndpointsProtocol=https;AccountName=shared;..."
+        }
+        self.idle_ttl = 900  # seconds
+        self.max_dedicated_clients = 500
+        self.connection_limit = 200
+        self.connection_limit_per_host = 50
+
+        self._backends: Dict[str, Callable] = {
+            "azure": self._create_azure_client,
+            "filesystem": self._create_filesystem_client,
+        }
+        self._session = None
+        self._shared_client = None
+        # tenant_id -> (client, last_used)
+        self._dedicated: "OrderedDict[int, Tuple[object, float]]" = OrderedDict()
+        self._containers: Dict[Tuple[Optional[int], str], object] = {}
+        self._eviction_task: Optional[asyncio.Task] = None
+        self.stats = {
+            "clients_created": 0,
+            "client_cache_hits": 0,
+            "container_cache_hits": 0,
+            "evictions": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+        }
+
+    def register_backend(self, name: str, factory: Callable[[Dict], object]):
+        """Register a storage backend; ``factory(config)`` returns a service client"""
+        self._backends[name] = factory
+
+    def _get_session(self):
+        """Shared aiohttp session whose connector pools connections for all clients"""
+        if self._session is None or self._session.closed:
+            import aiohttp
+
+            trace_config = aiohttp.TraceConfig()
+
+            async def on_connection_create_end(session, ctx, params):
+                self.stats["connections_created"] += 1
+
+            async def on_connection_reuseconn(session, ctx, params):
+                self.stats["connections_reused"] += 1
+
+            trace_config.on_connection_create_end.append(on_connection_create_end)
+            trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.connection_limit,
+                    limit_per_host=self.connection_limit_per_host,
+                    keepalive_timeout=60,
+                ),
+                trace_configs=[trace_config],
+            )
+        return self._session
+
+    def _create_azure_client(self, config: Dict):
+        from azure.core.pipeline.transport import AioHttpTransport
+        from azure.storage.blob.aio import BlobServiceClient
+
+        transport = AioHttpTransport(session=self._get_session(), session_owner=False)
+        return BlobServiceClient.from_connection_string(
+            config["connection_string"], transport=transport
+        )
+
+    def _create_filesystem_client(self, config: Dict):
+        from backend.storage.filesystem import FilesystemBlobServiceClient
+
+        return FilesystemBlobServiceClient(config["root"])
+
+    def _create_client(self, config: Dict):
+        backend = config.get("backend", self.backend)
+        if backend not in self._backends:
+            raise ValueError(f"Unknown blob storage backend {backend}")
+        self.stats["clients_created"] += 1
+        return self._backends[backend](config)
+
+    def get_service_client(self, tenant):
+        """Get the blob service client for a tenant, creating it on first use"""
+        if tenant.tenancy_type == TenancyType.SHARED or not tenant.blob_storage_config:
+            if self._shared_client is None:
+                self._shared_client = self._create_client(self.shared_config)
+            else:
+                self.stats["client_cache_hits"] += 1
+            return self._shared_client
+
+        entry = self._dedicated.get(tenant.id)
+        if entry is None:
+            client = self._create_client(tenant.blob_storage_config)
+            self._evict_overflow()
+        else:
+            client = entry[0]
+            self.stats["client_cache_hits"] += 1
+        self._dedicated[tenant.id] = (client, time.monotonic())
+        self._dedicated.move_to_end(tenant.id)
+        return client
+
+    def get_container_client(self, tenant, container: Optional[str] = None):
+        """Get a cached container client for a tenant"""
+        config = tenant.blob_storage_config or {}
+        container = container or config.get("container_name", "primary")
+        dedicated = tenant.tenancy_type != TenancyType.SHARED and bool(config)
+        key = (tenant.id if dedicated else None, container)
+
+        service_client = self.get_service_client(tenant)
+        if key in self._containers:
+            self.stats["container_cache_hits"] += 1
+            return self._containers[key]
+
+        container_client = service_client.get_container_client(container)
+        self._containers[key] = container_client
+        return container_client
+
+    def _evict_overflow(self):
+        while len(self._dedicated) >= self.max_dedicated_clients:
+            tenant_id, _ = next(iter(self._dedicated.items()))
+            self._schedule_close(self.evict(tenant_id))
+
+    def evict(self, tenant_id: int):
+        """Drop a dedicated tenant's cached clients; returns the client to close"""
+        entry = self._dedicated.pop(tenant_id, None)
+        for key in [k for k in self._containers if k[0] == tenant_id]:
+            del self._containers[key]
+        if entry:
+            self.stats["evictions"] += 1
+            logger.info(f"Evicted blob client for tenant {tenant_id}")
+            return entry[0]
+        return None
+
+    def discard(self, tenant_id: int):
+        """Evict a tenant's clients and close them in the background"""
+        self._schedule_close(self.evict(tenant_id))
+
+    def _schedule_close(self, client):
+        if client is None or not hasattr(client, "close"):
+            return
+        try:
+            asyncio.get_running_loop().create_task(client.close())
+        except RuntimeError:
+            pass
+
+    def evict_idle(self) -> int:
+        """Evict dedicated clients unused for longer than ``idle_ttl``"""
+        cutoff = time.monotonic() - self.idle_ttl
+        idle = [tenant_id for tenant_id, (_, last_used) in self._dedicated.items() if last_used < cutoff]
+        for tenant_id in idle:
+            self._schedule_close(self.evict(tenant_id))
+        return len(idle)
+
+    async def _eviction_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.evict_idle()
+            except Exception as e:
+                logger.error(f"Blob client eviction failed: {str(e)}")
+
+    def start(self, interval: float = 60):
+        """Start the background idle-eviction loop"""
+        if self._eviction_task is None or self._eviction_task.done():
+            self._eviction_task = asyncio.get_running_loop().create_task(
+                self._eviction_loop(interval)
+            )
+
+    def get_stats(self) -> Dict:
+        """Client cache and connection reuse counters"""
+        created = self.stats["connections_created"]
+        reused = self.stats["connections_reused"]
+        return {
+            **self.stats,
+            "dedicated_clients": len(self._dedicated),
+            "container_clients": len(self._containers),
+            "connection_reuse_ratio": round(reused / (created + reused), 4) if created + reused else 0.0,
+        }
+
+    async def close(self):
+        """Close every client and the shared session on shutdown"""
+        if self._eviction_task:
+            self._eviction_task.cancel()
+            self._eviction_task = None
+
+        clients = [entry[0] for entry in self._dedicated.values()]
+        if self._shared_client is not None:
+            clients.append(self._shared_client)
+        for client in clients:
+            try:
+                await client.close()
+            except Exception as e:
+                logger.error(f"Error closing blob client: {str(e)}")
+
+        self._dedicated.clear()
+        self._containers.clear()
+        self._shared_client = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        logger.info("Closed all blob clients")
+
+
+blob_registry = BlobClientRegistry()
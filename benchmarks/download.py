@@ -0,0 +1,129 @@
+"""Download throughput benchmark against the filesystem blob stand-in.
+
+    python -m benchmarks.download --size-mb 256 --latency-ms 20 --output download.json
+
+Compares sequential streaming with parallel segment fetching in
+``DownloadService``. ``--latency-ms`` and ``--bandwidth-mb`` add a
+per-request delay and a per-connection bandwidth cap to the stand-in to
+approximate a remote blob store, which is where parallel ranges pay off.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from backend.services.downloads import DownloadService
+from backend.storage.filesystem import FilesystemBlobServiceClient
+
+
+class ThrottledDownloader:
+    """Paces chunks to a per-connection bandwidth cap"""
+
+    def __init__(self, inner, bandwidth: float):
+        self.inner = inner
+        self.bandwidth = bandwidth
+
+    async def chunks(self):
+        async for chunk in self.inner.chunks():
+            if self.bandwidth:
+                await asyncio.sleep(len(chunk) / self.bandwidth)
+            yield chunk
+
+    async def readall(self) -> bytes:
+        return b"".join([chunk async for chunk in self.chunks()])
+
+
+class LatencyBlobClient:
+    """Wraps a stand-in blob client with per-request latency and per-connection bandwidth"""
+
+    def __init__(self, inner, latency: float, bandwidth: float = 0):
+        self.inner = inner
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.requests = 0
+
+    async def download_blob(self, offset: int = 0, length=None, **kwargs):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        downloader = await self.inner.download_blob(offset=offset, length=length, **kwargs)
+        return ThrottledDownloader(downloader, self.bandwidth)
+
+    async def get_blob_properties(self):
+        return await self.inner.get_blob_properties()
+
+
+async def measure(service: DownloadService, blob_client, size: int, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        received = 0
+        start = time.perf_counter()
+        async for chunk in service.stream(blob_client, 0, size):
+            received += len(chunk)
+        timings.append(time.perf_counter() - start)
+        assert received == size, f"received {received} of {size} bytes"
+    best = min(timings)
+    return {
+        "best_s": round(best, 4),
+        "mean_s": round(sum(timings) / len(timings), 4),
+        "throughput_mb_s": round(size / best / (1024 * 1024), 2),
+        "requests": blob_client.requests // repeat,
+    }
+
+
+async def run(args) -> dict:
+    root = args.data_dir or tempfile.mkdtemp(prefix="download-bench-")
+    size = args.size_mb * 1024 * 1024
+    service_client = FilesystemBlobServiceClient(root)
+    blob = service_client.get_container_client("primary").get_blob_client("bench.bin")
+    source = os.path.join(root, "bench.bin.src")
+    with open(source, "wb") as f:
+        f.write(os.urandom(1024 * 1024) * args.size_mb)
+    with open(source, "rb") as f:
+        await blob.upload_blob(f)
+    os.remove(source)
+
+    results = {
+        "size_mb": args.size_mb,
+        "latency_ms": args.latency_ms,
+        "bandwidth_mb_s": args.bandwidth_mb,
+        "runs": {},
+    }
+    for concurrency in [1] + args.concurrency:
+        service = DownloadService()
+        service.segment_size = args.segment_mb * 1024 * 1024
+        service.max_concurrency = concurrency
+        service.parallel_threshold = 0 if concurrency > 1 else size + 1
+        client = LatencyBlobClient(
+            blob, args.latency_ms / 1000, args.bandwidth_mb * 1024 * 1024
+        )
+        label = "sequential" if concurrency == 1 else f"parallel_{concurrency}"
+        results["runs"][label] = await measure(service, client, size, args.repeat)
+        print(f"{label:<14}{results['runs'][label]['throughput_mb_s']:>10} MB/s")
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=128)
+    parser.add_argument("--segment-mb", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=10.0)
+    parser.add_argument("--bandwidth-mb", type=float, default=100.0,
+                        help="per-connection MB/s; 0 disables the cap")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--data-dir", default=None)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""Builds the FastAPI app from ``backend.main.create_app`` against local stand-ins."""
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, Request
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from backend.base import Base
+from backend.database import db_manager
+from backend.jobs.queue import job_queue
+from backend.main import create_app
+from backend.models.tenant import Tenant, TenancyType
+from backend.models.audit import AuditEvent  # noqa: F401 - registers the table
+from backend.models.file import FileRecord  # noqa: F401 - registers the table
+from backend.models.todo import Todo  # noqa: F401 - registers the table
+from backend.models.usage import UsageDay  # noqa: F401 - registers the tables
+from backend.models.user import User, UserRole
+from backend.security.auth import get_current_user
+from backend.security.tenant_security import security
+from backend.services.collection_versions import collection_versions
+from backend.services.google_tokens import google_verifier
+from backend.services.health import health_checker
+from backend.services.otp import otp_service
+from backend.services.pool_tuner import pool_tuner
+from backend.services.resource_quotas import quotas
+from backend.services.tenant_events import tenant_events
+from backend.services.tenant_purge import tenant_purge
+from backend.services.tenant_resources import tenant_resources
+from backend.storage.registry import blob_registry
+from benchmarks.standins import StandinJWKS, StandinRedis
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BenchTenant:
+    id: int
+    name: str
+    tenancy_type: TenancyType
+    user_id: int
+    email: str
+    api_token: str
+    blob_storage_config: Optional[Dict] = None
+
+
+@dataclass
+class BenchEnvironment:
+    app: object
+    tenants: List[BenchTenant] = field(default_factory=list)
+    redis: Optional[StandinRedis] = None
+
+
+def _configure_shared_db(db_url: str):
+    """Point the global DatabaseManager at the benchmark database"""
+    if db_url.startswith("sqlite"):
+        kwargs = {"connect_args": {"check_same_thread": False}}
+        if db_url in ("sqlite://", "sqlite:///:memory:"):
+            kwargs["poolclass"] = StaticPool
+        engine = create_engine(db_url, **kwargs)
+    else:
+        engine = create_engine(db_url, pool_size=10, max_overflow=20, pool_pre_ping=True)
+
+    db_manager.shared_db_url = db_url
+    db_manager.use_shared_engine(engine)
+    Base.metadata.create_all(engine)
+
+
+def _seed_tenants(counts: Dict[TenancyType, int], tenant_db_template: str,
+                  data_dir: str) -> List[BenchTenant]:
+    """Create tenants, one user each, and dedicated databases where needed"""
+    tenants = []
+    with db_manager.get_db() as db:
+        for tenancy_type, count in counts.items():
+            for i in range(count):
+                name = f"bench_{tenancy_type.value}_{i}"
+                tenant = Tenant(name=name, tenancy_type=tenancy_type, is_active=True)
+                db.add(tenant)
+                db.flush()
+
+                if tenancy_type != TenancyType.SHARED:
+                    tenant.db_connection = tenant_db_template.format(
+                        dir=data_dir, tenant_id=tenant.id
+                    )
+                    tenant.blob_storage_config = {
+                        "backend": "filesystem",
+                        "root": os.path.join(data_dir, "blobs", str(tenant.id)),
+                    }
+                    Base.metadata.create_all(create_engine(tenant.db_connection))
+
+                user = User(
+                    email=f"user@{name}.example.com",
+                    first_name="Bench",
+                    last_name=str(i),
+                    tenant_id=tenant.id,
+                    role=UserRole.OWNER,
+                    auth_type="otp",
+                )
+                db.add(user)
+                db.flush()
+
+                tenants.append(BenchTenant(
+                    id=tenant.id,
+                    name=name,
+                    tenancy_type=tenancy_type,
+                    user_id=user.id,
+                    email=user.email,
+                    api_token=security.generate_tenant_token(
+                        tenant.id, ["file:write", "file:read"]
+                    ),
+                    blob_storage_config=tenant.blob_storage_config,
+                ))
+        db.commit()
+    return tenants
+
+
+def build_environment(counts: Dict[TenancyType, int], data_dir: str,
+                      db_url: str = "sqlite://",
+                      tenant_db_template: str = "sqlite:///{dir}/tenant_{tenant_id}.db"
+                      ) -> BenchEnvironment:
+    """Create the app with stand-in backends and seeded tenants"""
+    os.makedirs(data_dir, exist_ok=True)
+    _configure_shared_db(db_url)
+    tenants = _seed_tenants(counts, tenant_db_template, data_dir)
+    by_id = {t.id: t for t in tenants}
+    # Ids restart with every fresh database, so drop whatever an earlier
+    # environment in this process cached under them (routing, engines, ...)
+    tenant_events.install_default_handlers()
+    for tenant in tenants:
+        for handler in tenant_events.handlers:
+            handler(tenant.id)
+
+    redis_standin = StandinRedis()
+    tenant_events.use_client(redis_standin.get_client(None, False))
+    pool_tuner.use_client(redis_standin.get_client(None, False))
+    otp_service.use_client(redis_standin.get_client(None, False))
+    # Each tenant has one user who logs in over and over; the per-email and
+    # per-tenant limits would turn most logins into 429s
+    otp_service.sends_per_email = otp_service.sends_per_tenant = 10 ** 9
+    otp_service.attempts_per_email = otp_service.attempts_per_tenant = 10 ** 9
+    # Likewise the per-minute API call quota; it is still checked
+    quotas.default_limits["api_calls_per_minute"] = 10 ** 9
+    tenant_purge.use_client(redis_standin.get_client(None, False))
+    collection_versions.use_client(redis_standin.get_client(None, False))
+    job_queue.use_client(redis_standin.get_client(None, False))
+    health_checker.use_redis(lambda tenant: redis_standin.get_client(
+        tenant.id if tenant else None, bool(tenant and tenant.tenancy_type != TenancyType.SHARED)
+    ))
+    # The app's own tenant context middleware serves the requests, with
+    # these clients in place of Redis servers
+    tenant_resources.use_redis(lambda tenant: redis_standin.get_client(
+        tenant.id, tenant.tenancy_type != TenancyType.SHARED
+    ))
+    google_verifier.use_fetcher(StandinJWKS(google_verifier.client_id).fetch)
+    blob_registry.backend = "filesystem"
+    blob_registry.shared_config = {"root": os.path.join(data_dir, "blobs", "shared")}
+
+    app = create_app()
+
+    async def bench_current_user(request: Request):
+        """Stand-in for the bearer token: the tenant's user, by its API key"""
+        tenant = by_id.get(request.state.tenant_id)
+        if tenant is None:
+            raise HTTPException(status_code=401, detail="Could not validate credentials")
+        return User(id=tenant.user_id, email=tenant.email, tenant_id=tenant.id)
+
+    app.dependency_overrides[get_current_user] = bench_current_user
+
+    return BenchEnvironment(app=app, tenants=tenants, redis=redis_standin)
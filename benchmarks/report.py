@@ -0,0 +1,163 @@
+"""Summaries, baseline files and run-to-run comparison for benchmark results."""
+import json
+import math
+import platform
+from collections import defaultdict
+from datetime import UTC, datetime
+from typing import Dict, Iterable, List, Optional
+
+BASELINE_VERSION = 1
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, math.ceil(pct / 100 * len(values)) - 1))
+    return values[rank]
+
+
+def latency_summary(latencies: Iterable[float]) -> Dict:
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+def jain_index(values: List[float]) -> float:
+    """Jain's fairness index: 1.0 when all tenants are treated equally, 1/n at worst"""
+    if not values or not any(values):
+        return 1.0
+    return sum(values) ** 2 / (len(values) * sum(v * v for v in values))
+
+
+def summarize(samples, wall_time: float, config: Dict) -> Dict:
+    """Build the machine-readable result document for a run"""
+    by_operation = defaultdict(list)
+    by_tenant = defaultdict(list)
+    by_tier = defaultdict(list)
+    errors = defaultdict(int)
+
+    for sample in samples:
+        by_operation[sample.operation].append(sample.latency)
+        by_tenant[sample.tenant_id].append(sample)
+        by_tier[sample.tenancy_type].append(sample.latency)
+        if not 200 <= sample.status < 400:
+            errors[sample.operation] += 1
+
+    tenants = {}
+    for tenant_id, tenant_samples in sorted(by_tenant.items()):
+        tenants[str(tenant_id)] = {
+            "tenancy_type": tenant_samples[0].tenancy_type,
+            "throughput_rps": round(len(tenant_samples) / wall_time, 3),
+            **latency_summary(s.latency for s in tenant_samples),
+        }
+
+    # Every tenant gets the same offered load, so fairness is judged on the
+    # service each one actually received: completed rate and inverse latency.
+    throughput = [t["throughput_rps"] for t in tenants.values()]
+    inverse_p95 = [1 / t["p95_ms"] for t in tenants.values() if t["p95_ms"]]
+    p95s = [t["p95_ms"] for t in tenants.values()]
+
+    return {
+        "version": BASELINE_VERSION,
+        "created_at": datetime.now(UTC).isoformat(),
+        "host": {"python": platform.python_version(), "machine": platform.machine()},
+        "config": config,
+        "summary": {
+            "requests": len(samples),
+            "errors": sum(errors.values()),
+            "wall_time_s": round(wall_time, 3),
+            "throughput_rps": round(len(samples) / wall_time, 3) if wall_time else 0.0,
+            **latency_summary(s.latency for s in samples),
+        },
+        "operations": {
+            op: {**latency_summary(lat), "errors": errors.get(op, 0)}
+            for op, lat in sorted(by_operation.items())
+        },
+        "tiers": {tier: latency_summary(lat) for tier, lat in sorted(by_tier.items())},
+        "tenants": tenants,
+        "fairness": {
+            "throughput_jain": round(jain_index(throughput), 4),
+            "latency_jain": round(jain_index(inverse_p95), 4),
+            "p95_spread": round(max(p95s) / min(p95s), 3) if p95s and min(p95s) else 0.0,
+        },
+    }
+
+
+def write_baseline(result: Dict, path: str):
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path: str) -> Dict:
+    with open(path) as f:
+        result = json.load(f)
+    if result.get("version") != BASELINE_VERSION:
+        raise ValueError(f"Unsupported baseline version in {path}: {result.get('version')}")
+    return result
+
+
+def error_rate(stats: Dict) -> float:
+    """Share of failed requests in a summary or operation entry"""
+    return stats["errors"] / stats["count"] if stats["count"] else 0.0
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float = 0.10) -> List[str]:
+    """Return human-readable regressions of ``current`` against ``baseline``"""
+    regressions = []
+
+    # Failed requests are often fast ones, so more of them is a regression
+    # however the latencies moved
+    def check_errors(label: str, new: Dict, old: Dict):
+        if error_rate(new) > error_rate(old):
+            regressions.append(
+                f"{label}: {old['errors']}/{old['count']} -> {new['errors']}/{new['count']} failed"
+            )
+
+    check_errors("errors", current["summary"], baseline["summary"])
+
+    def check(label: str, new: float, old: float, higher_is_better: bool = False):
+        if not old:
+            return
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        if worse > tolerance:
+            regressions.append(f"{label}: {old} -> {new} ({change:+.1%})")
+
+    check("throughput_rps", current["summary"]["throughput_rps"],
+          baseline["summary"]["throughput_rps"], higher_is_better=True)
+    for key in ("p50_ms", "p95_ms", "p99_ms"):
+        check(key, current["summary"][key], baseline["summary"][key])
+
+    for op, stats in current["operations"].items():
+        old: Optional[Dict] = baseline["operations"].get(op)
+        if old:
+            check(f"{op}.p95_ms", stats["p95_ms"], old["p95_ms"])
+            check_errors(f"{op}.errors", stats, old)
+        elif stats["errors"]:
+            check_errors(f"{op}.errors", stats, {"errors": 0, "count": 0})
+
+    check("fairness.throughput_jain", current["fairness"]["throughput_jain"],
+          baseline["fairness"]["throughput_jain"], higher_is_better=True)
+    return regressions
+
+
+def format_table(result: Dict) -> str:
+    lines = [
+        f"{'operation':<14}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    ]
+    rows = list(result["operations"].items()) + [("ALL", {**result["summary"]})]
+    for name, stats in rows:
+        lines.append(
+            f"{name:<14}{stats['count']:>8}{stats['errors']:>8}"
+            f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}"
+        )
+    lines.append(f"throughput: {result['summary']['throughput_rps']} req/s, "
+                 f"fairness (Jain): {result['fairness']['throughput_jain']}")
+    return "\n".join(lines)
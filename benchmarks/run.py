@@ -0,0 +1,111 @@
+"""Run the multi-tenant API benchmark.
+
+    python -m benchmarks.run --shared 20 --dedicated 4 --enterprise 1 \\
+        --concurrency 32 --duration 30 --output benchmarks/baseline.json
+
+    python -m benchmarks.run --compare benchmarks/baseline.json
+
+The result document (see ``benchmarks.report.summarize``) is written as JSON so
+runs on the same machine can be diffed; ``--compare`` exits non-zero when
+throughput, latency percentiles or fairness regress beyond ``--tolerance``, or
+when more requests fail than in the baseline. A run whose error rate exceeds
+``--max-error-rate`` (none by default) fails outright and writes no baseline,
+since the latencies of failed requests say nothing about the API.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import tempfile
+
+from backend.models.tenant import TenancyType
+from benchmarks import report
+from benchmarks.harness import build_environment
+from benchmarks.workload import DEFAULT_MIX, Workload
+
+
+def parse_mix(value: str):
+    """Parse ``op=weight,op=weight`` into a mix dict"""
+    mix = {}
+    for part in value.split(","):
+        op, _, weight = part.partition("=")
+        if op not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown operation {op!r}")
+        mix[op] = int(weight)
+    return mix
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shared", type=int, default=20)
+    parser.add_argument("--dedicated", type=int, default=4)
+    parser.add_argument("--enterprise", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="e.g. login=1,list_todos=6,create_todo=2,upload=1")
+    parser.add_argument("--upload-size", type=int, default=64 * 1024)
+    parser.add_argument("--db-url", default="sqlite://",
+                        help="shared database; a local Postgres URL also works")
+    parser.add_argument("--tenant-db-template",
+                        default="sqlite:///{dir}/tenant_{tenant_id}.db")
+    parser.add_argument("--data-dir", default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the result document here")
+    parser.add_argument("--compare", help="baseline file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    parser.add_argument("--max-error-rate", type=float, default=0.0,
+                        help="fraction of requests allowed to fail")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="tenant-bench-")
+
+    counts = {
+        TenancyType.SHARED: args.shared,
+        TenancyType.DEDICATED: args.dedicated,
+        TenancyType.ENTERPRISE: args.enterprise,
+    }
+    env = build_environment(counts, data_dir, args.db_url, args.tenant_db_template)
+    workload = Workload(env, args.mix, args.upload_size, args.seed)
+    samples, wall_time = asyncio.run(
+        workload.run(args.concurrency, args.duration, warmup=args.warmup)
+    )
+
+    config = {
+        "tenants": {t.value: n for t, n in counts.items()},
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "mix": args.mix,
+        "upload_size": args.upload_size,
+        "db": args.db_url.split(":", 1)[0],
+        "seed": args.seed,
+    }
+    result = report.summarize(samples, wall_time, config)
+    print(report.format_table(result))
+
+    failed = [
+        f"{op}: {stats['errors']}/{stats['count']} failed"
+        for op, stats in result["operations"].items()
+        if report.error_rate(stats) > args.max_error_rate
+    ]
+    if report.error_rate(result["summary"]) > args.max_error_rate:
+        for line in failed:
+            print(f"ERRORS {line}")
+        return 1
+
+    if args.output:
+        report.write_baseline(result, args.output)
+
+    if args.compare:
+        regressions = report.compare(result, report.load_baseline(args.compare), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""Local stand-ins for the external backends used by the API.
+
+The benchmark harness swaps these in for Postgres and Redis so that a full
+request path can be exercised on a laptop or CI box; blob storage uses the
+filesystem backend from ``backend.storage``. ``StandinJWKS`` plays Google's
+certs endpoint for ID-token verification.
+"""
+from typing import Dict, Optional
+import time
+import uuid
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fakeredis import FakeServer
+from fakeredis import aioredis as fake_aioredis
+from jose import jwk, jwt
+
+
+class StandinRedis:
+    """Hands out fakeredis clients, one server for shared tenants and one per dedicated tenant"""
+
+    def __init__(self):
+        self.shared_server = FakeServer()
+        self.tenant_servers: Dict[int, FakeServer] = {}
+
+    def get_client(self, tenant_id: int, dedicated: bool):
+        if not dedicated:
+            return fake_aioredis.FakeRedis(server=self.shared_server, decode_responses=True)
+
+        if tenant_id not in self.tenant_servers:
+            self.tenant_servers[tenant_id] = FakeServer()
+        return fake_aioredis.FakeRedis(
+            server=self.tenant_servers[tenant_id], decode_responses=True
+        )
+
+
+class StandinJWKS:
+    """Signs ID tokens and serves the matching JWKS, with key rotation.
+
+    Pass ``fetch`` to ``GoogleTokenVerifier.use_fetcher``; ``fetches``
+    counts how often the verifier actually asked for the keys.
+    """
+
+    def __init__(self, client_id: str, max_age: int = 3600,
+                 issuer: str = "https://accounts.google.com"):
+        self.client_id = client_id
+        self.max_age = max_age
+        self.issuer = issuer
+        self.keys: Dict[str, bytes] = {}
+        self.fetches = 0
+        self.rotate()
+
+    def rotate(self, keep_previous: bool = True) -> str:
+        """Publish a new signing key; returns its kid"""
+        private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.kid = uuid.uuid4().hex
+        pem = private.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+        self.keys = {**self.keys, self.kid: pem} if keep_previous else {self.kid: pem}
+        return self.kid
+
+    def issue(self, email: str, lifetime: int = 3600, kid: Optional[str] = None, **claims) -> str:
+        kid = kid or self.kid
+        now = int(time.time())
+        return jwt.encode(
+            {"iss": self.issuer, "aud": self.client_id, "sub": uuid.uuid4().hex,
+             "email": email, "email_verified": True, "iat": now, "exp": now + lifetime, **claims},
+            self.keys[kid], algorithm="RS256", headers={"kid": kid},
+        )
+
+    async def fetch(self, url: str):
+        self.fetches += 1
+        keys = []
+        for kid, pem in self.keys.items():
+            public = jwk.construct(pem, "RS256").public_key().to_dict()
+            keys.append({**public, "kid": kid, "alg": "RS256", "use": "sig"})
+        return 200, {"Cache-Control": f"public, max-age={self.max_age}"}, {"keys": keys}
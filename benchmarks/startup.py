@@ -0,0 +1,115 @@
+"""Process startup (import time) benchmark.
+
+    python -m benchmarks.startup --runs 10 --output startup.json
+    python -m benchmarks.startup --module backend.cli.worker --top 30
+
+Imports ``--module`` in fresh interpreters, the way an autoscaled API or
+worker process starts, and reports the wall time distribution. One extra
+run under ``-X importtime`` attributes the cost to top-level packages and
+lists the slowest modules, and the modules that are expected to load
+lazily (cloud SDKs, DB drivers) are checked for having been imported
+anyway.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+from benchmarks.report import latency_summary
+
+# Imported on first use only; their presence after startup is a regression
+LAZY_MODULES = ["boto3", "botocore", "google.auth", "google.oauth2", "azure", "psycopg2", "psycopg"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+lazy = {lazy!r}
+print(json.dumps([elapsed, [name for name in lazy if name in sys.modules]]))
+"""
+
+
+def _run(module: str, importtime: bool = False):
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", PROBE.format(module=module, lazy=LAZY_MODULES)]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr}")
+    elapsed, loaded = json.loads(completed.stdout.strip().splitlines()[-1])
+    return elapsed, loaded, completed.stderr
+
+
+def parse_importtime(stderr: str):
+    """(module, self_us, cumulative_us, depth) rows from ``-X importtime`` output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def run(args) -> dict:
+    # The first import compiles bytecode; keep it out of the measurement
+    _run(args.module)
+    timings, loaded = [], []
+    for _ in range(args.runs):
+        elapsed, loaded, _ = _run(args.module)
+        timings.append(elapsed)
+
+    _, _, stderr = _run(args.module, importtime=True)
+    rows = parse_importtime(stderr)
+    packages = {}
+    for name, self_us, _, _ in rows:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+
+    return {
+        "module": args.module,
+        "runs": args.runs,
+        "import": latency_summary(timings),
+        "lazy_modules_loaded": loaded,
+        "packages_ms": {
+            name: round(us / 1000, 1)
+            for name, us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]
+        },
+        "slowest_modules_ms": [
+            {"module": name, "self_ms": round(self_us / 1000, 1), "cumulative_ms": round(cum_us / 1000, 1)}
+            for name, self_us, cum_us, _ in sorted(rows, key=lambda row: -row[1])[:args.top]
+        ],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process startup (import time) benchmark")
+    parser.add_argument("--module", default="backend.main")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15, help="Packages and modules to list")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    summary = result["import"]
+    print(f"import {result['module']}: p50 {summary['p50_ms']} ms, "
+          f"p95 {summary['p95_ms']} ms over {result['runs']} runs")
+    if result["lazy_modules_loaded"]:
+        print(f"WARNING: loaded at import: {', '.join(result['lazy_modules_loaded'])}")
+    print(f"{'package':<32} {'self ms':>9}")
+    for name, ms in result["packages_ms"].items():
+        print(f"{name:<32} {ms:>9}")
+    print(f"{'module':<48} {'self ms':>9} {'cum ms':>9}")
+    for row in result["slowest_modules_ms"]:
+        print(f"{row['module']:<48} {row['self_ms']:>9} {row['cumulative_ms']:>9}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
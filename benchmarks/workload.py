@@ -0,0 +1,112 @@
+"""Mixed request workloads driven against the in-process ASGI app."""
+import asyncio
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+
+import httpx
+
+from backend.services.otp import otp_service
+from benchmarks.harness import BenchEnvironment, BenchTenant
+
+# Relative weights of each operation in the default mix
+DEFAULT_MIX = {
+    "login": 1,
+    "list_todos": 6,
+    "create_todo": 2,
+    "upload": 1,
+}
+
+
+@dataclass
+class Sample:
+    operation: str
+    tenant_id: int
+    tenancy_type: str
+    status: int
+    latency: float
+
+
+class Workload:
+    def __init__(self, env: BenchEnvironment, mix: Dict[str, int] = None,
+                 upload_size: int = 64 * 1024, seed: int = 0):
+        self.env = env
+        self.mix = mix or DEFAULT_MIX
+        self.upload_payload = os.urandom(upload_size)
+        self.random = random.Random(seed)
+        self._operations = list(self.mix)
+        self._weights = [self.mix[op] for op in self._operations]
+        self._logins: Dict[str, asyncio.Lock] = {}
+
+    async def login(self, client: httpx.AsyncClient, tenant: BenchTenant) -> httpx.Response:
+        # Issued in-process, as /auth/otp/send would, since the code only
+        # leaves the API by email. A new code replaces the last one, so two
+        # users logging in as the same email take turns
+        async with self._logins.setdefault(tenant.email, asyncio.Lock()):
+            code = await otp_service.issue(
+                tenant.email, tenant.user_id, tenant.id, tenant.tenancy_type.value
+            )
+            return await client.post(
+                "/api/auth/otp/verify", params={"email": tenant.email, "otp": code}
+            )
+
+    async def list_todos(self, client: httpx.AsyncClient, tenant: BenchTenant) -> httpx.Response:
+        return await client.get("/api/todos", headers={"X-API-Key": tenant.api_token})
+
+    async def create_todo(self, client: httpx.AsyncClient, tenant: BenchTenant) -> httpx.Response:
+        return await client.post(
+            "/api/todos",
+            headers={"X-API-Key": tenant.api_token},
+            json={"title": f"bench {self.random.random():.6f}", "description": "load test"},
+        )
+
+    async def upload(self, client: httpx.AsyncClient, tenant: BenchTenant) -> httpx.Response:
+        name = f"bench-{self.random.randrange(16)}.bin"
+        return await client.post(
+            "/api/upload",
+            headers={"X-API-Key": tenant.api_token},
+            files={"file": (name, self.upload_payload, "application/octet-stream")},
+        )
+
+    async def _user(self, client: httpx.AsyncClient, deadline: float,
+                    max_requests: int, samples: List[Sample]):
+        """One virtual user issuing requests back to back"""
+        while time.perf_counter() < deadline and len(samples) < max_requests:
+            tenant = self.random.choice(self.env.tenants)
+            operation = self.random.choices(self._operations, self._weights)[0]
+
+            start = time.perf_counter()
+            try:
+                response = await getattr(self, operation)(client, tenant)
+                status = response.status_code
+            except Exception:
+                status = 0
+            samples.append(Sample(
+                operation=operation,
+                tenant_id=tenant.id,
+                tenancy_type=tenant.tenancy_type.value,
+                status=status,
+                latency=time.perf_counter() - start,
+            ))
+
+    async def run(self, concurrency: int, duration: float,
+                  max_requests: int = 10 ** 9, warmup: float = 1.0):
+        """Run the mix with ``concurrency`` virtual users; returns (samples, wall time)"""
+        transport = httpx.ASGITransport(app=self.env.app)
+        async with self.env.app.router.lifespan_context(self.env.app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                if warmup > 0:
+                    await asyncio.gather(*[
+                        self._user(client, time.perf_counter() + warmup, max_requests, [])
+                        for _ in range(concurrency)
+                    ])
+
+                samples: List[Sample] = []
+                start = time.perf_counter()
+                await asyncio.gather(*[
+                    self._user(client, start + duration, max_requests, samples)
+                    for _ in range(concurrency)
+                ])
+                return samples, time.perf_counter() - start
@@ -0,0 +1,46 @@
+"""Fixtures running the real app against the benchmark harness stand-ins
+(in-memory SQLite, fakeredis, filesystem blobs)."""
+import asyncio
+
+import httpx
+import pytest
+
+from backend.models.tenant import TenancyType
+from benchmarks.harness import build_environment
+
+
+@pytest.fixture
+def env(tmp_path):
+    """Two shared tenants and one dedicated tenant, on fresh backends"""
+    return build_environment(
+        {TenancyType.SHARED: 2, TenancyType.DEDICATED: 1}, str(tmp_path)
+    )
+
+
+@pytest.fixture
+def run(env):
+    """Run ``scenario(client)`` inside the app's lifespan; returns its result"""
+    def run(scenario):
+        async def main():
+            async with env.app.router.lifespan_context(env.app):
+                transport = httpx.ASGITransport(app=env.app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    # A failure still runs the shutdown, so no service keeps
+                    # state bound to this loop into the next test
+                    try:
+                        return await scenario(client), None
+                    except Exception as e:
+                        return None, e
+        result, error = asyncio.run(main())
+        if error is not None:
+            raise error
+        return result
+    return run
+
+
+@pytest.fixture
+def headers():
+    """Request headers authenticating as a harness tenant"""
+    def headers(tenant, **extra):
+        return {"X-API-Key": tenant.api_token, **extra}
+    return headers
@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import pytest
+from fakeredis import aioredis as fake_aioredis
+
+from backend.services.google_tokens import google_verifier
+from backend.services.otp import OTPService, OTPThrottled
+from benchmarks.standins import StandinJWKS
+from benchmarks.workload import Workload
+
+
+def test_benchmark_login_verifies_an_issued_code(env, run):
+    workload = Workload(env)
+    tenant = env.tenants[-1]
+
+    async def scenario(client):
+        response = await workload.login(client, tenant)
+        assert response.status_code == 200
+        assert response.json()["access_token"]
+
+        # The code was redeemed, and a guessed one is refused
+        for otp in ("000000", "123456"):
+            again = await client.post("/api/auth/otp/verify",
+                                      params={"email": tenant.email, "otp": otp})
+            assert again.status_code == 401
+    run(scenario)
+
+
+def otp_with(**limits):
+    service = OTPService()
+    service.use_client(fake_aioredis.FakeRedis(decode_responses=True))
+    for name, value in limits.items():
+        setattr(service, name, value)
+    return service
+
+
+def test_otp_windows_are_per_email_and_per_tenant():
+    service = otp_with(sends_per_tenant=2, attempts_per_tenant=2)
+
+    async def scenario():
+        await service.issue("a@acme.io", 1, 7, "shared")
+        await service.issue("b@acme.io", 2, 7, "shared")
+        with pytest.raises(OTPThrottled):
+            await service.issue("c@acme.io", 3, 7, "shared")
+        # Another tenant's sends are counted apart
+        await service.issue("d@other.io", 4, 8, "shared")
+
+        client = service._get_client()
+        assert await client.zcard("otp:sends:tenant:7") == 2
+        assert await client.zcard("otp:sends:email:a@acme.io") == 1
+
+        assert await service.verify("a@acme.io", "bad") is None
+        assert await service.verify("b@acme.io", "bad") is None
+        with pytest.raises(OTPThrottled):
+            await service.verify("a@acme.io", "bad")
+        assert await client.zcard("otp:attempts:tenant:7") == 2
+    asyncio.run(scenario())
+
+
+def test_verify_reads_again_when_the_code_changes_tenant():
+    service = otp_with()
+
+    async def scenario():
+        code = await service.issue("a@acme.io", 1, 7, "shared")
+        client = service._get_client()
+        get = client.get
+        reads = []
+
+        async def stale_first(key):
+            # The first read sees a code issued for another tenant
+            value = await get(key)
+            reads.append(key)
+            if len(reads) == 1:
+                return json.dumps({**json.loads(value), "tenant_id": "8"})
+            return value
+        client.get = stale_first
+
+        grant = await service.verify("a@acme.io", code)
+        assert (grant.tenant_id, len(reads)) == (7, 2)
+        assert not await client.exists("otp:attempts:tenant:8")
+    asyncio.run(scenario())
+
+
+def test_google_login_is_unavailable_until_keys_can_be_fetched(env, run):
+    jwks = StandinJWKS(google_verifier.client_id)
+    tenant = env.tenants[0]
+    outage = True
+
+    async def fetch(url):
+        if outage:
+            raise ConnectionError("certs endpoint unreachable")
+        return await jwks.fetch(url)
+    google_verifier.use_fetcher(fetch)
+
+    async def scenario(client):
+        nonlocal outage
+        token = jwks.issue(tenant.email)
+        response = await client.post("/api/auth/google", params={"token": token})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == str(google_verifier.retry_interval)
+
+        outage = False
+        response = await client.post("/api/auth/google", params={"token": token})
+        assert response.status_code == 200
+        assert response.json()["tenant_id"] == tenant.id
+    run(scenario)
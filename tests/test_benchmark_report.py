@@ -0,0 +1,22 @@
+from benchmarks import report
+from benchmarks.workload import Sample
+
+
+def result(statuses):
+    samples = [Sample("create_todo", 1, "shared", status, 0.01) for status in statuses]
+    return report.summarize(samples, 1.0, {})
+
+
+def test_failed_requests_are_counted_as_errors():
+    summary = result([200, 500, 401, 304])["summary"]
+    assert summary["errors"] == 2
+    assert report.error_rate(summary) == 0.5
+
+
+def test_compare_flags_more_errors_at_the_same_latency():
+    baseline = result([200] * 10)
+    current = result([200] * 5 + [500] * 5)
+    regressions = report.compare(current, baseline)
+    assert "errors: 0/10 -> 5/10 failed" in regressions
+    assert "create_todo.errors: 0/10 -> 5/10 failed" in regressions
+    assert report.compare(baseline, baseline) == []
@@ -0,0 +1,77 @@
+import asyncio
+import io
+import json
+
+from fakeredis import FakeServer
+from fakeredis import aioredis as fake_aioredis
+from starlette.datastructures import UploadFile
+
+from backend.services.content_store import ContentStore
+from backend.services.file_metadata import metadata_key
+from backend.services.tenant_redis import tenant_keyspace
+from backend.storage.filesystem import FilesystemContainerClient
+
+TENANT_ID = 7
+
+
+def setup(tmp_path):
+    store = ContentStore()
+    store.chunk_size = 4
+    redis_client = tenant_keyspace.bind(
+        fake_aioredis.FakeRedis(server=FakeServer(), decode_responses=True), TENANT_ID
+    )
+    return store, redis_client, FilesystemContainerClient(tmp_path / "primary")
+
+
+def upload(data: bytes) -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename="report.txt")
+
+
+def test_concurrent_uploads_get_distinct_versions(tmp_path):
+    store, redis_client, container = setup(tmp_path)
+
+    async def scenario():
+        manifests = await asyncio.gather(*[
+            store.store(TENANT_ID, container, redis_client, "report.txt",
+                        upload(f"draft {n}".encode()), "text/plain")
+            for n in range(5)
+        ])
+        assert sorted(m["version"] for m in manifests) == [1, 2, 3, 4, 5]
+
+        # Each version's manifest is its own blob
+        fresh = ContentStore()
+        for manifest in manifests:
+            loaded = await fresh.load_version(container, TENANT_ID, "report.txt", manifest["version"])
+            assert loaded["content_hash"] == manifest["content_hash"]
+    asyncio.run(scenario())
+
+
+def test_redis_metadata_refers_to_the_manifest(tmp_path):
+    store, redis_client, container = setup(tmp_path)
+
+    async def scenario():
+        manifest = await store.store(TENANT_ID, container, redis_client, "report.txt",
+                                     upload(b"0123456789abcdef"), "text/plain")
+        assert len(manifest["chunks"]) == 4
+        metadata = json.loads(await redis_client.get(metadata_key("report.txt")))
+        assert "chunks" not in metadata
+        assert metadata["version"] == manifest["version"]
+
+        # A process without the manifest cached reads it back from the blob
+        current = await ContentStore().get_manifest(redis_client, container, TENANT_ID, "report.txt")
+        assert current["chunks"] == manifest["chunks"]
+    asyncio.run(scenario())
+
+
+def test_lost_version_counter_continues_after_the_latest(tmp_path):
+    store, redis_client, container = setup(tmp_path)
+
+    async def scenario():
+        for n in range(3):
+            await store.store(TENANT_ID, container, redis_client, "report.txt",
+                              upload(f"draft {n}".encode()), "text/plain")
+        await redis_client.delete(store.version_counter_key("report.txt"))
+        manifest = await store.store(TENANT_ID, container, redis_client, "report.txt",
+                                     upload(b"final"), "text/plain")
+        assert manifest["version"] == 4
+    asyncio.run(scenario())
@@ -0,0 +1,76 @@
+import hashlib
+
+import pytest
+
+from backend.models.tenant import TenancyType
+from backend.services.content_store import content_store
+from backend.storage.filesystem import FilesystemContainerClient
+from backend.storage.registry import blob_registry
+
+SECRET = b"tenant A's quarterly numbers"
+
+
+def shared_pair(env):
+    return [t for t in env.tenants if t.tenancy_type == TenancyType.SHARED][:2]
+
+
+def test_shared_tenant_cannot_read_another_tenants_blobs(env, run, headers):
+    owner, other = shared_pair(env)
+    digest = hashlib.sha256(SECRET).hexdigest()
+
+    async def scenario(client):
+        uploaded = await client.post("/api/upload", headers=headers(owner),
+                                     files={"file": ("secret.txt", SECRET, "text/plain")})
+        assert uploaded.status_code == 200
+        own = await client.get("/api/files/secret.txt", headers=headers(owner))
+        assert own.status_code == 200
+        assert own.content == SECRET
+
+        # The blobs share a container, but names resolve under the caller's prefix
+        for name in ("secret.txt",
+                     f"{owner.id}/manifests/secret.txt/latest.json",
+                     f"{owner.id}/chunks/{digest[:2]}/{digest}"):
+            response = await client.get(f"/api/files/{name}", headers=headers(other))
+            assert response.status_code == 404, name
+    run(scenario)
+
+
+def test_legacy_blob_is_read_from_the_tenants_prefix(env, run, headers):
+    owner, other = shared_pair(env)
+    container = blob_registry.get_container_client(owner)
+
+    async def scenario(client):
+        await container.get_blob_client(
+            content_store.legacy_path(owner.id, "old.txt")
+        ).upload_blob(b"before chunking")
+        response = await client.get("/api/files/old.txt", headers=headers(owner))
+        assert response.status_code == 200
+        assert response.content == b"before chunking"
+
+        response = await client.get(f"/api/files/{owner.id}/files/old.txt", headers=headers(other))
+        assert response.status_code == 404
+    run(scenario)
+
+
+def test_filenames_climbing_out_are_rejected(env, run, headers):
+    tenant = next(t for t in env.tenants if t.tenancy_type == TenancyType.DEDICATED)
+
+    async def scenario(client):
+        h = headers(tenant)
+        for path in ("/api/files/..%2F..%2F..%2F..%2Fetc%2Fhostname",
+                     "/api/files/a/..%2F..%2Fsecret.txt",
+                     "/api/files/..%2Fother/versions"):
+            response = await client.get(path, headers=h)
+            assert response.status_code == 400, path
+        uploaded = await client.post("/api/upload", headers=h,
+                                     files={"file": ("../../escape.txt", b"x", "text/plain")})
+        assert uploaded.status_code == 400
+    run(scenario)
+
+
+def test_filesystem_container_keeps_blobs_inside_its_root(tmp_path):
+    container = FilesystemContainerClient(tmp_path / "primary")
+    assert container.get_blob_client("1/chunks/ab/abc").path == tmp_path / "primary/1/chunks/ab/abc"
+    for name in ("../secret", "1/../../secret", "/etc/hostname"):
+        with pytest.raises(ValueError):
+            container.get_blob_client(name)
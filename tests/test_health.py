@@ -0,0 +1,72 @@
+import asyncio
+import threading
+
+import pytest
+
+from backend.services import health as health_module
+from backend.services.health import health_checker
+
+
+@pytest.fixture
+def checker(monkeypatch):
+    monkeypatch.setattr(health_checker, "_cache", {})
+    monkeypatch.setattr(health_checker, "stats", dict.fromkeys(health_checker.stats, 0))
+    return health_checker
+
+
+def test_results_are_cached_and_shared(checker):
+    calls = []
+
+    async def probe():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+
+    async def scenario():
+        first = await asyncio.gather(*(checker.run("dependency", probe) for _ in range(5)))
+        again = await checker.run("dependency", probe)
+        return first, again
+    first, again = asyncio.run(scenario())
+
+    # Concurrent callers share one probe, and the next one gets its result
+    assert len(calls) == 1
+    assert all(result is first[0] for result in first) and again is first[0]
+    assert again["status"] == "ok"
+    assert checker.stats["cache_hits"] == 1
+
+
+def test_readiness_reports_each_dependency(env, run, checker):
+    async def scenario(client):
+        live = await client.get("/health/live")
+        assert live.status_code == 200
+        ready = await client.get("/health/ready")
+        assert ready.status_code == 200, ready.json()
+        assert set(ready.json()["checks"]) == {"database", "redis", "blob"}
+        assert (await client.get("/health")).json()["tenants"]["tenants_checked"] == 0
+    run(scenario)
+
+
+def test_a_hung_database_ping_times_out_on_the_probe_threads(env, run, checker, monkeypatch):
+    monkeypatch.setattr(checker, "probe_timeout", 0.1)
+    release = threading.Event()
+    threads = []
+
+    def hung(engine, timeout):
+        threads.append(threading.current_thread().name)
+        assert timeout == 0.1
+        release.wait(5)
+    monkeypatch.setattr(health_module, "_ping_engine", hung)
+
+    async def scenario(client):
+        try:
+            ready = await client.get("/health/ready")
+            assert ready.status_code == 503
+            checks = ready.json()["checks"]
+            assert checks["database"]["status"] == "timeout"
+            assert checks["redis"]["status"] == "ok"
+            # The stuck ping holds a probe thread, not one of the default pool
+            assert threads and threads[0].startswith("health-probe")
+            assert (await asyncio.to_thread(lambda: "served")) == "served"
+        finally:
+            release.set()
+    run(scenario)
+    assert checker.stats["timeouts"] == 1
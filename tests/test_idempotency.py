@@ -0,0 +1,79 @@
+import asyncio
+from types import SimpleNamespace
+
+from fakeredis import aioredis as fake_aioredis
+from fastapi.responses import Response
+
+from backend.services.idempotency import HEADER, REPLAY_HEADER, Idempotency
+from backend.services.tenant_redis import tenant_keyspace
+
+TODO = {"title": "Pay invoice", "description": "March"}
+
+
+def test_create_todo_is_replayed(env, run, headers):
+    tenant = env.tenants[0]
+
+    async def scenario(client):
+        h = headers(tenant, **{HEADER: "create-1"})
+        first = await client.post("/api/todos", headers=h, json=TODO)
+        assert first.status_code == 200
+        again = await client.post("/api/todos", headers=h, json=TODO)
+        assert again.status_code == 200
+        assert again.headers[REPLAY_HEADER] == "true"
+        assert again.json()["id"] == first.json()["id"]
+
+        todos = (await client.get("/api/todos", headers=headers(tenant))).json()
+        assert len(todos) == 1
+
+        other = await client.post("/api/todos", headers=h, json={**TODO, "title": "Other"})
+        assert other.status_code == 422
+    run(scenario)
+
+
+def test_upload_key_reused_with_other_content_is_rejected(env, run, headers):
+    tenant = env.tenants[0]
+
+    async def scenario(client):
+        h = headers(tenant, **{HEADER: "upload-1"})
+        first = await client.post("/api/upload", headers=h,
+                                  files={"file": ("notes.txt", b"first draft", "text/plain")})
+        assert first.status_code == 200
+        again = await client.post("/api/upload", headers=h,
+                                  files={"file": ("notes.txt", b"first draft", "text/plain")})
+        assert again.status_code == 200
+        assert again.headers[REPLAY_HEADER] == "true"
+
+        # Same name, size and type, different bytes
+        other = await client.post("/api/upload", headers=h,
+                                  files={"file": ("notes.txt", b"final draft", "text/plain")})
+        assert other.status_code == 422
+    run(scenario)
+
+
+def test_replay_keeps_the_resource_headers():
+    service = Idempotency()
+    redis_client = tenant_keyspace.bind(fake_aioredis.FakeRedis(decode_responses=True), 7)
+    calls = []
+
+    @service.idempotent()
+    async def create(request):
+        calls.append(1)
+        return Response(content=b'{"id": 1}', media_type="application/json", status_code=201,
+                        headers={"Location": "/api/things/1", "ETag": '"v1"',
+                                 "Set-Cookie": "session=abc"})
+
+    request = SimpleNamespace(
+        method="POST", url=SimpleNamespace(path="/api/things"),
+        headers={HEADER: "create-thing"}, state=SimpleNamespace(tenant_id=7, redis=redis_client),
+    )
+
+    async def scenario():
+        return await create(request), await create(request)
+    first, again = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert again.status_code == 201 and again.body == first.body
+    assert again.headers["Location"] == "/api/things/1"
+    assert again.headers["ETag"] == '"v1"'
+    assert again.headers[REPLAY_HEADER] == "true"
+    assert "set-cookie" not in again.headers
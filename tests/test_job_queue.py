@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+from fakeredis import aioredis as fake_aioredis
+
+from backend.jobs.queue import JobQueue
+
+
+def make_queue(**settings):
+    queue = JobQueue()
+    queue.use_client(fake_aioredis.FakeRedis(decode_responses=True))
+    for name, value in settings.items():
+        setattr(queue, name, value)
+    return queue
+
+
+def test_higher_lanes_are_claimed_first():
+    queue = make_queue()
+
+    async def scenario():
+        for priority in ("low", "default", "high", "default"):
+            await queue.enqueue(f"job-{priority}", priority=priority)
+        claimed = []
+        while (job := await queue.claim()) is not None:
+            claimed.append(job.priority)
+            assert await queue.ack(job)
+        return claimed
+    assert asyncio.run(scenario()) == ["high", "default", "default", "low"]
+
+
+def test_tenants_are_held_to_their_concurrency_cap():
+    queue = make_queue(default_tenant_concurrency=2, cap_retry_delay=0)
+
+    async def scenario():
+        for _ in range(3):
+            await queue.enqueue("work", tenant_id=1)
+        await queue.enqueue("work", tenant_id=2)
+
+        running = [await queue.claim() for _ in range(3)]
+        # The third job of tenant 1 was parked; tenant 2 was not held up
+        assert [job.tenant_id for job in running] == [1, 1, 2]
+        assert await queue.claim() is None
+        assert (await queue.stats())["delayed"] == 1
+
+        await queue.ack(running[0])
+        await queue.maintain()
+        parked = await queue.claim()
+        assert parked.tenant_id == 1
+
+        # A cap of 0 lifts the limit
+        await queue.set_tenant_concurrency(1, 0)
+        await queue.enqueue("work", tenant_id=1)
+        assert (await queue.claim()).tenant_id == 1
+    asyncio.run(scenario())
+
+
+def test_failures_back_off_then_dead_letter():
+    queue = make_queue(retry_base_delay=10.0, retry_max_delay=15.0)
+    assert all(5.0 <= queue.backoff(1) <= 10.0 for _ in range(20))
+    assert all(7.5 <= queue.backoff(6) <= 15.0 for _ in range(20))
+
+    async def scenario():
+        job_id = await queue.enqueue("flaky", max_attempts=2)
+        job = await queue.claim()
+        before = time.time()
+        assert await queue.fail(job, "boom")
+        due = await queue.client.zscore(f"{queue.prefix}delayed", job_id)
+        assert before + 5.0 <= due <= time.time() + 10.0
+        assert await queue.claim() is None
+
+        # Due now: the second attempt is the last
+        await queue.client.zadd(f"{queue.prefix}delayed", {job_id: 0})
+        await queue.maintain()
+        job = await queue.claim()
+        assert job.attempts == 2
+        assert await queue.fail(job, "boom again")
+        assert await queue.client.lrange(f"{queue.prefix}dead", 0, -1) == [job_id]
+        assert await queue.client.hget(f"{queue.prefix}job:{job_id}", "last_error") == "boom again"
+    asyncio.run(scenario())
+
+
+def test_a_stale_attempt_cannot_settle_the_job():
+    queue = make_queue(lease_seconds=-1)
+
+    async def scenario():
+        await queue.enqueue("slow", max_attempts=3)
+        stale = await queue.claim()
+        # The lease ran out and the job went to another worker
+        assert (await queue.maintain())["expired"] == 1
+        queue.lease_seconds = 60
+        current = await queue.claim()
+        assert current.id == stale.id and current.token != stale.token
+
+        assert not await queue.heartbeat(stale)
+        assert not await queue.ack(stale)
+        assert not await queue.fail(stale, "late")
+        assert (await queue.stats())["running"] == 1
+
+        assert await queue.heartbeat(current)
+        assert await queue.ack(current)
+        assert (await queue.stats())["running"] == 0
+    asyncio.run(scenario())
@@ -0,0 +1,44 @@
+import asyncio
+import threading
+
+from backend.services.metering import Metering
+from backend.services.resource_quotas import quotas
+
+
+def test_filling_the_aggregates_flushes_early():
+    metering = Metering()
+    metering.flush_interval = 3600
+    metering.max_keys = 10
+    written = []
+    metering._write = lambda rows: written.append(rows)
+
+    async def scenario():
+        metering.start()
+        # From another thread, as the sync service layer records
+        worker = threading.Thread(target=lambda: [metering.record(n, "api_calls") for n in range(8)])
+        worker.start()
+        worker.join()
+        for _ in range(100):
+            if written:
+                break
+            await asyncio.sleep(0.01)
+        flushed = len(written)
+        await metering.close()
+        return flushed
+
+    assert asyncio.run(scenario()) == 1
+    assert metering.stats["dropped"] == 0
+    assert metering.stats["early_flushes"] >= 1
+    assert sum(row["events"] for row in written[0]["minute"]) == 8
+
+
+def test_api_calls_per_minute_is_enforced(env, run, headers, monkeypatch):
+    tenant = env.tenants[0]
+    monkeypatch.setitem(quotas.default_limits, "api_calls_per_minute", 2)
+
+    async def scenario(client):
+        return [(await client.get("/api/search/todos", headers=headers(tenant))).status_code
+                for _ in range(3)]
+    statuses = run(scenario)
+    assert 429 not in statuses[:2]
+    assert statuses[2] == 429
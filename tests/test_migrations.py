@@ -0,0 +1,45 @@
+from io import StringIO
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect
+
+from backend.base import Base
+from backend.models import audit, file, tenant, todo, usage, user  # noqa: F401 - registers tables
+from backend.services.migration_runner import migrate_database
+
+
+def test_upgrade_creates_the_model_schema(tmp_path):
+    db_url = f"sqlite:///{tmp_path}/tenant.db"
+    result = migrate_database("alembic.ini", db_url)
+    assert result["status"] == "upgraded", result["error"]
+    assert result["to"] is not None
+
+    engine = create_engine(db_url)
+    try:
+        tables = set(inspect(engine).get_table_names())
+        assert {"tenants", "users", "todos", "files", "audit_events",
+                "usage_minute", "usage_hour", "usage_day"} <= tables
+        with engine.connect() as connection:
+            assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+    finally:
+        engine.dispose()
+
+    assert migrate_database("alembic.ini", db_url)["status"] == "up_to_date"
+
+
+def test_search_vector_revision_is_postgres_only(tmp_path):
+    head = ScriptDirectory.from_config(Config("alembic.ini")).get_current_head()
+    result = migrate_database("alembic.ini", f"sqlite:///{tmp_path}/tenant.db")
+    assert result["to"] == head
+
+    # Generated tsvector columns are PostgreSQL DDL; render them offline
+    output = StringIO()
+    config = Config("alembic.ini", output_buffer=output)
+    config.set_main_option("sqlalchemy.url", "postgresql://localhost/tenant")
+    command.upgrade(config, "e5d2ee4235b8:head", sql=True)
+    assert "ix_todos_search_vector" in output.getvalue()
+    assert "ix_files_search_vector" in output.getvalue()
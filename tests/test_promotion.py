@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+from fakeredis import FakeServer
+from fakeredis import aioredis as fake_aioredis
+from sqlalchemy import create_engine, text
+
+from backend.database import db_manager
+from backend.models.tenant import Tenant, TenancyType
+from backend.services import tenant_promotion as promotion_module
+from backend.services.migration_runner import migrate_database
+from backend.services.tenant_promotion import tenant_promotion
+from backend.services.tenant_resources import tenant_resources
+
+
+def test_promote_moves_a_shared_tenant_while_it_serves(env, run, headers, tmp_path, monkeypatch):
+    tenant = next(t for t in env.tenants if t.tenancy_type == TenancyType.SHARED)
+    db_url = f"sqlite:///{tmp_path}/promoted.db"
+
+    # Stand-ins for PostgreSQL, Redis and Azure provisioning; the database
+    # still gets its schema from the migrations
+    async def provision(name):
+        assert migrate_database("alembic.ini", db_url)["status"] == "upgraded"
+        return db_url
+
+    async def create_blob_storage(name):
+        return {"backend": "filesystem", "root": str(tmp_path / "promoted-blobs")}
+
+    def from_url(url, **kwargs):
+        if url == tenant_resources.shared_redis_url:
+            server = env.redis.shared_server
+        else:
+            server = env.redis.tenant_servers.setdefault(tenant.id, FakeServer())
+        return fake_aioredis.FakeRedis(server=server, **kwargs)
+
+    monkeypatch.setattr(promotion_module, "provision_tenant_database", provision)
+    monkeypatch.setattr(promotion_module, "aioredis", SimpleNamespace(from_url=from_url))
+    monkeypatch.setattr(tenant_resources, "create_blob_storage", create_blob_storage)
+    monkeypatch.setattr(tenant_promotion, "drain_seconds", 0)
+    monkeypatch.setattr(tenant_resources, "_reserved_redis_dbs", set())
+
+    async def scenario(client):
+        h = headers(tenant)
+        todo = (await client.post("/api/todos", headers=h, json={"title": "Before"})).json()
+        uploaded = await client.post("/api/upload", headers=h,
+                                     files={"file": ("plan.txt", b"the plan", "text/plain")})
+        assert uploaded.status_code == 200
+
+        stats = await tenant_promotion.promote(tenant.id)
+        assert stats["rows"]["todos"] == 1
+        assert stats["blobs"] >= 3  # chunk, versioned and latest manifest
+        assert stats["redis_keys"] > 0
+
+        with db_manager.get_db() as db:
+            row = db.query(Tenant).filter_by(id=tenant.id).one()
+            assert row.tenancy_type == TenancyType.DEDICATED
+            assert row.db_connection == db_url
+            assert row.redis_config["db"] == 1
+
+        # Served from the dedicated database, Redis and blob storage now
+        todos = (await client.get("/api/todos", headers=h)).json()
+        assert [t["id"] for t in todos] == [todo["id"]]
+        created = await client.post("/api/todos", headers=h, json={"title": "After"})
+        assert created.status_code == 200
+        download = await client.get("/api/files/plan.txt", headers=h)
+        assert download.status_code == 200
+        assert download.content == b"the plan"
+
+        engine = create_engine(db_url)
+        with engine.connect() as connection:
+            titles = connection.execute(text("SELECT title FROM todos ORDER BY id")).scalars().all()
+        engine.dispose()
+        assert titles == ["Before", "After"]
+    run(scenario)
+
+
+def test_dedicated_redis_databases_are_not_reused(env, monkeypatch):
+    monkeypatch.setattr(tenant_resources, "_reserved_redis_dbs", set())
+    first = tenant_resources._get_next_redis_db()
+    second = tenant_resources._get_next_redis_db()
+    assert first >= 1 and second >= 1 and first != second
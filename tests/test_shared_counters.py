@@ -0,0 +1,42 @@
+from backend.services.monitoring import metrics
+from backend.services.shared_state import (
+    COUNTER_KEY_SIZE, DROPPED_KEY, TRUNCATED_KEY, SharedCounters, SharedState,
+)
+
+
+def test_a_full_table_counts_what_it_drops():
+    counters = SharedCounters(slots=8)
+    counters.allocate(1)
+    for n in range(10):
+        counters.add(f"requests|{n}")
+    assert counters.get(DROPPED_KEY) == 4  # two slots are the overflow counters
+
+    state = SharedState()
+    state.allocate(segments=2, counter_slots=32)
+    assert state.counters.slots == 32
+    assert state.get_stats()["counters_dropped"] == 0
+
+
+def test_long_keys_stay_apart_and_are_counted():
+    counters = SharedCounters(slots=64)
+    counters.allocate(1)
+    prefix = "x" * COUNTER_KEY_SIZE
+    counters.add(prefix + "a", 1)
+    counters.add(prefix + "b", 2)
+    assert counters.get(prefix + "a") == 1
+    assert counters.get(prefix + "b") == 2
+    assert counters.get(TRUNCATED_KEY) == 2
+
+
+def test_request_metrics_are_keyed_by_route(env, run, headers):
+    tenant = env.tenants[0]
+
+    async def scenario(client):
+        for n in range(3):
+            created = await client.post("/api/todos", headers=headers(tenant), json={"title": f"t{n}"})
+            assert (await client.get(f"/api/todos/{created.json()['id']}",
+                                     headers=headers(tenant))).status_code == 200
+        requests = metrics.get_metrics(tenant.id)["requests"]
+        assert requests[f"{tenant.id}:/todos/{{todo_id}}"] == 3
+        assert not any(path.rsplit("/", 1)[-1].isdigit() for path in requests)
+    run(scenario)
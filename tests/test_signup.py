@@ -0,0 +1,93 @@
+from backend.database import db_manager
+from backend.jobs import tasks
+from backend.jobs.queue import job_queue
+from backend.models.tenant import Tenant
+from backend.models.user import User, UserRole
+from backend.services.audit import audit_log
+from backend.services.migration_runner import migrate_database
+from backend.services.tenant_resources import tenant_resources
+
+
+def test_signup_creates_tenant_with_owner(run):
+    async def scenario(client):
+        response = await client.post("/api/signup/tenant", json={
+            "name": "acme", "db_type": "dedicated", "admin_email": "owner@acme.io",
+            "admin_first_name": "Ada", "admin_last_name": "Owner",
+        })
+        assert response.status_code == 200, response.text
+        tenant_id = response.json()["tenant_id"]
+        with db_manager.get_db() as db:
+            tenant = db.get(Tenant, tenant_id)
+            # Activated by the provisioning job once its resources exist
+            assert not tenant.is_active
+            admin = db.get(User, response.json()["admin_user_id"])
+            assert admin.role == UserRole.OWNER and admin.tenant_id == tenant_id
+        assert await job_queue.client.exists(f"{job_queue.prefix}unique:provision:{tenant_id}")
+
+        response = await client.post("/api/signup/user", json={
+            "email": "staff@acme.io", "first_name": "Sam", "last_name": "Staff",
+            "tenant_id": tenant_id,
+        })
+        assert response.status_code == 409
+
+        response = await client.post("/api/signup/user", json={
+            "email": "nobody@acme.io", "first_name": "No", "last_name": "Body",
+            "tenant_id": 10 ** 6,
+        })
+        assert response.status_code == 404
+    run(scenario)
+
+
+def signup(client, name, db_type):
+    return client.post("/api/signup/tenant", json={
+        "name": name, "db_type": db_type, "admin_email": f"owner@{name}.io",
+        "admin_first_name": "Ada", "admin_last_name": "Owner",
+    })
+
+
+def audited(tenant_id, action):
+    with db_manager.get_db(tenant_id) as db:
+        return [(e.action, e.actor_id) for e in audit_log.query(db, tenant_id, action=action)]
+
+
+def test_signups_are_audited(run):
+    async def scenario(client):
+        created = (await signup(client, "shared-co", "shared")).json()
+        user = (await client.post("/api/signup/user", json={
+            "email": "staff@shared-co.io", "first_name": "Sam", "last_name": "Staff",
+            "tenant_id": created["tenant_id"],
+        })).json()
+        await audit_log.flush()
+
+        tenant_id = created["tenant_id"]
+        assert audited(tenant_id, "tenant.create") == [("tenant.create", created["admin_user_id"])]
+        with db_manager.get_db(tenant_id) as db:
+            events = audit_log.query(db, tenant_id, action="user.create")
+            assert [e.resource_id for e in events] == [str(user["user_id"])]
+    run(scenario)
+
+
+def test_dedicated_signup_is_audited_once_provisioned(run, tmp_path, monkeypatch):
+    db_url = f"sqlite:///{tmp_path}/dedicated.db"
+
+    async def provision(name):
+        migrate_database("alembic.ini", db_url)
+        return db_url
+
+    async def create_tenant_resources(name):
+        return {"redis_config": {"host": "localhost", "port": 6379, "db": 1},
+                "blob_storage_config": {"backend": "filesystem", "root": str(tmp_path / "blobs")}}
+
+    monkeypatch.setattr(tasks, "provision_tenant_database", provision)
+    monkeypatch.setattr(tenant_resources, "create_tenant_resources", create_tenant_resources)
+
+    async def scenario(client):
+        created = (await signup(client, "dedicated-co", "dedicated")).json()
+        # Nothing to write until the worker has created the database
+        assert await audit_log.flush() == 0
+        job = await job_queue.claim(["high"])
+        assert job.name == "provision_tenant"
+        await tasks.provision_tenant(job)
+        await audit_log.flush()
+        assert audited(created["tenant_id"], "tenant.create") == [("tenant.create", created["admin_user_id"])]
+    run(scenario)
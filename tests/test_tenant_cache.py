@@ -0,0 +1,34 @@
+from backend.database import db_manager
+from backend.services.db_service import db_service
+from backend.services.shared_state import SharedTenantCache, shared_state
+
+
+def test_put_skips_after_an_invalidation():
+    cache = SharedTenantCache(slots=16)
+    generation = cache.generation(3)
+    cache.invalidate(3)
+    assert not cache.put(3, {"tenancy_type": "shared"}, generation)
+    assert cache.get(3) is None
+
+    assert cache.put(3, {"tenancy_type": "shared"}, cache.generation(3))
+    assert cache.get(3) == {"tenancy_type": "shared"}
+
+
+def test_lookup_racing_an_invalidation_is_not_cached(env, monkeypatch):
+    tenant_id = env.tenants[0].id
+    shared_state.tenant_cache.invalidate(tenant_id)
+    lookup = db_service.get_tenant_session
+
+    def racing_lookup(session, tid):
+        tenant = lookup(session, tid)
+        # The tenant changes and is invalidated while this read is in flight
+        shared_state.tenant_cache.invalidate(tid)
+        return tenant
+
+    monkeypatch.setattr(db_service, "get_tenant_session", racing_lookup)
+    assert db_manager.get_tenant_info(tenant_id)["tenancy_type"] == "shared"
+    assert shared_state.tenant_cache.get(tenant_id) is None
+
+    monkeypatch.setattr(db_service, "get_tenant_session", lookup)
+    db_manager.get_tenant_info(tenant_id)
+    assert shared_state.tenant_cache.get(tenant_id) is not None
@@ -0,0 +1,36 @@
+from backend.models.tenant import TenancyType
+from backend.security.tenant_security import security
+from backend.services.circuit_breaker import tenant_breakers
+
+
+def test_open_database_breaker_fails_fast(env, run, headers):
+    tenant = next(t for t in env.tenants if t.tenancy_type == TenancyType.DEDICATED)
+
+    async def scenario(client):
+        assert (await client.get("/api/todos", headers=headers(tenant))).status_code == 200
+
+        breaker = tenant_breakers.breaker("database", tenant.id)
+        for _ in range(breaker.min_calls):
+            breaker.record(False)
+        response = await client.get("/api/todos", headers=headers(tenant))
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) >= 1
+
+        # Other tenants are unaffected
+        other = next(t for t in env.tenants if t.id != tenant.id)
+        assert (await client.get("/api/todos", headers=headers(other))).status_code == 200
+    run(scenario)
+
+
+def test_tenant_comes_from_a_signed_token(env, run):
+    tenant = env.tenants[0]
+
+    async def scenario(client):
+        forged = security.generate_tenant_token(tenant.id, ["file:read"])[:-4] + "AAAA"
+        response = await client.get("/api/todos", headers={"X-API-Key": forged})
+        assert response.status_code == 401
+
+        unknown = security.generate_tenant_token(10 ** 6, ["file:read"])
+        response = await client.get("/api/todos", headers={"X-API-Key": unknown})
+        assert response.status_code == 404
+    run(scenario)
@@ -0,0 +1,170 @@
+import gzip
+import json
+import shutil
+from types import SimpleNamespace
+
+import pytest
+from fakeredis import aioredis as fake_aioredis
+
+from backend.database import db_manager
+from backend.models.todo import Todo
+from backend.models.tenant import TenancyType
+from backend.services import tenant_purge as purge_module
+from backend.services.tenant_lifecycle import lifecycle_manager
+from backend.services.tenant_purge import tenant_purge
+from backend.services.tenant_redis import tenant_keyspace
+from backend.storage.registry import blob_registry
+
+
+class StandinS3:
+    def __init__(self, root):
+        self.root = root
+        self.objects = {}
+
+    def upload_file(self, path, bucket, key):
+        target = self.root / key.replace("/", "_")
+        shutil.copyfile(path, target)
+        self.objects[f"{bucket}/{key}"] = target
+
+
+@pytest.fixture
+def purging(env, tmp_path, monkeypatch):
+    """The purge against the harness's Redis, with small batches and no rests"""
+    monkeypatch.setattr(purge_module, "aioredis", SimpleNamespace(
+        from_url=lambda url, **kwargs: fake_aioredis.FakeRedis(server=env.redis.shared_server, **kwargs)
+    ))
+    s3 = StandinS3(tmp_path)
+    monkeypatch.setattr(lifecycle_manager, "_s3", s3)
+    monkeypatch.setattr(tenant_purge, "batch_size", 2)
+    monkeypatch.setattr(tenant_purge, "min_batch_size", 2)
+    monkeypatch.setattr(tenant_purge, "max_batch_size", 2)
+    monkeypatch.setattr(tenant_purge, "duty_cycle", 1.0)
+    monkeypatch.setattr(tenant_purge, "scan_count", 2)
+    monkeypatch.setattr(tenant_purge, "blob_batch_size", 2)
+    return s3
+
+
+def shared_tenants(env):
+    return [t for t in env.tenants if t.tenancy_type == TenancyType.SHARED]
+
+
+async def seed(client, headers, tenant, todos=5, files=2):
+    for n in range(todos):
+        response = await client.post("/api/todos", headers=headers(tenant), json={"title": f"todo {n}"})
+        assert response.status_code == 200
+    for n in range(files):
+        response = await client.post("/api/upload", headers=headers(tenant),
+                                     files={"file": (f"notes-{n}.txt", f"notes {n}".encode(), "text/plain")})
+        assert response.status_code == 200
+
+
+def todo_count(tenant_id):
+    with db_manager.get_db() as db:
+        return db.query(Todo).filter_by(tenant_id=tenant_id).count()
+
+
+async def tenant_keys(env, tenant_id):
+    client = fake_aioredis.FakeRedis(server=env.redis.shared_server, decode_responses=True)
+    return [key async for key in client.scan_iter(match=tenant_keyspace.pattern(tenant_id))]
+
+
+async def blob_names(tenant):
+    container = blob_registry.get_container_client(tenant)
+    return [blob["name"] async for blob in container.list_blobs(name_starts_with=f"{tenant.id}/")]
+
+
+def test_delete_backs_up_then_purges_everything(env, run, headers, purging):
+    tenant, other = shared_tenants(env)
+
+    async def scenario(client):
+        await seed(client, headers, tenant)
+        await seed(client, headers, other, todos=1, files=1)
+        row = SimpleNamespace(id=tenant.id, tenancy_type=tenant.tenancy_type, blob_storage_config=None)
+        assert await tenant_keys(env, tenant.id) and await blob_names(row)
+
+        checkpoint = await lifecycle_manager.delete_tenant(tenant.id)
+        assert checkpoint["phases"] == "backup,database,redis,blobs"
+        assert checkpoint["completed_at"]
+        assert int(checkpoint["rows:todos"]) == 5
+        assert int(checkpoint["blobs"]) > 0
+
+        assert todo_count(tenant.id) == 0
+        assert await tenant_keys(env, tenant.id) == []
+        assert await blob_names(row) == []
+        assert (await client.get("/api/todos", headers=headers(tenant))).status_code == 403
+
+        # Nothing of the other tenant went with it
+        assert todo_count(other.id) == 1
+        assert await tenant_keys(env, other.id)
+        return checkpoint
+    checkpoint = run(scenario)
+
+    backup = purging.objects[f"{lifecycle_manager.backup_bucket}/{checkpoint['backup_key']}/export.ndjson.gz"]
+    records = [json.loads(line) for line in gzip.decompress(backup.read_bytes()).splitlines()]
+    assert sum(1 for record in records if record.get("type") == "todos") == 5
+    files = [record for record in records if record.get("type") == "files"]
+    assert sorted(record["filename"] for record in files) == ["notes-0.txt", "notes-1.txt"]
+
+
+def test_rows_are_deleted_in_batches(env, run, headers, purging, monkeypatch):
+    tenant = shared_tenants(env)[0]
+    batches = []
+    delete_batch = tenant_purge._delete_batch
+
+    def counting(model, column, tenant_id, limit):
+        deleted = delete_batch(model, column, tenant_id, limit)
+        batches.append((model.__tablename__, deleted))
+        return deleted
+    monkeypatch.setattr(tenant_purge, "_delete_batch", counting)
+
+    async def scenario(client):
+        await seed(client, headers, tenant, todos=5, files=0)
+        return await tenant_purge.purge_rows(tenant.id)
+    assert run(scenario) >= 5
+    assert [deleted for table, deleted in batches if table == "todos"] == [2, 2, 1]
+
+
+def test_interrupted_purge_resumes_from_its_checkpoint(env, run, headers, purging, monkeypatch):
+    tenant = shared_tenants(env)[0]
+    backups = []
+
+    async def backup(row):
+        backups.append(row.id)
+        return "backup-key"
+
+    save = tenant_purge._save
+    failures = {"redis": 1}
+
+    async def interrupted_save(tenant_id, **fields):
+        await save(tenant_id, **fields)
+        # The worker dies after the first SCAN page has been checkpointed
+        if "redis_cursor" in fields and failures["redis"]:
+            failures["redis"] -= 1
+            raise ConnectionError("lost the worker")
+    monkeypatch.setattr(tenant_purge, "_save", interrupted_save)
+
+    scanned_from = []
+    scan = fake_aioredis.FakeRedis.scan
+
+    async def recording_scan(self, cursor=0, **kwargs):
+        scanned_from.append(cursor)
+        return await scan(self, cursor, **kwargs)
+    monkeypatch.setattr(fake_aioredis.FakeRedis, "scan", recording_scan)
+
+    async def scenario(client):
+        await seed(client, headers, tenant, todos=3, files=3)
+        with pytest.raises(ConnectionError):
+            await tenant_purge.purge(tenant.id, backup=backup)
+        checkpoint = await tenant_purge.progress(tenant.id)
+        assert checkpoint["phases"] == "backup,database"
+        cursor = int(checkpoint["redis_cursor"])
+        assert cursor
+
+        del scanned_from[:]
+        checkpoint = await tenant_purge.purge(tenant.id, backup=backup)
+        assert checkpoint["phases"] == "backup,database,redis,blobs"
+        # The backup ran once, and the SCAN carried on from the saved cursor
+        assert backups == [tenant.id]
+        assert scanned_from[0] == cursor
+        assert await tenant_keys(env, tenant.id) == []
+    run(scenario)
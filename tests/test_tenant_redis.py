@@ -0,0 +1,49 @@
+import asyncio
+import io
+
+from fakeredis import FakeServer
+from fakeredis import aioredis as fake_aioredis
+from starlette.datastructures import UploadFile
+
+from backend.models.tenant import TenancyType
+from backend.services.content_store import ContentStore
+from backend.services.file_metadata import metadata_key
+from backend.services.resource_quotas import quotas
+from backend.services.tenant_redis import tenant_keyspace
+from backend.storage.filesystem import FilesystemContainerClient
+
+TENANT_ID = 7
+
+
+def fake_client():
+    return fake_aioredis.FakeRedis(server=FakeServer(), decode_responses=True)
+
+
+def test_chunk_index_is_not_evictable(tmp_path):
+    client = fake_client()
+    redis_client = tenant_keyspace.bind(client, TENANT_ID)
+    container = FilesystemContainerClient(tmp_path)
+    store = ContentStore()
+    store.chunk_size = 4
+
+    async def scenario():
+        await store.store(TENANT_ID, container, redis_client, "report.txt",
+                          UploadFile(io.BytesIO(b"0123456789"), filename="report.txt"), "text/plain")
+        lru = await client.zrange(tenant_keyspace.bookkeeping_keys(TENANT_ID)[2], 0, -1)
+        assert redis_client.key(store.chunk_index_key()) not in lru
+        assert redis_client.key(metadata_key("report.txt")) in lru
+    asyncio.run(scenario())
+
+
+def test_budget_follows_the_tier_quota(env, run):
+    mb = 1024 * 1024
+    shared = tenant_keyspace.bind(fake_client(), TENANT_ID, TenancyType.SHARED)
+    dedicated = tenant_keyspace.bind(fake_client(), TENANT_ID, TenancyType.DEDICATED)
+    assert (shared.budget, dedicated.budget) == (500 * mb, 2000 * mb)
+
+    async def scenario(client):
+        # The request's keyspace and the quota check agree on the limit
+        for tenant in env.tenants:
+            limit = await quotas.get_limit(tenant.id, "redis_mb")
+            assert limit == tenant_keyspace.budget(tenant.tenancy_type) / mb
+    run(scenario)
@@ -0,0 +1,80 @@
+from backend.models.tenant import TenancyType
+from backend.services.collection_versions import collection_versions
+
+TODO = {"title": "Write report", "description": "Quarterly"}
+
+
+def test_etag_changes_after_every_write(env, run, headers):
+    async def scenario(client):
+        for tenant in env.tenants:
+            h = headers(tenant)
+            response = await client.get("/api/todos", headers=h)
+            assert response.status_code == 200
+            etag = response.headers["ETag"]
+            unchanged = await client.get("/api/todos", headers={**h, "If-None-Match": etag})
+            assert unchanged.status_code == 304
+
+            tags = [etag]
+            created = await client.post("/api/todos", headers=h, json=TODO)
+            assert created.status_code == 200
+            todo_id = created.json()["id"]
+            tags.append((await client.get("/api/todos", headers=h)).headers["ETag"])
+
+            updated = await client.put(f"/api/todos/{todo_id}", headers=h,
+                                       json={**TODO, "title": "Send report"})
+            assert updated.status_code == 200
+            assert updated.json()["title"] == "Send report"
+            tags.append((await client.get("/api/todos", headers=h)).headers["ETag"])
+
+            deleted = await client.delete(f"/api/todos/{todo_id}", headers=h)
+            assert deleted.status_code == 200
+            listing = await client.get("/api/todos", headers={**h, "If-None-Match": tags[-1]})
+            assert listing.status_code == 200
+            assert listing.json() == []
+            tags.append(listing.headers["ETag"])
+
+            assert len(set(tags)) == 4, tags
+    run(scenario)
+
+
+def test_item_etag_revalidates(env, run, headers):
+    tenant = next(t for t in env.tenants if t.tenancy_type == TenancyType.DEDICATED)
+
+    async def scenario(client):
+        h = headers(tenant)
+        todo_id = (await client.post("/api/todos", headers=h, json=TODO)).json()["id"]
+        item = await client.get(f"/api/todos/{todo_id}", headers=h)
+        assert item.status_code == 200
+        etag = item.headers["ETag"]
+        assert (await client.get(f"/api/todos/{todo_id}",
+                                 headers={**h, "If-None-Match": etag})).status_code == 304
+
+        await client.put(f"/api/todos/{todo_id}", headers=h, json={**TODO, "title": "Renamed"})
+        item = await client.get(f"/api/todos/{todo_id}", headers={**h, "If-None-Match": etag})
+        assert item.status_code == 200
+        assert item.json()["title"] == "Renamed"
+    run(scenario)
+
+
+def test_lost_version_counter_does_not_revalidate_old_etags(env, run, headers, monkeypatch):
+    monkeypatch.setattr(collection_versions, "local_ttl", 0.0)
+    tenant = env.tenants[0]
+
+    async def scenario(client):
+        h = headers(tenant)
+        first = await client.get("/api/todos", headers=h)
+        assert first.headers["Cache-Control"] == "private, max-age=0, stale-while-revalidate=0"
+        etag = first.headers["ETag"]
+
+        # A flush or eviction: the counter starts over at 0 under a new epoch
+        redis_client = collection_versions._get_client()
+        await redis_client.delete(collection_versions._key(tenant.id, "todos"))
+        await client.post("/api/todos", headers=h, json=TODO)
+        await redis_client.delete(collection_versions._key(tenant.id, "todos"))
+
+        listing = await client.get("/api/todos", headers={**h, "If-None-Match": etag})
+        assert listing.status_code == 200
+        assert len(listing.json()) == 1
+        assert (await client.get("/api/todos", headers={**h, "If-None-Match": listing.headers["ETag"]})
+                ).status_code == 304
+    run(scenario)
@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+from backend.services.tracing import SamplingProfiler, tracer
+
+
+def test_profiler_reports_while_sampling():
+    profiler = SamplingProfiler(interval=0.001)
+
+    async def busy(tenant_id):
+        profiler.register_task(tenant_id)
+        deadline = time.monotonic() + 0.3
+        reports = []
+        while time.monotonic() < deadline:
+            # Reports are read on the loop while the sampler thread counts
+            reports.append(profiler.status(tenant_id))
+        profiler.unregister_task()
+        return reports
+
+    profiler.start(7, duration=5)
+    reports = asyncio.run(busy(7))
+    final = profiler.stop(7)
+    assert final["samples"] > 0
+    assert sum(stack["count"] for stack in final["stacks"]) <= final["samples"]
+    assert all(r["samples"] <= final["samples"] for r in reports)
+    assert any("test_tracing.py:busy" in stack["stack"] for stack in final["stacks"])
+
+
+def test_trace_covers_the_tenant_context(env, run, headers, monkeypatch):
+    tenant = env.tenants[0]
+    monkeypatch.setattr(tracer, "sample_rate", 1.0)
+    tracer.reset(tenant.id)
+
+    async def scenario(client):
+        response = await client.get("/api/todos", headers=headers(tenant))
+        assert response.status_code == 200
+    run(scenario)
+
+    breakdown = tracer.get_breakdown(tenant.id)
+    # Cold path in the middleware, then the endpoint's own spans
+    for name in ("request", "tenant.resolve", "db.tenant_lookup", "blob.get_container", "serialize"):
+        assert name in breakdown, name
+
+
+def test_redis_commands_are_traced(env, run, headers, monkeypatch):
+    tenant = env.tenants[0]
+    monkeypatch.setattr(tracer, "sample_rate", 1.0)
+    tracer.reset(tenant.id)
+
+    async def scenario(client):
+        uploaded = await client.post("/api/upload", headers=headers(tenant),
+                                     files={"file": ("a.txt", b"abc", "text/plain")})
+        assert uploaded.status_code == 200
+        assert (await client.get("/api/files/a.txt", headers=headers(tenant))).status_code == 200
+    run(scenario)
+
+    breakdown = tracer.get_breakdown(tenant.id)
+    assert "redis.set" in breakdown and "redis.get" in breakdown